@@ -1,26 +1,107 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from app.services.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+
 load_dotenv()
 
+def _normalize_url(url: str) -> str:
+    # Railway uses postgresql:// but we need postgresql+psycopg://
+    if url and url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+def _async_url(url: str) -> str:
+    # aiosqlite locally; psycopg 3 is async-capable
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1) if url.startswith("sqlite://") else url
+
 # Get DATABASE_URL from environment (Railway sets this automatically)
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pokemarketai.db")
+DATABASE_URL = _normalize_url(os.getenv("DATABASE_URL", "sqlite:///./pokemarketai.db"))
 
-# Railway uses postgresql:// but we need postgresql+psycopg://
-if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+# Optional read replica for read-only routes (get_read_db); unset = everything on DATABASE_URL.
+# Replicas lag a little, so nothing that reads its own writes should use it.
+DATABASE_REPLICA_URL = _normalize_url(os.getenv("DATABASE_REPLICA_URL", ""))
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Connection pool, per engine and per process. The sync pool serves the
+# threadpool routes (40 threads by default), so it's sized close to that.
+# Routes use one session (one connection) per request; don't open a second
+# one mid-request, or a burst at the cap ends up waiting on itself until
+# DB_POOL_TIMEOUT.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Drop connections older than this (seconds, -1 = never) and test each one
+# on checkout, so server-side idle timeouts don't surface as request errors
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite: WAL lets readers carry on while a snapshot batch writes;
+# synchronous=NORMAL is safe under WAL and skips an fsync per commit
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() in ("1", "true", "yes")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+
+def _in_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (url.endswith(":memory:") or url.rstrip("/").endswith("sqlite:"))
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    # Timed pools: checkout waits and pool timeouts show up in /metrics
+    poolclass = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    if "sqlite" not in url:
+        return {"poolclass": poolclass, "pool_size": POOL_SIZE, "max_overflow": POOL_MAX_OVERFLOW,
+                "pool_timeout": POOL_TIMEOUT, "pool_recycle": POOL_RECYCLE, "pool_pre_ping": POOL_PRE_PING}
+    options = {"connect_args": {"check_same_thread": False}}
+    if _in_memory(url) or is_async:
+        # In-memory: one shared connection. aiosqlite: a connection per
+        # session (NullPool), which is cheap for a local file.
+        return options
+    # A local file has no idle timeouts, so no recycling or pings
+    options.update(poolclass=poolclass, pool_size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+                   pool_timeout=POOL_TIMEOUT)
+    return options
+
+def _apply_sqlite_pragmas(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.close()
+
+def _create_engine(url: str):
+    sync_engine = create_engine(url, **_engine_options(url))
+    if url.startswith("sqlite") and not _in_memory(url):
+        _apply_sqlite_pragmas(sync_engine)
+    return sync_engine
+
+def _create_async_engine(url: str):
+    async_url = _async_url(url)
+    async_engine = create_async_engine(async_url, **_engine_options(async_url, is_async=True))
+    if url.startswith("sqlite") and not _in_memory(url):
+        _apply_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
 
-# Session factory
+# Create SQLAlchemy engines (sync, and async for the non-blocking routes)
+engine = _create_engine(DATABASE_URL)
+async_engine = _create_async_engine(DATABASE_URL)
+
+# Only sync routes read from the replica: the async ones (price history,
+# insights, price-status polling) write or read their own writes
+replica_engine = _create_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else engine
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
@@ -31,4 +112,17 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency for read-only routes: a replica session when one is configured
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,235 @@
+from typing import List, Optional, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from app.database.config import Base
+from app.services.log import get_logger
+
+# Import all models so they're registered on Base.metadata
+from app.models import (  # noqa: F401
+    ai_insight, card, card_identity, catalog, portfolio_value, price_alert, price_history, price_job,
+    price_rollup, snapshot_shard
+)
+
+log = get_logger(__name__)
+
+
+def _default_sql(column) -> str:
+    """Render a column's server_default for ALTER TABLE"""
+    if column.server_default is None:
+        return ""
+    arg = column.server_default.arg
+    if isinstance(arg, str):
+        return " DEFAULT '" + arg.replace("'", "''") + "'"
+    return f" DEFAULT {arg.text}"
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    """
+    Tables and columns the models have but the database doesn't: what
+    run_migrations would add (indexes aside), plus the snapshot_day backfill
+    and the duplicate rows it would delete. Empty means the schema is current.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    pending = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            pending.append(f"table {table.name}")
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        pending += [f"column {table.name}.{column.name}" for column in table.columns if column.name not in existing]
+
+    if "price_history" in existing_tables:
+        columns = {col["name"] for col in inspector.get_columns("price_history")}
+        with engine.connect() as conn:
+            if _needs_snapshot_day(conn, columns):
+                duplicates = conn.execute(text(
+                    f"SELECT COUNT(*) FROM price_history WHERE {_duplicate_days_sql(columns)}"
+                )).scalar()
+                pending.append(f"backfill price_history.snapshot_day (deletes {duplicates} same-day duplicate rows)")
+    return pending
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Create missing tables, add missing (nullable / defaulted) columns and
+    create missing indexes.
+
+    Additive, with one exception: the snapshot_day backfill deletes
+    same-day duplicate price_history rows (keeping the newest of each) so
+    the unique daily key can be created. pending_migrations reports it.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                log.info("adding column", table=table.name, column=column.name)
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}{_default_sql(column)}"
+                ))
+
+        _backfill_snapshot_day(conn)
+        _drop_outdated_opclass_indexes(conn)
+
+        for table in Base.metadata.sorted_tables:
+            # IF NOT EXISTS instead of reflection: the SQLite inspector
+            # can't see expression indexes like ix_cards_card_name_lower
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+        _create_catalog_search(conn)
+        _backfill_rollups(conn)
+        _backfill_portfolio_value(conn)
+
+
+def _backfill_snapshot_day(conn) -> None:
+    """
+    Fill price_history.snapshot_day for rows written before it existed, and
+    drop same-day duplicates so the unique daily key can be created
+    """
+    if not _needs_snapshot_day(conn):
+        return
+
+    log.info("backfilling price_history.snapshot_day")
+    # Duplicates go first, so the UPDATE can't trip the unique daily key if it already exists
+    deleted = conn.execute(text(f"DELETE FROM price_history WHERE {_duplicate_days_sql()}")).rowcount
+    log.warning("deleted same-day duplicate price_history rows", rows=deleted)
+    # date() works on both SQLite and Postgres
+    conn.execute(text(
+        "UPDATE price_history SET snapshot_day = date(snapshot_date) WHERE snapshot_day IS NULL"
+    ))
+
+
+def _needs_snapshot_day(conn, columns: Optional[Set[str]] = None) -> bool:
+    """Any price_history rows without a snapshot_day (all of them if the column is missing)"""
+    if columns is not None and "snapshot_day" not in columns:
+        return conn.execute(text("SELECT 1 FROM price_history LIMIT 1")).first() is not None
+    return conn.execute(text(
+        "SELECT 1 FROM price_history WHERE snapshot_day IS NULL LIMIT 1"
+    )).first() is not None
+
+
+def _duplicate_days_sql(columns: Optional[Set[str]] = None) -> str:
+    """
+    WHERE clause matching every row but the newest per (card, source,
+    condition, day), taking the day from snapshot_date until it's filled in.
+    `columns` are price_history's current columns, for counting before the
+    migration: a missing column will be added with the same value on every
+    row, so it's left out of the grouping.
+    """
+    keys = ["card_id"] + [column for column in ("source", "condition") if columns is None or column in columns]
+    keys.append("COALESCE(snapshot_day, date(snapshot_date))" if columns is None or "snapshot_day" in columns
+                else "date(snapshot_date)")
+    return f"id NOT IN (SELECT MAX(id) FROM price_history GROUP BY {', '.join(keys)})"
+
+
+def _drop_outdated_opclass_indexes(conn) -> None:
+    """
+    Postgres: drop indexes created before the model gave them an operator
+    class (postgresql_ops), so the CREATE INDEX IF NOT EXISTS that follows
+    builds them again with it
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            ops = index.dialect_options["postgresql"]["ops"]
+            if not ops:
+                continue
+            definition = conn.execute(
+                text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": index.name}
+            ).scalar()
+            if definition is not None and not all(op in definition for op in ops.values()):
+                log.info("rebuilding index with its operator class", index=index.name)
+                conn.execute(text(f"DROP INDEX {index.name}"))
+
+
+def _create_catalog_search(conn) -> None:
+    """
+    Full-text search over catalog_cards: an FTS5 table kept in sync by
+    triggers on SQLite, tsvector + trigram GIN indexes on Postgres
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_catalog_cards_fts ON catalog_cards "
+            "USING gin (to_tsvector('simple', name || ' ' || set_name))"
+        ))
+        # pg_trgm may not be installable (managed databases); typo tolerance is optional
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_catalog_cards_name_trgm ON catalog_cards "
+                    "USING gin (name_key gin_trgm_ops)"
+                ))
+        except Exception as e:
+            log.warning("pg_trgm unavailable, catalog search without typo tolerance", error=str(e))
+        return
+
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catalog_cards_fts'"
+    )).first()
+    if exists:
+        return
+
+    log.info("creating catalog_cards_fts")
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE catalog_cards_fts USING fts5("
+        "name, set_name, content='catalog_cards', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER catalog_cards_ai AFTER INSERT ON catalog_cards BEGIN "
+        "INSERT INTO catalog_cards_fts(rowid, name, set_name) VALUES (new.id, new.name, new.set_name); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER catalog_cards_ad AFTER DELETE ON catalog_cards BEGIN "
+        "INSERT INTO catalog_cards_fts(catalog_cards_fts, rowid, name, set_name) "
+        "VALUES ('delete', old.id, old.name, old.set_name); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER catalog_cards_au AFTER UPDATE ON catalog_cards BEGIN "
+        "INSERT INTO catalog_cards_fts(catalog_cards_fts, rowid, name, set_name) "
+        "VALUES ('delete', old.id, old.name, old.set_name); "
+        "INSERT INTO catalog_cards_fts(rowid, name, set_name) VALUES (new.id, new.name, new.set_name); END"
+    ))
+    # Index anything ingested before the FTS table existed
+    conn.execute(text("INSERT INTO catalog_cards_fts(catalog_cards_fts) VALUES ('rebuild')"))
+
+
+def _backfill_rollups(conn) -> None:
+    """Build price_rollups from existing history the first time it's created"""
+    # Imported here: the service pulls in the models this module registers
+    from app.services.price_rollup_service import PriceRollupService
+
+    has_rollups = conn.execute(text("SELECT 1 FROM price_rollups LIMIT 1")).first()
+    has_history = conn.execute(text("SELECT 1 FROM price_history LIMIT 1")).first()
+    if has_rollups or not has_history:
+        return
+
+    log.info("building price_rollups from price_history")
+    written = PriceRollupService.rebuild(conn)
+    log.info("built price rollups", rollups=written)
+
+
+def _backfill_portfolio_value(conn) -> None:
+    """Build portfolio_value_daily from existing snapshots the first time it's created"""
+    from app.services.portfolio_value_service import PortfolioValueService
+
+    has_values = conn.execute(text("SELECT 1 FROM portfolio_value_daily LIMIT 1")).first()
+    has_history = conn.execute(text("SELECT 1 FROM price_history LIMIT 1")).first()
+    if has_values or not has_history:
+        return
+
+    log.info("building portfolio_value_daily from price_history")
+    written = PortfolioValueService.rebuild(conn)
+    log.info("built portfolio value series", days=written)
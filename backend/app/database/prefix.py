@@ -0,0 +1,52 @@
+from sqlalchemy import and_, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.expression import ColumnElement
+
+
+def _like_pattern(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class starts_with(ColumnElement):
+    """
+    `expression` starts with `prefix` (case as given), as a predicate each
+    database can answer from an index.
+
+    Postgres gets LIKE 'prefix%': a >= / < range is wrong under a
+    linguistic collation (en_US sorts punctuation and case loosely), and
+    LIKE seeks an index built with text_pattern_ops. SQLite compares code
+    points (BINARY), where the range is exact and seeks expression indexes
+    too, which its LIKE optimization can't; the LIKE stays on for %/_.
+    """
+
+    # No Boolean type: SQLite would get "... = 1" tacked on in WHERE
+    inherit_cache = True
+    _traverse_internals = [
+        ("target", visitors.InternalTraversal.dp_clauseelement),
+        ("pattern", visitors.InternalTraversal.dp_clauseelement),
+        ("lower", visitors.InternalTraversal.dp_clauseelement),
+        ("upper", visitors.InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, expression, prefix: str):
+        self.target = expression
+        # Bound parameters, so the cached statement is shared by every prefix
+        self.pattern = literal(_like_pattern(prefix))
+        self.lower = literal(prefix)
+        self.upper = literal(prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+@compiles(starts_with)
+def _starts_with(element, compiler, **kw):
+    return compiler.process(element.target.like(element.pattern, escape="\\"), **kw)
+
+
+@compiles(starts_with, "sqlite")
+def _starts_with_sqlite(element, compiler, **kw):
+    expression = element.target
+    return compiler.process(and_(
+        expression >= element.lower,
+        expression < element.upper,
+        expression.like(element.pattern, escape="\\")
+    ).self_group(), **kw)
@@ -0,0 +1,29 @@
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rows per INSERT statement (keeps bound parameters under SQLite's limit)
+CHUNK_SIZE = 500
+
+
+def upsert_statements(dialect_name: str, model, rows: List[Dict], index_elements: List[str],
+                      update_columns: Optional[List[str]] = None) -> Iterator:
+    """
+    Multi-row INSERT ... ON CONFLICT statements for SQLite and Postgres.
+
+    With `update_columns` conflicting rows are updated from the new values
+    (DO UPDATE); otherwise they are left alone (DO NOTHING). The conflict
+    target must match a unique index.
+    """
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        statement = dialect_insert(model).values(rows[start:start + CHUNK_SIZE])
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: statement.excluded[column] for column in update_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+        yield statement
@@ -1,17 +1,98 @@
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy import text
+
+from app.database.config import async_engine, engine, replica_engine
+from app.database.migrations import pending_migrations, run_migrations
+from app.middleware import RequestContextMiddleware
+from app.routers import alerts, cards, catalog, export, portfolio, price_history  # Add price_history import
+from app.services import cache, http_client, metrics
+from app.services.alert_dispatcher import AlertWebhookDispatcher, alert_dispatcher
+from app.services.log import get_logger
+from app.services.price_enrichment import PriceEnrichmentQueue, price_queue
+from app.services.price_history_service import PriceHistoryService
+from app.services.price_service import PriceService
+from app.services.snapshot_scheduler import SnapshotScheduler, scheduler as snapshot_scheduler
+
+log = get_logger(__name__)
+
+# Migrate the schema when the app starts (handy locally). Deploys set this to
+# false and run `python migrate_db.py` once instead, so workers come up
+# without the schema round trips.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Query timings, pool checkout waits and connection hold times for /metrics
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
+if replica_engine is not engine:
+    metrics.instrument_engine(replica_engine, "replica")
+
+
+def _prepare_database() -> None:
+    if MIGRATE_ON_STARTUP:
+        # Create database tables (and any newly added columns)
+        run_migrations(engine)
+        return
+    # Startup still works on an older schema, but say so loudly
+    pending = pending_migrations(engine)
+    if pending:
+        log.warning("database schema is behind, run migrate_db.py", pending=pending)
+
+
+async def _warm_up() -> None:
+    """Open the first DB connections and build the HTTP clients before taking traffic"""
+    def connect():
+        for primary_or_replica in {engine, replica_engine}:
+            with primary_or_replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
 
-from app.database.config import engine, Base
-from app.routers import cards, price_history  # Add price_history import
+    await run_in_threadpool(connect)
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    for base_url in (PriceService.BASE_URL, PriceHistoryService.BASE_URL):
+        http_client.get_client(base_url)
+        http_client.get_async_client(base_url)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    await run_in_threadpool(_prepare_database)
+    await _warm_up()
+    # Daily snapshot job (SNAPSHOT_SCHEDULER_ENABLED=true); replicas split the work via shard leases
+    if SnapshotScheduler.ENABLED:
+        snapshot_scheduler.start()
+    # Prices for newly created cards (POST /cards returns before they're fetched)
+    if PriceEnrichmentQueue.ENABLED:
+        price_queue.start()
+    # Webhooks for fired price alerts (the alert_events outbox)
+    if AlertWebhookDispatcher.ENABLED:
+        alert_dispatcher.start()
+    log.info("startup complete", seconds=round(time.perf_counter() - started, 3),
+             migrated=MIGRATE_ON_STARTUP)
+
+    yield
+
+    snapshot_scheduler.stop()
+    price_queue.stop()
+    alert_dispatcher.stop()
+    http_client.close_clients()
+    await http_client.aclose_clients()
+    await async_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="PokéMarket AI API",
     description="Backend API for Pokémon TCG portfolio tracking",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware (allows React Native to call this API)
@@ -21,11 +102,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Next-Cursor", "X-Export-Watermark", "ETag", "Last-Modified"],
 )
 
+# Compress larger JSON bodies (card pages, history); small ones and 304s go as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+# Request ids, per-route latency histograms and access logs
+app.add_middleware(RequestContextMiddleware)
+
 # Include routers
 app.include_router(cards.router)
 app.include_router(price_history.router)  # Add this line
+app.include_router(portfolio.router)
+app.include_router(catalog.router)
+app.include_router(alerts.router)
+app.include_router(export.router)
 
 # Health check endpoint
 @app.get("/")
@@ -34,4 +126,16 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+# Upstream connection pool counters (pool hits vs new connections) and cache hit ratios
+@app.get("/health/upstreams")
+def upstream_stats():
+    return {"upstreams": http_client.get_stats(), "caches": cache.get_stats()}
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    # As a header: media_type would append a second charset to CONTENT_TYPE_LATEST
+    return Response(content=body, headers={"Content-Type": content_type})
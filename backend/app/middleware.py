@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from app.services import metrics
+from app.services.log import get_logger, request_id_var
+
+log = get_logger("app.requests")
+
+
+class RequestContextMiddleware:
+    """
+    Per request: a request id (X-Request-ID in and out) for every log line,
+    a latency observation by route template, and one access log line.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses and
+    contextvars pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Route template (/cards/{card_id}), not the raw path, keeps label cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            metrics.HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"], route=route_path, status=str(status)
+            ).observe(elapsed)
+            log.info("request", method=scope["method"], route=route_path, path=scope["path"],
+                     status=status, ms=round(elapsed * 1000, 2))
+            request_id_var.reset(token)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+class AIInsight(Base):
+    __tablename__ = "ai_insights"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # sha256 of (card, price bucket, trend analysis) - same inputs, same insight
+    fingerprint = Column(String(64), nullable=False, unique=True, index=True)
+    
+    insights = Column(JSON, nullable=False)
+    model = Column(String, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
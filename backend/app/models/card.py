@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.sql import func
 from app.database.config import Base
 
@@ -19,10 +19,25 @@ class Card(Base):
     market_price = Column(Float, nullable=True)   # Current market price
     low_price = Column(Float, nullable=True)      # Low price
     high_price = Column(Float, nullable=True)     # High price
-    last_price_update = Column(DateTime(timezone=True), nullable=True)  # When prices were fetched
+    last_price_update = Column(DateTime(timezone=True), nullable=True, index=True)  # When prices were fetched
+    
+    # Upstream ids resolved on first lookup (see CardIdentityService); later fetches go by id
+    tcg_id = Column(String, nullable=True)        # PokemonTCG.io card id
+    tcgplayer_id = Column(String, nullable=True)  # TCGPlayer product id (PokemonPriceTracker)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Filter + keyset pagination (WHERE set_name = ? AND id > ? ORDER BY id); also serve GROUP BY
+        Index("ix_cards_set_name_id", "set_name", "id"),
+        Index("ix_cards_rarity_id", "rarity", "id"),
+        # Case-insensitive name prefix search (LIKE on Postgres, see database.prefix)
+        Index(
+            "ix_cards_card_name_lower", func.lower(card_name).label("card_name_lower"),
+            postgresql_ops={"card_name_lower": "text_pattern_ops"}
+        ),
+    )
+
     def __repr__(self):
         return f"<Card {self.card_name} - {self.set_name}>"
\ No newline at end of file
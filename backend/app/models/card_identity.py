@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+class CardIdentity(Base):
+    """
+    Upstream ids a (name, set) search resolved to. Shared by every card
+    with the same name and set, so each pair is searched for only once.
+    """
+    __tablename__ = "card_identities"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Lowercased card name and set name ("" when unknown)
+    name_key = Column(String, nullable=False)
+    set_key = Column(String, nullable=False)
+
+    tcg_id = Column(String, nullable=True)        # PokemonTCG.io card id
+    tcgplayer_id = Column(String, nullable=True)  # TCGPlayer product id
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("uq_card_identities_name_set", "name_key", "set_key", unique=True),
+    )
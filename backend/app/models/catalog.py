@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+class CatalogSet(Base):
+    """A PokemonTCG.io set, from the offline catalog dumps"""
+    __tablename__ = "catalog_sets"
+
+    id = Column(String, primary_key=True)  # PokemonTCG.io set id, e.g. "base1"
+    name = Column(String, nullable=False)
+    series = Column(String, nullable=True)
+    total = Column(Integer, nullable=True)
+    release_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CatalogCard(Base):
+    """
+    A card from the offline catalog. Searched in-process: prefix
+    autocomplete on name_key, full text via catalog_cards_fts (SQLite FTS5)
+    or a tsvector/trigram index (Postgres), see migrations.
+    """
+    __tablename__ = "catalog_cards"
+
+    id = Column(Integer, primary_key=True)  # FTS rowid
+    tcg_id = Column(String, nullable=False)  # PokemonTCG.io card id, e.g. "base1-4"
+    name = Column(String, nullable=False)
+    set_id = Column(String, nullable=False)
+    set_name = Column(String, nullable=False)
+    number = Column(String, nullable=True)
+    rarity = Column(String, nullable=True)
+    supertype = Column(String, nullable=True)
+    image_url = Column(String, nullable=True)
+    release_date = Column(Date, nullable=True)
+
+    # Lowercased name / set name for prefix search and exact matching
+    name_key = Column(String, nullable=False)
+    set_key = Column(String, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("uq_catalog_cards_tcg_id", "tcg_id", unique=True),
+        # Autocomplete prefix search (LIKE on Postgres, see database.prefix) and exact matching
+        Index("ix_catalog_cards_name_key", "name_key", "release_date",
+              postgresql_ops={"name_key": "text_pattern_ops"}),
+        Index("ix_catalog_cards_set_key", "set_key"),
+    )
+
+class CatalogSource(Base):
+    """Dump files already ingested, so a refresh only reads new or changed ones"""
+    __tablename__ = "catalog_sources"
+
+    path = Column(String, primary_key=True)  # relative to the dump directory
+    digest = Column(String, nullable=False)  # sha1 of the file contents
+    records = Column(Integer, nullable=False, default=0)
+    ingested_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
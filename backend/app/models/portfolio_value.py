@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+class PortfolioValueDaily(Base):
+    """
+    Total market value of the collection per day, kept in step with the
+    snapshot rows (see PortfolioValueService). Every card counts with its
+    latest snapshot price on or before the day.
+    """
+    __tablename__ = "portfolio_value_daily"
+
+    day = Column(Date, primary_key=True)
+    total_value = Column(Float, nullable=False, default=0)
+    # Cards with a price on this day (carried forward from their last snapshot)
+    priced_cards = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+# price_above / price_below: market price crosses `threshold`
+# percent_change: moves `threshold` percent (negative = a fall) within `window_days`
+# new_high / new_low: highest / lowest market price of the last `window_days`
+RULE_KINDS = ("price_above", "price_below", "percent_change", "new_high", "new_low")
+
+# Columns of uq_alert_events_key: a rule fires at most once per card and day
+EVENT_KEY = ["rule_id", "card_id", "snapshot_day"]
+
+class AlertRule(Base):
+    """A price alert on one card, or on every card of a set (see AlertService)"""
+    __tablename__ = "alert_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Exactly one of the two: a card, or a set (lowercased name)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=True)
+    set_key = Column(String, nullable=True)
+    set_name = Column(String, nullable=True)
+
+    kind = Column(String, nullable=False)
+    threshold = Column(Float, nullable=True)
+    window_days = Column(Integer, nullable=True)
+
+    label = Column(String, nullable=True)
+    # Fired alerts are POSTed here (see AlertWebhookDispatcher)
+    webhook_url = Column(String, nullable=True)
+    active = Column(Boolean, nullable=False, default=True, server_default="1")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Candidate rules for a batch of snapshot rows: WHERE card_id IN (...) OR set_key IN (...)
+        Index("ix_alert_rules_card", "card_id", "active"),
+        Index("ix_alert_rules_set", "set_key", "active"),
+    )
+
+class AlertEvent(Base):
+    """
+    A fired alert: the feed clients read, and the webhook outbox (written in
+    the same transaction as the snapshot that fired it)
+    """
+    __tablename__ = "alert_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rule_id = Column(Integer, ForeignKey("alert_rules.id", ondelete="CASCADE"), nullable=False)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
+    snapshot_day = Column(Date, nullable=False)
+
+    kind = Column(String, nullable=False)
+    market_price = Column(Float, nullable=True)
+    # The price it was compared with: previous snapshot, start of the window or the old high/low
+    reference_price = Column(Float, nullable=True)
+    change_percent = Column(Float, nullable=True)
+    message = Column(String, nullable=False)
+
+    # Outbox: none (no webhook) / pending / delivering / delivered / failed
+    delivery_status = Column(String, nullable=False, default="none")
+    webhook_url = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    delivered_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("uq_alert_events_key", *EVENT_KEY, unique=True),
+        # Feed reads: WHERE card_id = ? AND id > ? ORDER BY id
+        Index("ix_alert_events_card_id", "card_id", "id"),
+        # The dispatcher's claim query
+        Index("ix_alert_events_delivery", "delivery_status", "next_attempt_at", "id"),
+    )
@@ -1,12 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.database.config import Base
 
+# Columns of uq_price_history_card_day (the ON CONFLICT target for writes)
+DAILY_KEY = ["card_id", "source", "condition", "snapshot_day"]
+
 class PriceHistory(Base):
     __tablename__ = "price_history"
     
     id = Column(Integer, primary_key=True, index=True)
-    card_id = Column(Integer, ForeignKey("cards.id"), nullable=False)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
     
     # Price snapshot
     market_price = Column(Float, nullable=True)
@@ -16,5 +19,24 @@ class PriceHistory(Base):
     # Timestamp
     snapshot_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
+    # Calendar day of snapshot_date - part of the one-row-per-day key
+    snapshot_day = Column(Date, nullable=True)
+    
     # Optional: condition tracking
-    condition = Column(String, default="Near Mint")
\ No newline at end of file
+    condition = Column(String, default="Near Mint")
+    
+    # Where the row came from: our own daily "snapshot" or "upstream" (PokemonPriceTracker history)
+    source = Column(String, nullable=False, default="snapshot", server_default="snapshot")
+    
+    __table_args__ = (
+        # One row per card, source, condition and day; writes upsert against it
+        Index(
+            "uq_price_history_card_day",
+            "card_id", "source", "condition", "snapshot_day",
+            unique=True
+        ),
+        # History reads: WHERE card_id = ? AND source = ? AND snapshot_date >= ?
+        Index("ix_price_history_card_source_date", "card_id", "source", "snapshot_date"),
+        # "Who already has a snapshot today" for snapshot-all
+        Index("ix_price_history_day_source", "snapshot_day", "source"),
+    )
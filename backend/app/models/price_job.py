@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database.config import Base
+
+# Jobs in these states won't change any more
+FINAL_STATUSES = ("done", "unpriced", "failed")
+
+class PriceJob(Base):
+    """
+    A queued price lookup for a newly created card (see PriceEnrichmentQueue).
+    Jobs for the same name/set are merged into one upstream request.
+    """
+    __tablename__ = "price_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Merge key: lowercased card name and set name ("" when unknown)
+    name_key = Column(String, nullable=False)
+    set_key = Column(String, nullable=False)
+
+    # pending / running / done / unpriced (no price found) / failed (gave up)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False, server_default=func.now())
+
+    # Lease: a running job belongs to lease_owner until lease_expires_at
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    market_price = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The claim query: WHERE status = 'pending' AND run_after <= now ORDER BY id
+        Index("ix_price_jobs_status_run_after", "status", "run_after", "id"),
+        Index("ix_price_jobs_key", "name_key", "set_key", "status"),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from app.database.config import Base
+
+# Columns of uq_price_rollups_key (the ON CONFLICT target for rollup writes)
+ROLLUP_KEY = ["card_id", "source", "condition", "period", "period_start"]
+
+class PriceRollup(Base):
+    """Weekly / monthly OHLC of market_price, kept in step with price_history"""
+    __tablename__ = "price_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)
+    condition = Column(String, nullable=False)
+
+    # "week" (starting Monday) or "month"
+    period = Column(String, nullable=False)
+    period_start = Column(Date, nullable=False)
+
+    open = Column(Float, nullable=True)
+    high = Column(Float, nullable=True)
+    low = Column(Float, nullable=True)
+    close = Column(Float, nullable=True)
+    samples = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Also serves reads: WHERE card_id/source/condition/period AND period_start >= ?
+        Index("uq_price_rollups_key", *ROLLUP_KEY, unique=True),
+    )
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
+from app.database.config import Base
+
+class SnapshotRun(Base):
+    """
+    One day's snapshot run. Created once, together with all of the day's
+    shards, by whichever replica gets there first; everyone else uses the
+    shard set it made.
+    """
+    __tablename__ = "snapshot_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_day = Column(Date, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+    created_by = Column(String, nullable=True)  # scheduler owner id
+    created_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("uq_snapshot_runs_day", "run_day", unique=True),
+    )
+
+class SnapshotShard(Base):
+    """
+    One slice of a day's snapshot run. Replicas claim shards through the
+    lease columns and checkpoint progress as they go.
+    """
+    __tablename__ = "snapshot_shards"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_day = Column(Date, nullable=False)
+    shard_no = Column(Integer, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+
+    # Card id range [id_from, id_to); NULL id_to = no upper bound
+    id_from = Column(Integer, nullable=False)
+    id_to = Column(Integer, nullable=True)
+
+    # pending / running / done
+    status = Column(String, nullable=False, default="pending")
+
+    # Lease: a shard belongs to lease_owner until lease_expires_at
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    # Last card id committed, so a crashed run resumes after it
+    checkpoint_card_id = Column(Integer, nullable=True)
+    successful = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("uq_snapshot_shards_day_shard", "run_day", "shard_no", unique=True),
+    )
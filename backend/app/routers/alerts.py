@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database.config import get_db
+from app.models.card import Card
+from app.schemas.alert import AlertEventResponse, AlertRuleCreate, AlertRuleResponse
+from app.services.alert_dispatcher import AlertWebhookDispatcher, alert_dispatcher
+from app.services.alert_service import AlertService
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+@router.post("/rules", response_model=AlertRuleResponse)
+def create_rule(rule: AlertRuleCreate, db: Session = Depends(get_db)):
+    """Alert on a card or a whole set; checked every time a snapshot is written"""
+    if rule.card_id is not None and db.get(Card, rule.card_id) is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    if rule.webhook_url:
+        error = AlertWebhookDispatcher.check_url(rule.webhook_url)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+    return AlertService.create_rule(db, **rule.model_dump())
+
+@router.get("/rules", response_model=List[AlertRuleResponse])
+def list_rules(card_id: Optional[int] = None, set_name: Optional[str] = None, db: Session = Depends(get_db)):
+    return AlertService.list_rules(db, card_id=card_id, set_name=set_name)
+
+@router.delete("/rules/{rule_id}")
+def delete_rule(rule_id: int, db: Session = Depends(get_db)):
+    if not AlertService.delete_rule(db, rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"message": "Alert rule deleted successfully"}
+
+@router.get("/events", response_model=List[AlertEventResponse])
+def alert_feed(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    card_id: Optional[int] = None,
+    rule_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Fired alerts, oldest first. Poll with after_id = the last id you've seen
+    instead of re-reading price history.
+    """
+    return AlertService.feed(db, after_id=after_id, limit=limit, card_id=card_id, rule_id=rule_id)
+
+@router.post("/deliver")
+def deliver_webhooks():
+    """Send due webhooks now instead of waiting for the dispatcher (handy locally)"""
+    return alert_dispatcher.run_once()
@@ -1,61 +1,219 @@
 from app.services.ai_insights_service import AIInsightsService
 from app.services.price_history_service import PriceHistoryService
-from fastapi import APIRouter, Depends, HTTPException
+from app.services.price_history_store import PriceHistoryStore
+from app.services.card_import_service import CardImporter, make_parser
+from app.services.card_query_service import CardQueryService, InvalidCursorError
+from app.services.catalog_service import CatalogService
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.config import get_db
+from typing import List, Optional
+import asyncio
+import os
+import orjson
+from app.database.config import AsyncSessionLocal, get_async_db, get_db, get_read_db
+from app.models.ai_insight import AIInsight
 from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import PriceRollup
 from app.schemas.card import CardCreate, CardResponse
-from app.services.price_service import PriceService
+from app.services import http_cache, serialization
+from app.services.portfolio_value_service import PortfolioValueService
+from app.services.price_enrichment import PriceEnrichmentQueue, price_queue
+from app.services.log import get_logger
+
+log = get_logger(__name__)
 
 router = APIRouter(prefix="/cards", tags=["cards"])
 
+CARD_COLUMNS = serialization.schema_columns(CardResponse, Card)
+
+# Rows that belong to a card and go when it's deleted
+CARD_DEPENDENT_MODELS = (PriceHistory, PriceRollup, AIInsight)
+
+PRICE_EVENTS_POLL_SECONDS = float(os.getenv("PRICE_EVENTS_POLL_SECONDS", "0.5"))
+PRICE_EVENTS_TIMEOUT = float(os.getenv("PRICE_EVENTS_TIMEOUT", "120"))
+
 # Create a new card
 @router.post("/", response_model=CardResponse)
 def create_card(card: CardCreate, db: Session = Depends(get_db)):
+    """
+    Save the card and queue its price lookup; returns right away. Poll
+    GET /cards/{id}/price-status or stream GET /cards/{id}/price-events
+    for the prices.
+    """
     # Create card from input data
     db_card = Card(**card.dict())
-    
-    # Fetch prices from PokemonTCG.io API
-    print(f"Fetching prices for: {card.card_name} - {card.set_name}")
-    price_data = PriceService.fetch_card_price(card.card_name, card.set_name)
-    
-    # Add price data if found
-    if price_data:
-        db_card.market_price = price_data.get("market_price")
-        db_card.low_price = price_data.get("low_price")
-        db_card.high_price = price_data.get("high_price")
-        db_card.last_price_update = price_data.get("last_price_update")
-        print(f"✓ Prices fetched: Market=${price_data.get('market_price')}")
-    else:
-        print(f"✗ No prices found for {card.card_name}")
-    
-    # Save to database
+
+    # Match against the local catalog: fills in missing details and gives
+    # us the PokemonTCG.io id, so the queued price lookup skips the search
+    match = CatalogService.match(db, card.card_name, card.set_name)
+    if match:
+        db_card.tcg_id = match.tcg_id
+        db_card.set_name = match.set_name if not card.set_name or card.set_name == "Unknown" else card.set_name
+        db_card.card_number = card.card_number or match.number
+        db_card.rarity = card.rarity or match.rarity
+        db_card.image_url = card.image_url or match.image_url
+
+    # Save the card and its price job in one transaction
     db.add(db_card)
+    db.flush()
+    PriceEnrichmentQueue.enqueue(db, db_card)
     db.commit()
     db.refresh(db_card)
+
+    price_queue.notify()
     return db_card
 
+# Progress of a card's queued price lookup (BEFORE /{card_id})
+@router.get("/{card_id}/price-status")
+async def get_price_status(card_id: int, db: AsyncSession = Depends(get_async_db)):
+    status = await PriceEnrichmentQueue.status_async(db, card_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return status
+
+# Same as price-status, pushed as Server-Sent Events until the job finishes
+@router.get("/{card_id}/price-events")
+async def stream_price_status(card_id: int, db: AsyncSession = Depends(get_async_db)):
+    status = await PriceEnrichmentQueue.status_async(db, card_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    # The stream polls with its own sessions; don't hold this connection
+    # for the whole stream as well
+    await db.close()
+
+    async def events():
+        nonlocal status
+        deadline = asyncio.get_running_loop().time() + PRICE_EVENTS_TIMEOUT
+        last = None
+        while True:
+            if status != last:
+                yield b"event: status\ndata: " + orjson.dumps(status, option=serialization.ORJSON_OPTIONS) + b"\n\n"
+                last = status
+            if status["final"] or asyncio.get_running_loop().time() >= deadline:
+                return
+            await asyncio.sleep(PRICE_EVENTS_POLL_SECONDS)
+            # A fresh session per poll so we see the worker's commits
+            async with AsyncSessionLocal() as poll_db:
+                status = await PriceEnrichmentQueue.status_async(poll_db, card_id)
+            if status is None:
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Keeps GZipMiddleware (and proxies) from buffering the stream
+        "Content-Encoding": "identity",
+        "X-Accel-Buffering": "no",
+    })
+
+# Bulk import cards from CSV, a JSON array or NDJSON (streamed)
+@router.post("/bulk")
+async def bulk_import_cards(
+    request: Request,
+    fetch_prices: bool = True,
+    batch_size: int = Query(CardImporter.DEFAULT_BATCH_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Import many cards in one request. Send CSV (Content-Type: text/csv)
+    with a header row, or JSON. The body is parsed as it streams in and
+    cards are priced and inserted one batch at a time.
+    """
+    parser = make_parser(request.headers.get("content-type", ""))
+    importer = CardImporter(db, batch_size=batch_size, fetch_prices=fetch_prices)
+
+    try:
+        async for chunk in request.stream():
+            rows = parser.feed(chunk)
+            if rows:
+                await run_in_threadpool(importer.add_rows, rows)
+        await run_in_threadpool(importer.add_rows, parser.close())
+    except ValueError as e:
+        # Batches already inserted stay committed; report how far we got
+        report = await run_in_threadpool(importer.finish)
+        raise HTTPException(status_code=400, detail={"error": str(e), "report": report})
+
+    return await run_in_threadpool(importer.finish)
+
 # Get all cards
 @router.get("/", response_model=List[CardResponse])
-def get_all_cards(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    cards = db.query(Card).offset(skip).limit(limit).all()
-    return cards
+def get_all_cards(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    set_name: Optional[str] = None,
+    rarity: Optional[str] = None,
+    name: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    List cards ordered by id. Pass the X-Next-Cursor header from the previous
+    page as `cursor` to get the next one (no header means last page).
+    Send If-None-Match to get a 304 when the page hasn't changed.
+    """
+    page = dict(limit=limit, cursor=cursor, skip=skip, set_name=set_name, rarity=rarity, name=name)
+    try:
+        version, next_cursor = CardQueryService.page_version(db, **page)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    not_modified = http_cache.conditional(
+        request, response, http_cache.make_etag("cards", sorted(page.items()), version)
+    )
+    if not_modified:
+        return not_modified
+
+    # Trusted DB rows: plain tuples straight to orjson, no per-row model
+    # validation (response_model still documents the shape)
+    rows = CardQueryService.get_page_rows(db, CARD_COLUMNS, **page)
+    return serialization.json_response(serialization.rows_json(CardResponse, rows), response)
+
+# Export all cards as NDJSON or a JSON array, streamed (BEFORE /{card_id})
+@router.get("/export")
+def export_cards(
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    set_name: Optional[str] = None,
+    rarity: Optional[str] = None,
+    name: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    cards = CardQueryService.stream(db, set_name=set_name, rarity=rarity, name=name)
+
+    def ndjson():
+        for card in cards:
+            yield CardResponse.model_validate(card).model_dump_json() + "\n"
+
+    def json_array():
+        yield "["
+        for i, card in enumerate(cards):
+            yield ("," if i else "") + CardResponse.model_validate(card).model_dump_json()
+        yield "]"
+
+    if format == "json":
+        return StreamingResponse(json_array(), media_type="application/json")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 # Get price history for a card (BEFORE /{card_id})
 @router.get("/{card_id}/price-history")
-def get_card_price_history(card_id: int, db: Session = Depends(get_db)):
+async def get_card_price_history(card_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get 90-day price history for a card
     """
     # Get the card from database
-    card = db.query(Card).filter(Card.id == card_id).first()
+    card = await db.get(Card, card_id)
     if card is None:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    # Fetch price history
-    print(f"Fetching price history for: {card.card_name} - {card.set_name}")
-    history_data = PriceHistoryService.get_price_history(card.card_name, card.set_name)
+    # Load stored price history (only the missing days are fetched upstream)
+    history_data = await PriceHistoryStore.get_price_history_async(db, card)
     
     if not history_data:
         return {
@@ -79,19 +237,18 @@ def get_card_price_history(card_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/{card_id}/ai-insights")
-async def get_ai_insights(card_id: int, db: Session = Depends(get_db)):
-    """Get AI-powered insights for a card"""
+async def get_ai_insights(card_id: int, refresh: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Get AI-powered insights for a card (cached per market state; refresh=true regenerates)"""
     
     # Get card
-    card = db.query(Card).filter(Card.id == card_id).first()
+    card = await db.get(Card, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    # Get price history
-    price_history_data = PriceHistoryService.get_price_history(
-        card.card_name, 
-        card.set_name
-    )
+    # One after the other on the request session: a second session here
+    # would hold two pooled connections per request
+    price_history_data = await PriceHistoryStore.get_price_history_async(db, card)
+    candidate = await AIInsightsService.latest_for_card_async(db, card.id)
     
     if not price_history_data:
         return {
@@ -105,13 +262,14 @@ async def get_ai_insights(card_id: int, db: Session = Depends(get_db)):
         price_history_data.get('price_history', {})
     )
     
-    # Generate AI insights
-    ai_insights = AIInsightsService.generate_insights(
-        card_name=card.card_name,
-        set_name=card.set_name or "Unknown",
-        current_price=card.market_price or 0,
+    # Generate AI insights (or reuse the stored ones for the same inputs)
+    ai_insights = await AIInsightsService.get_insights_async(
+        db,
+        card,
         trend_analysis=trend_analysis,
-        price_history=price_history_data.get('price_history', {})
+        price_history=price_history_data.get('price_history', {}),
+        force_refresh=refresh,
+        candidate=candidate
     )
     
     return {
@@ -125,10 +283,16 @@ async def get_ai_insights(card_id: int, db: Session = Depends(get_db)):
 
 # Get a single card by ID (AFTER /price-history)
 @router.get("/{card_id}", response_model=CardResponse)
-def get_card(card_id: int, db: Session = Depends(get_db)):
+def get_card(card_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     card = db.query(Card).filter(Card.id == card_id).first()
     if card is None:
         raise HTTPException(status_code=404, detail="Card not found")
+
+    # Every column goes into the ETag; a 304 skips serialization
+    etag = http_cache.make_etag("card", *(getattr(card, column.key) for column in Card.__table__.columns))
+    not_modified = http_cache.conditional(request, response, etag, card.updated_at or card.created_at)
+    if not_modified:
+        return not_modified
     return card
 
 # Delete a card
@@ -137,6 +301,12 @@ def delete_card(card_id: int, db: Session = Depends(get_db)):
     card = db.query(Card).filter(Card.id == card_id).first()
     if card is None:
         raise HTTPException(status_code=404, detail="Card not found")
+    # Taken out of the portfolio value on every day, while its history is still there
+    PortfolioValueService.remove_card(db, card_id)
+    # Deleted explicitly: tables created before their foreign keys had
+    # ON DELETE CASCADE would otherwise reject the delete on Postgres
+    for model in CARD_DEPENDENT_MODELS:
+        db.execute(delete(model).where(model.card_id == card_id))
     db.delete(card)
     db.commit()
     return {"message": "Card deleted successfully"}
\ No newline at end of file
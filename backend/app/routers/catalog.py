@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database.config import engine, get_db
+from app.schemas.catalog import CatalogCardResponse
+from app.services.catalog_service import CatalogService
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+@router.get("/autocomplete", response_model=List[CatalogCardResponse])
+def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Name-prefix suggestions from the local catalog (no upstream call)"""
+    return CatalogService.autocomplete(db, q, limit)
+
+@router.get("/search", response_model=List[CatalogCardResponse])
+def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    set_name: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over card and set names"""
+    return CatalogService.search(db, q, limit, set_name=set_name)
+
+@router.post("/refresh")
+def refresh_catalog(force: bool = False):
+    """Ingest new or changed dump files from CATALOG_DUMP_DIR"""
+    try:
+        return CatalogService.ingest(engine, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
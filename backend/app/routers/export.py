@@ -0,0 +1,51 @@
+from datetime import date
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.database.config import engine, replica_engine
+from app.services.export_service import EXTENSIONS, MEDIA_TYPES, PriceHistoryExport
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+@router.get("/price-history")
+def export_price_history(
+    format: Literal["parquet", "arrow"] = "parquet",
+    columns: Optional[str] = Query(None, description="Comma-separated; default is every column"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    card_id: Optional[List[int]] = Query(None),
+    set_name: Optional[str] = None,
+    source: Optional[Literal["snapshot", "upstream"]] = None,
+    after_id: int = Query(0, ge=0, description="Only rows after this watermark"),
+    batch_rows: Optional[int] = Query(None, ge=1000, le=1000000)
+):
+    """
+    Bulk price history for analysis, streamed as Parquet or an Arrow IPC
+    stream. X-Export-Watermark is the last id included: pass it back as
+    after_id next time to fetch only newer rows.
+    """
+    try:
+        export = PriceHistoryExport(
+            columns=[column.strip() for column in columns.split(",") if column.strip()] if columns else None,
+            start=start, end=end, card_ids=card_id, set_name=set_name, source=source,
+            after_id=after_id, batch_rows=batch_rows
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The watermark comes from the primary; bulk reads go to the read
+    # replica when one is configured (and has caught up)
+    watermark = export.watermark(engine)
+    return StreamingResponse(
+        export.iter_bytes(export.read_engine(engine, replica_engine), format, watermark),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="price_history.{EXTENSIONS[format]}"',
+            "X-Export-Watermark": str(watermark),
+            "Cache-Control": "no-store",
+            # Already compressed; keep GZip from buffering it
+            "Content-Encoding": "identity",
+        }
+    )
@@ -0,0 +1,58 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from app.database.config import get_db
+from app.schemas.portfolio import PortfolioSummaryResponse, PortfolioValueSeriesResponse
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_value_service import PortfolioValueService
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+@router.get("/summary", response_model=PortfolioSummaryResponse)
+def get_portfolio_summary(
+    movers_days: int = Query(7, ge=1, le=365),
+    movers_limit: int = Query(5, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """Total value, set/rarity breakdowns, staleness and top movers"""
+    return PortfolioService.summary(db, movers_days=movers_days, movers_limit=movers_limit)
+
+@router.get("/value", response_model=PortfolioValueSeriesResponse)
+def get_portfolio_value(
+    days: int = Query(365, ge=1, le=3650),
+    resolution: Literal["auto", "day", "week", "month"] = "auto",
+    max_points: Optional[int] = Query(None, ge=3, le=5000),
+    until: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Total collection value over time, from the daily series kept up to date
+    as snapshots are written. "auto" picks the finest resolution that fits
+    in max_points (default 150).
+    """
+    return PortfolioValueService.get_series(db, days, resolution=resolution, max_points=max_points, until=until)
+
+@router.get("/trends")
+def get_portfolio_trends(
+    days: int = Query(90, ge=2, le=3650),
+    card_ids: Optional[List[int]] = Query(None),
+    condition: Optional[str] = None,
+    source: Literal["snapshot", "upstream"] = "snapshot",
+    sma_window: int = Query(7, ge=1, le=365),
+    ema_span: int = Query(7, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """Trend metrics for every card (and condition) in one call"""
+    # numpy is imported on first use rather than at startup
+    from app.services.trend_analytics import TrendAnalyticsService
+
+    return TrendAnalyticsService.portfolio_trends(
+        db,
+        days=days,
+        card_ids=card_ids,
+        condition=condition,
+        source=source,
+        sma_window=sma_window,
+        ema_span=ema_span
+    )
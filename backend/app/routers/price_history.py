@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.database.config import get_db
+from datetime import date, datetime
+from typing import List, Literal, Optional, Union
+from app.database.config import get_db, get_read_db
 from app.models.price_history import PriceHistory
-from app.schemas.price_history import PriceHistoryResponse
+from app.schemas.price_history import PriceHistoryResponse, PriceSeriesResponse
+from app.services import http_cache, serialization
+from app.services.price_rollup_service import PriceRollupService
+from app.services.snapshot_scheduler import SnapshotScheduler
 from app.services.snapshot_service import SnapshotService
 
 router = APIRouter(prefix="/price-history", tags=["price-history"])
 
+HISTORY_COLUMNS = serialization.schema_columns(PriceHistoryResponse, PriceHistory)
+
 @router.post("/snapshot/{card_id}")
 def capture_card_snapshot(card_id: int, db: Session = Depends(get_db)):
     """Capture a price snapshot for a specific card"""
@@ -26,18 +33,72 @@ def capture_card_snapshot(card_id: int, db: Session = Depends(get_db)):
     }
 
 @router.post("/snapshot-all")
-def capture_all_snapshots(db: Session = Depends(get_db)):
+def capture_all_snapshots(
+    concurrency: Optional[int] = Query(None, ge=1, le=64),
+    rate_limit: Optional[float] = Query(None, ge=0),
+    batch_size: Optional[int] = Query(None, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
     """Capture price snapshots for ALL cards (run this daily)"""
-    results = SnapshotService.capture_all_snapshots(db)
+    results = SnapshotService.capture_all_snapshots(
+        db,
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        batch_size=batch_size
+    )
     
     return {
         "message": "Snapshot batch completed",
         "results": results
     }
 
-@router.get("/{card_id}", response_model=List[PriceHistoryResponse])
-def get_card_price_history(card_id: int, days: int = 90, db: Session = Depends(get_db)):
-    """Get historical price snapshots for a card"""
-    history = SnapshotService.get_card_history(db, card_id, days)
-    
-    return history
\ No newline at end of file
+@router.get("/snapshot-status")
+def get_snapshot_status(day: Optional[date] = None, db: Session = Depends(get_db)):
+    """Progress of the scheduled snapshot run for a day (default today, UTC)"""
+    return SnapshotScheduler.status(db, day)
+
+@router.get("/{card_id}", response_model=Union[PriceSeriesResponse, List[PriceHistoryResponse]])
+def get_card_price_history(
+    request: Request,
+    response: Response,
+    card_id: int,
+    days: int = Query(90, ge=1),
+    resolution: Optional[Literal["auto", "day", "week", "month"]] = None,
+    max_points: Optional[int] = Query(None, ge=3, le=5000),
+    until: Optional[date] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get historical price snapshots for a card.
+
+    Without `resolution`/`max_points` every raw snapshot is returned (as
+    before). With either, a chart series comes back instead: daily points
+    or weekly/monthly OHLC rollups ("auto" picks the finest that fits in
+    max_points), LTTB-downsampled if still longer than max_points.
+
+    `until` ends the window on an earlier day; windows wholly in the past
+    are served as immutable. Send If-None-Match to get a 304 when nothing
+    changed.
+    """
+    raw = resolution is None and max_points is None
+    effective = "day" if raw else PriceRollupService.resolve_resolution(days, resolution or "auto", max_points)
+
+    count, last_id, last_snapshot = SnapshotService.history_version(db, card_id, days, until)
+    etag = http_cache.make_etag(
+        "history", card_id, days, resolution, max_points, until,
+        datetime.utcnow().date(), count, last_id
+    )
+    cache_control = http_cache.IMMUTABLE if PriceRollupService.is_final(until, effective) else http_cache.REVALIDATE
+    not_modified = http_cache.conditional(request, response, etag, last_snapshot, cache_control)
+    if not_modified:
+        return not_modified
+
+    # Our own rows/points: encoded with orjson, skipping response_model validation
+    if raw:
+        rows = SnapshotService.get_card_history_rows(db, HISTORY_COLUMNS, card_id, days, until)
+        return serialization.json_response(serialization.rows_json(PriceHistoryResponse, rows), response)
+
+    series = PriceRollupService.get_series(
+        db, card_id, days, resolution=resolution or "auto", max_points=max_points, until=until
+    )
+    return serialization.json_response(orjson.dumps(series, option=serialization.ORJSON_OPTIONS), response)
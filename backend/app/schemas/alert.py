@@ -0,0 +1,60 @@
+from pydantic import BaseModel, model_validator
+from datetime import date, datetime
+from typing import Literal, Optional
+
+AlertKind = Literal["price_above", "price_below", "percent_change", "new_high", "new_low"]
+
+class AlertRuleBase(BaseModel):
+    card_id: Optional[int] = None
+    set_name: Optional[str] = None
+    kind: AlertKind
+    threshold: Optional[float] = None   # price, or percent for percent_change (negative = a fall)
+    window_days: Optional[int] = None   # percent_change / new_high / new_low
+    label: Optional[str] = None
+    webhook_url: Optional[str] = None
+
+# Schema for creating an alert rule: on one card (card_id) or a whole set (set_name)
+class AlertRuleCreate(AlertRuleBase):
+    @model_validator(mode="after")
+    def check_rule(self):
+        if (self.card_id is None) == (not self.set_name):
+            raise ValueError("give either card_id or set_name")
+        if self.kind in ("price_above", "price_below", "percent_change") and self.threshold is None:
+            raise ValueError(f"{self.kind} needs a threshold")
+        if self.kind == "percent_change" and self.threshold == 0:
+            raise ValueError("percent_change threshold can't be 0")
+        if self.kind in ("percent_change", "new_high", "new_low"):
+            if self.window_days is None:
+                raise ValueError(f"{self.kind} needs window_days")
+            if not 1 <= self.window_days <= 3650:
+                raise ValueError("window_days must be between 1 and 3650")
+        if self.webhook_url and not self.webhook_url.startswith(("http://", "https://")):
+            raise ValueError("webhook_url must be an http(s) URL")
+        return self
+
+class AlertRuleResponse(AlertRuleBase):
+    id: int
+    active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AlertEventResponse(BaseModel):
+    id: int
+    rule_id: int
+    card_id: int
+    snapshot_day: date
+    kind: str
+    market_price: Optional[float] = None
+    reference_price: Optional[float] = None
+    change_percent: Optional[float] = None
+    message: str
+    delivery_status: str
+    attempts: int
+    delivered_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -22,6 +22,8 @@ class CardCreate(BaseModel):
 # Schema for reading a card (includes DB fields)
 class CardResponse(CardCreate):
     id: int
+    tcg_id: Optional[str] = None
+    tcgplayer_id: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
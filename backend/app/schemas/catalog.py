@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+
+class CatalogCardResponse(BaseModel):
+    tcg_id: str
+    name: str
+    set_id: str
+    set_name: str
+    number: Optional[str] = None
+    rarity: Optional[str] = None
+    image_url: Optional[str] = None
+    release_date: Optional[date] = None
+
+    class Config:
+        from_attributes = True
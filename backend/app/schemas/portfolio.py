@@ -0,0 +1,55 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+class ValueTotals(BaseModel):
+    card_count: int
+    priced_count: int
+    market_value: float
+    low_value: float
+    high_value: float
+
+class SetTotals(ValueTotals):
+    set_name: Optional[str] = None
+
+class RarityTotals(ValueTotals):
+    rarity: Optional[str] = None
+
+class Staleness(BaseModel):
+    never_priced: int
+    updated_last_day: int
+    updated_last_week: int
+    stale_over_week: int
+    oldest_price_update: Optional[datetime] = None
+
+class Mover(BaseModel):
+    card_id: int
+    card_name: str
+    set_name: Optional[str] = None
+    previous_price: float
+    market_price: float
+    change_percent: float
+
+# Schema for the portfolio summary endpoint
+class PortfolioSummaryResponse(ValueTotals):
+    by_set: List[SetTotals]
+    by_rarity: List[RarityTotals]
+    staleness: Staleness
+    top_movers: List[Mover]
+    generated_at: datetime
+
+# One point of the portfolio value chart: a day, or OHLC of the daily totals in a week/month
+class PortfolioValuePoint(BaseModel):
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    samples: int
+    priced_cards: int
+
+class PortfolioValueSeriesResponse(BaseModel):
+    days: int
+    resolution: str
+    downsampled: bool
+    points: List[PortfolioValuePoint]
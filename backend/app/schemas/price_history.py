@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 class PriceHistoryBase(BaseModel):
     card_id: int
@@ -17,4 +17,19 @@ class PriceHistoryResponse(PriceHistoryBase):
     snapshot_date: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+# One chart point: a day, or a week/month rollup (OHLC of market_price)
+class PricePoint(BaseModel):
+    date: date
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    samples: int
+
+class PriceSeriesResponse(BaseModel):
+    card_id: int
+    days: int
+    resolution: str
+    downsampled: bool
+    points: List[PricePoint]
@@ -1,42 +1,63 @@
+import asyncio
+import hashlib
+import math
 import os
 import json
-from typing import Optional, Dict
-from anthropic import Anthropic
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional, Dict
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai_insight import AIInsight
+from app.models.card import Card
+from app.services import metrics
+from app.services.cache import AsyncSingleFlight
+from app.services.log import get_logger
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+log = get_logger(__name__)
 
 class AIInsightsService:
     """Service to generate AI-powered insights using Claude API"""
     
+    MODEL = "claude-sonnet-4-20250514"
+    
+    # How long a stored insight stays valid for the same inputs
+    CACHE_TTL = float(os.getenv("AI_INSIGHTS_CACHE_TTL", "86400"))
+    
+    # Prices within the same ~5% band share an insight
+    PRICE_BUCKET_RATIO = 1.05
+    
+    _async_clients: Dict[int, "AsyncAnthropic"] = {}
+    _async_flight = AsyncSingleFlight()
+    
     @staticmethod
     def get_api_key() -> str:
         """Get Anthropic API key from environment"""
         return os.getenv('ANTHROPIC_API_KEY', '')
     
     @staticmethod
-    def generate_insights(card_name: str, set_name: str, current_price: float, 
-                         trend_analysis: Dict, price_history: Dict) -> Optional[Dict]:
-        """
-        Generate AI-powered insights for a card using Claude
-        
-        Args:
-            card_name: Name of the card
-            set_name: Set the card is from
-            current_price: Current market price
-            trend_analysis: Trend analysis data
-            price_history: Historical price data
-            
-        Returns:
-            Dict with prediction, recommendation, and reasoning
-        """
-        try:
+    def get_async_client() -> Optional["AsyncAnthropic"]:
+        """Async client, one per event loop (its connections are loop-bound)"""
+        loop_id = id(asyncio.get_running_loop())
+        client = AIInsightsService._async_clients.get(loop_id)
+        if client is None:
             api_key = AIInsightsService.get_api_key()
             if not api_key:
-                print("No Anthropic API key found")
                 return None
-            
-            client = Anthropic(api_key=api_key)
-            
-            # Prepare the prompt
-            prompt = f"""You are an expert Pokémon TCG market analyst. Analyze this card's price data and provide investment insights.
+            from anthropic import AsyncAnthropic
+            client = AsyncAnthropic(api_key=api_key)
+            AIInsightsService._async_clients[loop_id] = client
+        return client
+    
+    @staticmethod
+    def _build_prompt(card_name: str, set_name: str, current_price: float, trend_analysis: Dict) -> str:
+        """Prompt for the market analysis"""
+        return f"""You are an expert Pokémon TCG market analyst. Analyze this card's price data and provide investment insights.
 
 Card: {card_name} ({set_name})
 Current Price: ${current_price:.2f}
@@ -63,40 +84,158 @@ Format your response as JSON:
   "confidence": 85
 }}"""
 
-            # Call Claude API
-            message = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+    @staticmethod
+    def _parse_message(message) -> Dict:
+        """Pull the insights JSON out of a Messages API response"""
+        # Parse response
+        response_text = message.content[0].text
+        
+        # Extract JSON from response (handle markdown code blocks)
+        if "```json" in response_text:
+            json_start = response_text.find("```json") + 7
+            json_end = response_text.find("```", json_start)
+            response_text = response_text[json_start:json_end].strip()
+        elif "```" in response_text:
+            json_start = response_text.find("```") + 3
+            json_end = response_text.find("```", json_start)
+            response_text = response_text[json_start:json_end].strip()
+        
+        insights = json.loads(response_text)
+        
+        return {
+            "prediction": insights.get("prediction", ""),
+            "recommendation": insights.get("recommendation", "HOLD"),
+            "reasoning": insights.get("reasoning", ""),
+            "confidence": insights.get("confidence", 50),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+        
+    @staticmethod
+    def fingerprint(card_id: int, current_price: float, trend_analysis: Dict) -> str:
+        """
+        Hash of everything the insight depends on. The price is bucketed so
+        a few cents of movement doesn't invalidate the cache.
+        """
+        price_bucket = (
+            round(math.log(current_price, AIInsightsService.PRICE_BUCKET_RATIO))
+            if current_price and current_price > 0 else 0
+        )
+        payload = json.dumps({
+            "card_id": card_id,
+            "price_bucket": price_bucket,
+            "trend": trend_analysis,
+            "model": AIInsightsService.MODEL
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @staticmethod
+    def _fresh_cutoff() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=AIInsightsService.CACHE_TTL)
+    
+    @staticmethod
+    async def latest_for_card_async(db: AsyncSession, card_id: int) -> Optional[AIInsight]:
+        """Most recent unexpired insight for a card (a cache candidate)"""
+        result = await db.execute(
+            select(AIInsight).where(
+                AIInsight.card_id == card_id,
+                AIInsight.created_at >= AIInsightsService._fresh_cutoff()
+            ).order_by(AIInsight.created_at.desc()).limit(1)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def _lookup_async(db: AsyncSession, fingerprint: str) -> Optional[AIInsight]:
+        result = await db.execute(
+            select(AIInsight).where(
+                AIInsight.fingerprint == fingerprint,
+                AIInsight.created_at >= AIInsightsService._fresh_cutoff()
             )
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    async def _store_async(db: AsyncSession, card_id: int, fingerprint: str, insights: Dict) -> None:
+        """Save (or replace an expired) insight for this fingerprint"""
+        try:
+            await db.execute(delete(AIInsight).where(AIInsight.fingerprint == fingerprint))
+            db.add(AIInsight(
+                card_id=card_id,
+                fingerprint=fingerprint,
+                insights=insights,
+                model=AIInsightsService.MODEL,
+                created_at=datetime.utcnow()
+            ))
+            await db.commit()
+        except IntegrityError:
+            # Another worker stored the same fingerprint first
+            await db.rollback()
+    
+    @staticmethod
+    async def get_insights_async(db: AsyncSession, card: Card, trend_analysis: Dict, price_history: Dict,
+                                 force_refresh: bool = False,
+                                 candidate: Optional[AIInsight] = None) -> Optional[Dict]:
+        """
+        Insights for a card, generated at most once per fingerprint and TTL.
+        Concurrent requests for the same fingerprint share one Claude call.
+        `candidate` is an insight already loaded for this card; if its
+        fingerprint matches no lookup is needed.
+        """
+        current_price = card.market_price or 0
+        fingerprint = AIInsightsService.fingerprint(card.id, current_price, trend_analysis)
+        
+        if not force_refresh:
+            if candidate is not None and candidate.fingerprint == fingerprint:
+                return {**candidate.insights, "cached": True}
+            cached = await AIInsightsService._lookup_async(db, fingerprint)
+            if cached:
+                return {**cached.insights, "cached": True}
+        
+        async def generate():
+            insights = await AIInsightsService.generate_insights_async(
+                card_name=card.card_name,
+                set_name=card.set_name or "Unknown",
+                current_price=current_price,
+                trend_analysis=trend_analysis,
+                price_history=price_history
+            )
+            if insights:
+                await AIInsightsService._store_async(db, card.id, fingerprint, insights)
+                insights = {**insights, "cached": False}
+            return insights
+        
+        return await AIInsightsService._async_flight.do(fingerprint, generate)
+    
+    @staticmethod
+    async def generate_insights_async(card_name: str, set_name: str, current_price: float,
+                                      trend_analysis: Dict, price_history: Dict) -> Optional[Dict]:
+        """
+        Generate AI-powered insights for a card using Claude (AsyncAnthropic,
+        doesn't block the event loop). None if the call or parsing fails.
+        """
+        try:
+            client = AIInsightsService.get_async_client()
+            if client is None:
+                log.error("no Anthropic API key configured")
+                return None
             
-            # Parse response
-            response_text = message.content[0].text
-            
-            # Extract JSON from response (handle markdown code blocks)
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
+            prompt = AIInsightsService._build_prompt(card_name, set_name, current_price, trend_analysis)
             
-            insights = json.loads(response_text)
+            started = time.perf_counter()
+            status = "error"
+            try:
+                message = await client.messages.create(
+                    model=AIInsightsService.MODEL,
+                    max_tokens=1024,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                status = 200
+            finally:
+                metrics.observe_upstream("anthropic", status, time.perf_counter() - started)
             
-            return {
-                "prediction": insights.get("prediction", ""),
-                "recommendation": insights.get("recommendation", "HOLD"),
-                "reasoning": insights.get("reasoning", ""),
-                "confidence": insights.get("confidence", 50),
-                "generated_at": "now"
-            }
+            return AIInsightsService._parse_message(message)
             
-        except Exception as e:
-            print(f"Error generating AI insights: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
\ No newline at end of file
+        except Exception:
+            log.exception("error generating AI insights", card_name=card_name)
+            return None
@@ -0,0 +1,249 @@
+import hashlib
+import hmac
+import ipaddress
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+import orjson
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database.config import SessionLocal
+from app.models.price_alert import AlertEvent
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+
+class AlertWebhookDispatcher:
+    """
+    Delivers fired alerts from the alert_events outbox to their rules'
+    webhooks. Events are claimed with a lease (conditional UPDATE, as in
+    PriceEnrichmentQueue), POSTed as JSON and retried with backoff; any
+    non-2xx answer counts as a failure. Receivers should dedupe on the
+    X-Alert-Event-Id header, since a delivery can repeat after a crash.
+
+    With ALERT_WEBHOOK_SECRET set, X-Alert-Signature carries
+    "sha256=" + the hex HMAC-SHA256 of the body.
+
+    Webhook URLs are user-supplied, so they must be http(s) and resolve only
+    to public addresses, checked when the rule is created and again before
+    every POST - which then connects to the address that was checked, not
+    whatever the name resolves to by then. Hosts in
+    ALERT_WEBHOOK_ALLOWED_HOSTS skip the address check (e.g. "localhost"
+    for a local receiver).
+    """
+
+    ENABLED = os.getenv("ALERT_WEBHOOKS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SECRET = os.getenv("ALERT_WEBHOOK_SECRET", "")
+    TIMEOUT = float(os.getenv("ALERT_WEBHOOK_TIMEOUT", "10"))
+    BATCH_SIZE = int(os.getenv("ALERT_WEBHOOK_BATCH_SIZE", "50"))
+    LEASE_SECONDS = int(os.getenv("ALERT_WEBHOOK_LEASE_SECONDS", "120"))
+    POLL_SECONDS = float(os.getenv("ALERT_WEBHOOK_POLL_SECONDS", "5"))
+    MAX_ATTEMPTS = int(os.getenv("ALERT_WEBHOOK_MAX_ATTEMPTS", "8"))
+    RETRY_SECONDS = int(os.getenv("ALERT_WEBHOOK_RETRY_SECONDS", "30"))
+    ALLOWED_HOSTS = {
+        host.strip().lower() for host in os.getenv("ALERT_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+    }
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._client: Optional[httpx.Client] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def payload(event: AlertEvent) -> Dict:
+        return {
+            "type": "price_alert",
+            "id": event.id,
+            "rule_id": event.rule_id,
+            "card_id": event.card_id,
+            "kind": event.kind,
+            "snapshot_day": event.snapshot_day,
+            "market_price": event.market_price,
+            "reference_price": event.reference_price,
+            "change_percent": event.change_percent,
+            "message": event.message,
+        }
+
+    @staticmethod
+    def _resolve(url: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (why a webhook URL can't be used, the checked address to connect to).
+        The address is None for allowlisted hosts, which resolve as usual.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            return "webhook_url must be an http(s) URL", None
+        host = parsed.hostname.lower()
+        if host in AlertWebhookDispatcher.ALLOWED_HOSTS:
+            return None, None
+        try:
+            # dict: unique, in the resolver's order of preference
+            addresses = list(dict.fromkeys(
+                info[4][0] for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+            ))
+        except (socket.gaierror, UnicodeError, ValueError):
+            return f"webhook host {host} doesn't resolve", None
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split("%", 1)[0])
+            if ip.version == 6 and ip.ipv4_mapped:
+                ip = ip.ipv4_mapped
+            # Loopback, private, link-local (cloud metadata), reserved, shared ...
+            if not ip.is_global or ip.is_multicast:
+                return f"webhook host {host} resolves to a non-public address ({ip})", None
+        if not addresses:
+            return f"webhook host {host} doesn't resolve", None
+        return None, addresses[0]
+
+    @staticmethod
+    def check_url(url: str) -> Optional[str]:
+        """Why a webhook URL can't be used (None if it can)"""
+        return AlertWebhookDispatcher._resolve(url)[0]
+
+    def _get_client(self) -> httpx.Client:
+        # Own client rather than http_client's per-host pools: webhook hosts
+        # are user-supplied and would blow up the per-upstream metrics
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.TIMEOUT, follow_redirects=False)
+        return self._client
+
+    def _claimable(self, now: datetime):
+        return (
+            ((AlertEvent.delivery_status == "pending") & (AlertEvent.next_attempt_at <= now))
+            | ((AlertEvent.delivery_status == "delivering") & (AlertEvent.lease_expires_at < now))
+        )
+
+    def _claim(self, db: Session) -> List[AlertEvent]:
+        now = datetime.utcnow()
+        claimable = self._claimable(now)
+        ids = db.execute(
+            select(AlertEvent.id).where(claimable).order_by(AlertEvent.id).limit(self.BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            return []
+        # Compare-and-set: an event another process claimed meanwhile no longer matches
+        db.execute(
+            update(AlertEvent)
+            .where(AlertEvent.id.in_(ids), claimable)
+            .values(
+                delivery_status="delivering",
+                lease_owner=self.owner,
+                lease_expires_at=now + timedelta(seconds=self.LEASE_SECONDS),
+                attempts=AlertEvent.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return db.execute(
+            select(AlertEvent).where(
+                AlertEvent.id.in_(ids),
+                AlertEvent.delivery_status == "delivering",
+                AlertEvent.lease_owner == self.owner
+            ).order_by(AlertEvent.id)
+        ).scalars().all()
+
+    def _post(self, event: AlertEvent) -> Optional[str]:
+        """Deliver one event; the error, or None on success"""
+        # Checked again here: DNS may have changed since the rule was created
+        error, address = self._resolve(event.webhook_url)
+        if error:
+            return error
+        body = orjson.dumps(self.payload(event))
+        headers = {"Content-Type": "application/json", "X-Alert-Event-Id": str(event.id)}
+        if self.SECRET:
+            digest = hmac.new(self.SECRET.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Alert-Signature"] = f"sha256={digest}"
+        url = httpx.URL(event.webhook_url)
+        extensions = {}
+        if address is not None:
+            # Connect to the address we just checked. Letting httpx resolve
+            # the name again would let a rebinding DNS answer swap in an
+            # internal one; Host and SNI (so certificate checks) keep the name.
+            headers["Host"] = url.netloc.decode("ascii")
+            if url.scheme == "https":
+                extensions["sni_hostname"] = url.raw_host.decode("ascii")
+            url = url.copy_with(host=address.split("%", 1)[0])
+        try:
+            response = self._get_client().post(url, content=body, headers=headers, extensions=extensions)
+        except httpx.HTTPError as e:
+            return f"{type(e).__name__}: {e}"
+        if response.status_code >= 300:
+            return f"HTTP {response.status_code}"
+        return None
+
+    def _record(self, db: Session, event: AlertEvent, error: Optional[str]) -> None:
+        now = datetime.utcnow()
+        if error is None:
+            values = {"delivery_status": "delivered", "delivered_at": now, "last_error": None}
+        else:
+            final = event.attempts >= self.MAX_ATTEMPTS
+            values = {
+                "delivery_status": "failed" if final else "pending",
+                "last_error": error[:500],
+                # 30s, 1m, 2m, 4m ... between attempts
+                "next_attempt_at": now + timedelta(seconds=self.RETRY_SECONDS * 2 ** (event.attempts - 1)),
+            }
+            log.warning("alert webhook failed", event_id=event.id, attempts=event.attempts,
+                        final=final, error=error)
+        db.execute(
+            update(AlertEvent)
+            .where(AlertEvent.id == event.id, AlertEvent.lease_owner == self.owner)
+            .values(lease_owner=None, lease_expires_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def run_once(self) -> Dict:
+        """Deliver one batch of due events; returns delivered / failed counts"""
+        db = self.session_factory()
+        try:
+            events = self._claim(db)
+            report = {"claimed": len(events), "delivered": 0, "failed": 0}
+            for event in events:
+                error = self._post(event)
+                self._record(db, event, error)
+                report["delivered" if error is None else "failed"] += 1
+            if events:
+                log.info("alert webhooks sent", **report)
+            return report
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()["claimed"]
+            except Exception:
+                log.exception("alert dispatcher error")
+                claimed = 0
+            if not claimed:
+                self._stop.wait(self.POLL_SECONDS)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="alert-webhooks", daemon=True)
+        self._thread.start()
+        log.info("alert dispatcher started", owner=self.owner)
+
+    def stop(self, timeout: float = 30) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+# The process-wide dispatcher (started from app startup when enabled)
+alert_dispatcher = AlertWebhookDispatcher()
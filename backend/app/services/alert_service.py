@@ -0,0 +1,331 @@
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.database.upsert import upsert_statements
+from app.models.card import Card
+from app.models.price_alert import EVENT_KEY, AlertEvent, AlertRule
+from app.models.price_history import PriceHistory
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+THRESHOLD_KINDS = ("price_above", "price_below")
+WINDOW_KINDS = ("percent_change", "new_high", "new_low")
+
+
+class _RuleIndex:
+    """
+    The active rules that could apply to one batch of cards, keyed by scope
+    (("card", id) or ("set", set_key)). Threshold rules are kept sorted so a
+    price move only looks at the thresholds between the old and new price.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule]):
+        self._scopes: Dict[tuple, Dict[str, list]] = {}
+        for rule in rules:
+            scope = ("card", rule.card_id) if rule.card_id is not None else ("set", rule.set_key)
+            self._scopes.setdefault(scope, {}).setdefault(rule.kind, []).append(rule)
+
+        # Threshold kinds become (sorted thresholds, rules in the same order)
+        for kinds in self._scopes.values():
+            for kind in THRESHOLD_KINDS:
+                if kind in kinds:
+                    ordered = sorted(kinds[kind], key=lambda rule: rule.threshold)
+                    kinds[kind] = ([rule.threshold for rule in ordered], ordered)
+
+    def has_rules(self, scopes: List[tuple]) -> bool:
+        return any(scope in self._scopes for scope in scopes)
+
+    def lookback_days(self, scopes: List[tuple], previous_days: int) -> int:
+        """How much history before the new row the scopes' rules need"""
+        days = 0
+        for scope in scopes:
+            kinds = self._scopes.get(scope, {})
+            if any(kind in kinds for kind in THRESHOLD_KINDS):
+                days = max(days, previous_days)
+            for kind in WINDOW_KINDS:
+                for rule in kinds.get(kind, []):
+                    # percent_change also re-checks the previous snapshot's window
+                    extra = previous_days if kind == "percent_change" else 0
+                    days = max(days, rule.window_days + extra)
+        return days
+
+    def crossed(self, scopes: List[tuple], previous: Optional[float], current: float) -> List[AlertRule]:
+        """Threshold rules the move from `previous` to `current` crossed"""
+        fired = []
+        for scope in scopes:
+            kinds = self._scopes.get(scope, {})
+            if "price_above" in kinds:
+                thresholds, rules = kinds["price_above"]
+                # previous < threshold <= current
+                low = 0 if previous is None else bisect_right(thresholds, previous)
+                fired += rules[low:bisect_right(thresholds, current)]
+            if "price_below" in kinds and previous is not None:
+                thresholds, rules = kinds["price_below"]
+                # current <= threshold < previous
+                fired += rules[bisect_left(thresholds, current):bisect_left(thresholds, previous)]
+        return fired
+
+    def windowed(self, scopes: List[tuple]) -> List[AlertRule]:
+        return [
+            rule for scope in scopes for kind in WINDOW_KINDS
+            for rule in self._scopes.get(scope, {}).get(kind, [])
+        ]
+
+
+class AlertService:
+    """
+    Price alerts: rules on a card or a whole set, checked incrementally as
+    snapshots are written (price_history_writer calls evaluate in the same
+    transaction). Only the rules scoped to the written cards are loaded, and
+    only the history their windows need; fired alerts land in alert_events,
+    which is both the feed and the webhook outbox.
+    """
+
+    # How far back to look for the previous snapshot when checking a crossing
+    PREVIOUS_LOOKBACK_DAYS = int(os.getenv("ALERT_PREVIOUS_LOOKBACK_DAYS", "30"))
+    # Keep card_id IN (...) lists under SQLite's bound parameter limit
+    CARD_CHUNK_SIZE = 500
+
+    # --- rules -------------------------------------------------------------
+
+    @staticmethod
+    def create_rule(db: Session, card_id: Optional[int], set_name: Optional[str], kind: str,
+                    threshold: Optional[float] = None, window_days: Optional[int] = None,
+                    label: Optional[str] = None, webhook_url: Optional[str] = None) -> AlertRule:
+        rule = AlertRule(
+            card_id=card_id,
+            set_name=set_name,
+            set_key=set_name.strip().lower() if set_name else None,
+            kind=kind,
+            threshold=threshold,
+            window_days=window_days,
+            label=label,
+            webhook_url=webhook_url,
+            active=True
+        )
+        db.add(rule)
+        db.commit()
+        db.refresh(rule)
+        return rule
+
+    @staticmethod
+    def list_rules(db: Session, card_id: Optional[int] = None, set_name: Optional[str] = None) -> List[AlertRule]:
+        statement = select(AlertRule)
+        if card_id is not None:
+            statement = statement.where(AlertRule.card_id == card_id)
+        if set_name:
+            statement = statement.where(AlertRule.set_key == set_name.strip().lower())
+        return db.execute(statement.order_by(AlertRule.id)).scalars().all()
+
+    @staticmethod
+    def delete_rule(db: Session, rule_id: int) -> bool:
+        rule = db.get(AlertRule, rule_id)
+        if rule is None:
+            return False
+        db.delete(rule)
+        db.commit()
+        return True
+
+    # --- feed --------------------------------------------------------------
+
+    @staticmethod
+    def feed(db: Session, after_id: int = 0, limit: int = 100, card_id: Optional[int] = None,
+             rule_id: Optional[int] = None) -> List[AlertEvent]:
+        """Fired alerts oldest first; poll with after_id = the last id seen"""
+        statement = select(AlertEvent).where(AlertEvent.id > after_id)
+        if card_id is not None:
+            statement = statement.where(AlertEvent.card_id == card_id)
+        if rule_id is not None:
+            statement = statement.where(AlertEvent.rule_id == rule_id)
+        return db.execute(statement.order_by(AlertEvent.id).limit(limit)).scalars().all()
+
+    # --- evaluation --------------------------------------------------------
+
+    @staticmethod
+    def _message(card, rule: AlertRule, current: float, reference: Optional[float],
+                 change: Optional[float]) -> str:
+        name = f"{card.card_name} ({card.set_name})" if card.set_name else card.card_name
+        if rule.kind == "price_above":
+            return f"{name} rose above ${rule.threshold:,.2f}: now ${current:,.2f}"
+        if rule.kind == "price_below":
+            return f"{name} fell below ${rule.threshold:,.2f}: now ${current:,.2f}"
+        if rule.kind == "percent_change":
+            return f"{name} moved {change:+.1f}% in {rule.window_days} days: now ${current:,.2f}"
+        extreme = "high" if rule.kind == "new_high" else "low"
+        return f"{name} hit a new {rule.window_days}-day {extreme}: ${current:,.2f} (was ${reference:,.2f})"
+
+    @staticmethod
+    def _window(days: List[date], prices: List[float], index: int, window_days: int) -> List[float]:
+        """Prices in the window_days before days[index]"""
+        start = bisect_left(days, days[index] - timedelta(days=window_days), 0, index)
+        return prices[start:index]
+
+    @staticmethod
+    def _percent_change(days: List[date], prices: List[float], index: int,
+                        window_days: int) -> Tuple[Optional[float], Optional[float]]:
+        """(change in percent, base price) against the oldest price in the window"""
+        window = AlertService._window(days, prices, index, window_days)
+        if not window or not window[0]:
+            return None, None
+        return (prices[index] - window[0]) / window[0] * 100, window[0]
+
+    @staticmethod
+    def _percent_fires(change: Optional[float], threshold: float) -> bool:
+        if change is None:
+            return False
+        return change >= threshold if threshold >= 0 else change <= threshold
+
+    @staticmethod
+    def _check(rule: AlertRule, days: List[date], prices: List[float], index: int):
+        """Whether a window rule fires at days[index]: (reference price, change) or None"""
+        current = prices[index]
+        if rule.kind == "percent_change":
+            change, base = AlertService._percent_change(days, prices, index, rule.window_days)
+            if not AlertService._percent_fires(change, rule.threshold):
+                return None
+            # Only on the snapshot that crosses the threshold, not every day it stays crossed
+            if index > 0 and days[index - 1] >= days[index] - timedelta(days=AlertService.PREVIOUS_LOOKBACK_DAYS):
+                previous_change, _ = AlertService._percent_change(days, prices, index - 1, rule.window_days)
+                if AlertService._percent_fires(previous_change, rule.threshold):
+                    return None
+            return base, change
+
+        window = AlertService._window(days, prices, index, rule.window_days)
+        if not window:
+            return None
+        extreme = max(window) if rule.kind == "new_high" else min(window)
+        if (rule.kind == "new_high" and current > extreme) or (rule.kind == "new_low" and current < extreme):
+            return extreme, (current - extreme) / extreme * 100 if extreme else None
+        return None
+
+    @staticmethod
+    def _evaluate_chunk(db: Session, rows: List[Dict], now: datetime) -> List[Dict]:
+        card_ids = sorted({row["card_id"] for row in rows})
+        cards = {
+            card.id: card for card in db.execute(
+                select(Card.id, Card.card_name, Card.set_name).where(Card.id.in_(card_ids))
+            ).all()
+        }
+        set_keys = sorted({card.set_name.strip().lower() for card in cards.values() if card.set_name})
+        rules = db.execute(
+            select(AlertRule).where(
+                AlertRule.active.is_(True),
+                or_(AlertRule.card_id.in_(card_ids), AlertRule.set_key.in_(set_keys))
+            )
+        ).scalars().all()
+        if not rules:
+            return []
+        index = _RuleIndex(rules)
+
+        def scopes(card_id: int) -> List[tuple]:
+            card = cards.get(card_id)
+            result = [("card", card_id)]
+            if card is not None and card.set_name:
+                result.append(("set", card.set_name.strip().lower()))
+            return result
+
+        # Only cards with rules, and only as much history as their rules need
+        lookback = {
+            card_id: index.lookback_days(scopes(card_id), AlertService.PREVIOUS_LOOKBACK_DAYS)
+            for card_id in card_ids if card_id in cards and index.has_rules(scopes(card_id))
+        }
+        if not lookback:
+            return []
+        days_written = [row["snapshot_day"] for row in rows if row["card_id"] in lookback]
+        history: Dict[tuple, Tuple[List[date], List[float]]] = {}
+        for card_id, condition, day, price in db.execute(
+            select(PriceHistory.card_id, PriceHistory.condition, PriceHistory.snapshot_day,
+                   PriceHistory.market_price)
+            .where(
+                PriceHistory.card_id.in_(sorted(lookback)),
+                PriceHistory.source == "snapshot",
+                PriceHistory.market_price.isnot(None),
+                PriceHistory.snapshot_day >= min(days_written) - timedelta(days=max(lookback.values())),
+                PriceHistory.snapshot_day <= max(days_written)
+            )
+            .order_by(PriceHistory.card_id, PriceHistory.condition, PriceHistory.snapshot_day)
+        ):
+            days, prices = history.setdefault((card_id, condition), ([], []))
+            days.append(day)
+            prices.append(price)
+
+        events = []
+        for row in rows:
+            card_id = row["card_id"]
+            if card_id not in lookback:
+                continue
+            days, prices = history.get((card_id, row["condition"] or "Near Mint"), ([], []))
+            position = bisect_left(days, row["snapshot_day"])
+            if position == len(days) or days[position] != row["snapshot_day"]:
+                continue
+            # The stored price: when the day already had a row, the upsert kept that one
+            current = prices[position]
+            card_scopes = scopes(card_id)
+
+            previous = None
+            if position > 0 and days[position - 1] >= days[position] - timedelta(
+                    days=AlertService.PREVIOUS_LOOKBACK_DAYS):
+                previous = prices[position - 1]
+            fired = [
+                (rule, previous, (current - previous) / previous * 100 if previous else None)
+                for rule in index.crossed(card_scopes, previous, current)
+            ]
+            for rule in index.windowed(card_scopes):
+                result = AlertService._check(rule, days, prices, position)
+                if result is not None:
+                    fired.append((rule, *result))
+
+            for rule, reference, change in fired:
+                events.append({
+                    "rule_id": rule.id,
+                    "card_id": card_id,
+                    "snapshot_day": row["snapshot_day"],
+                    "kind": rule.kind,
+                    "market_price": current,
+                    "reference_price": reference,
+                    "change_percent": round(change, 2) if change is not None else None,
+                    "message": AlertService._message(cards[card_id], rule, current, reference, change),
+                    "delivery_status": "pending" if rule.webhook_url else "none",
+                    "webhook_url": rule.webhook_url,
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                })
+        return events
+
+    @staticmethod
+    def evaluate(db: Session, rows: List[Dict]) -> int:
+        """
+        Check the alert rules against freshly written daily rows (no commit).
+        Only our own snapshots fire alerts; upstream history backfills are old
+        news. Returns how many alerts fired.
+        """
+        rows = [row for row in rows if row.get("source") == "snapshot" and row.get("market_price") is not None]
+        if not rows:
+            return 0
+        # Cheap exit for the common case of no rules at all
+        if db.execute(select(AlertRule.id).where(AlertRule.active.is_(True)).limit(1)).first() is None:
+            return 0
+
+        now = datetime.utcnow()
+        by_card: Dict[int, List[Dict]] = {}
+        for row in rows:
+            by_card.setdefault(row["card_id"], []).append(row)
+        card_ids = sorted(by_card)
+
+        events = []
+        for start in range(0, len(card_ids), AlertService.CARD_CHUNK_SIZE):
+            chunk = card_ids[start:start + AlertService.CARD_CHUNK_SIZE]
+            events += AlertService._evaluate_chunk(db, [row for card_id in chunk for row in by_card[card_id]], now)
+
+        # A rule fires once per card and day, however often the day is re-snapshotted
+        for statement in upsert_statements(db.bind.dialect.name, AlertEvent, events, EVENT_KEY):
+            db.execute(statement)
+        if events:
+            log.info("alerts fired", alerts=len(events), cards=len({event["card_id"] for event in events}))
+        return len(events)
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+
+class CacheBackend(ABC):
+    """Storage for cache entries: key -> (value, stored_at)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU dict (per worker)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk LRU cache in a SQLite file.
+
+    Every uvicorn worker on the host opens the same file, so one worker's
+    fetch is a cache hit for the others.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, stored_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value), stored_at, time.time())
+        )
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache_entries")
+
+
+class AsyncSingleFlight:
+    """Merge concurrent awaits of the same key into one in-flight task"""
+
+    def __init__(self):
+        self._calls: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Futures belong to one event loop, so keep calls per loop
+        call_key = (id(asyncio.get_running_loop()), key)
+        future = self._calls.get(call_key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._calls[call_key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._calls.pop(call_key, None)
+            else:
+                # The leader was cancelled; let the task finish for the others
+                future.add_done_callback(lambda _: self._calls.pop(call_key, None))
+
+    def in_flight(self, key: str) -> bool:
+        try:
+            loop_id = id(asyncio.get_running_loop())
+        except RuntimeError:
+            return False
+        return (loop_id, key) in self._calls
+
+
+class TTLCache:
+    """
+    TTL cache with stale-while-revalidate and single-flight loading.
+
+    - fresh (age < ttl): returned straight from the backend
+    - stale (age < ttl + stale_ttl): returned immediately, refreshed in the background
+    - missing/expired: loaded once, however many callers are waiting on it
+
+    `None` results are never cached.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float, stale_ttl: float = 0):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.async_flight = AsyncSingleFlight()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "loads": 0}
+        self._stats_lock = threading.Lock()
+        # Background refreshes; the loop only keeps weak references to tasks
+        self._refreshes = set()
+        _registry[name] = self
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    async def _backend_call(self, fn: Callable, *args) -> Any:
+        # The in-memory backend never blocks; anything doing I/O goes to a thread
+        if isinstance(self.backend, MemoryCacheBackend):
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _load_async(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        async def load_and_store():
+            self._count("loads")
+            value = await loader()
+            if value is not None:
+                await self._backend_call(self.backend.set, key, value, time.time())
+            return value
+
+        return await self.async_flight.do(key, load_and_store)
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        task = asyncio.ensure_future(self._load_async(key, loader))
+        self._refreshes.add(task)
+
+        def done(task: asyncio.Future) -> None:
+            self._refreshes.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                log.error("background cache refresh failed", cache=self.name, key=key,
+                          error=repr(task.exception()))
+
+        task.add_done_callback(done)
+
+    async def get_or_load_async(self, key: str, loader: Callable[[], Awaitable[Any]],
+                                force_refresh: bool = False) -> Any:
+        """Cached value for key, loading it with the coroutine loader when needed (never blocks the event loop)"""
+        entry = None if force_refresh else await self._backend_call(self.backend.get, key)
+
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                self._count("hits")
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                if not self.async_flight.in_flight(key):
+                    self._refresh_in_background(key, loader)
+                return value
+
+        self._count("misses")
+        return await self._load_async(key, loader)
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+
+_registry: Dict[str, TTLCache] = {}
+
+
+def make_backend(prefix: str) -> CacheBackend:
+    """
+    Build a backend from <PREFIX>_CACHE_BACKEND (memory|sqlite),
+    <PREFIX>_CACHE_PATH and <PREFIX>_CACHE_MAX_ENTRIES
+    """
+    kind = os.getenv(f"{prefix}_CACHE_BACKEND", "memory").lower()
+    max_entries = int(os.getenv(f"{prefix}_CACHE_MAX_ENTRIES", "1024"))
+
+    if kind == "sqlite":
+        path = os.getenv(f"{prefix}_CACHE_PATH", f"./{prefix.lower()}_cache.db")
+        return SQLiteCacheBackend(path, max_entries=max_entries)
+    return MemoryCacheBackend(max_entries=max_entries)
+
+
+def get_stats() -> Dict[str, Dict]:
+    """Hit/miss counters for every cache in the process"""
+    return {name: cache.get_stats() for name, cache in _registry.items()}
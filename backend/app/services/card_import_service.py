@@ -0,0 +1,209 @@
+import codecs
+import csv
+import json
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.schemas.card import CardCreate
+from app.services.log import get_logger
+from app.services.price_service import PriceService
+
+log = get_logger(__name__)
+
+
+class CSVRowParser:
+    """
+    Incremental CSV parser: feed() raw bytes as they arrive, get back the
+    complete rows (dicts keyed by the header row) seen so far.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        self._record = ""
+        self._header: Optional[List[str]] = None
+
+    def _parse_record(self, record: str) -> Optional[Dict]:
+        values = next(csv.reader([record]), [])
+        if not values or not any(value.strip() for value in values):
+            return None
+        if self._header is None:
+            self._header = [value.strip() for value in values]
+            return None
+        return dict(zip(self._header, values))
+
+    def _drain(self, final: bool = False) -> List[Dict]:
+        rows = []
+        lines = self._buffer.split("\n")
+        self._buffer = "" if final else lines.pop()
+
+        for line in lines:
+            self._record += line + "\n"
+            # A quoted field may contain newlines; wait until the quotes balance
+            if self._record.count('"') % 2:
+                continue
+            row = self._parse_record(self._record.rstrip("\r\n"))
+            self._record = ""
+            if row is not None:
+                rows.append(row)
+
+        if final and self._record.strip():
+            row = self._parse_record(self._record.rstrip("\r\n"))
+            self._record = ""
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def feed(self, data: bytes) -> List[Dict]:
+        self._buffer += self._decoder.decode(data)
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        self._buffer += self._decoder.decode(b"", final=True)
+        return self._drain(final=True)
+
+
+class JSONRowParser:
+    """
+    Incremental parser for a JSON array of objects or NDJSON (one object
+    per line). Objects are decoded as soon as they are complete, so the
+    whole document is never held in memory.
+    """
+
+    SEPARATORS = " \t\r\n,[]"
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+
+    def _drain(self, final: bool = False) -> List:
+        rows = []
+        pos = 0
+        while True:
+            while pos < len(self._buffer) and self._buffer[pos] in self.SEPARATORS:
+                pos += 1
+            if pos >= len(self._buffer):
+                break
+            try:
+                value, pos = self._json.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise ValueError(f"Invalid JSON near: {self._buffer[pos:pos + 40]!r}")
+                break  # incomplete object, wait for more data
+            rows.append(value)
+
+        self._buffer = self._buffer[pos:]
+        return rows
+
+    def feed(self, data: bytes) -> List:
+        self._buffer += self._decoder.decode(data)
+        return self._drain()
+
+    def close(self) -> List:
+        self._buffer += self._decoder.decode(b"", final=True)
+        return self._drain(final=True)
+
+
+def make_parser(content_type: str):
+    """Pick a row parser from a Content-Type header (or file extension)"""
+    if "csv" in (content_type or "").lower():
+        return CSVRowParser()
+    return JSONRowParser()
+
+
+class CardImporter:
+    """
+    Imports cards in batches: each batch gets one bulk price lookup
+    (PriceService.fetch_card_prices_bulk) and one multi-row INSERT.
+
+    Only the current batch is kept in memory; the report lists every row
+    that was rejected or had no price match.
+    """
+
+    DEFAULT_BATCH_SIZE = 500
+
+    def __init__(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE, fetch_prices: bool = True):
+        self.db = db
+        self.batch_size = batch_size
+        self.fetch_prices = fetch_prices
+        self._batch: List[tuple] = []
+        self._row_number = 0
+        self.report = {
+            "total_rows": 0,
+            "inserted": 0,
+            "priced": 0,
+            "invalid": [],
+            "unmatched": []
+        }
+
+    @staticmethod
+    def _clean(row: Dict) -> Dict:
+        # CSV gives "" for empty cells; treat them as missing
+        return {
+            key.strip(): (value.strip() if isinstance(value, str) else value)
+            for key, value in row.items()
+            if key and value not in ("", None)
+        }
+
+    def add_rows(self, rows: List) -> None:
+        for row in rows:
+            self._row_number += 1
+            self.report["total_rows"] += 1
+
+            if not isinstance(row, dict):
+                self.report["invalid"].append({"row": self._row_number, "error": "Expected an object"})
+                continue
+            try:
+                card = CardCreate(**self._clean(row))
+            except ValidationError as e:
+                self.report["invalid"].append({
+                    "row": self._row_number,
+                    "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                })
+                continue
+
+            self._batch.append((self._row_number, card))
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+
+        prices = {}
+        if self.fetch_prices:
+            prices = PriceService.fetch_card_prices_bulk(
+                self.db, [(card.card_name, card.set_name) for _, card in self._batch]
+            )
+
+        values = []
+        for row_number, card in self._batch:
+            data = card.dict()
+            set_key = card.set_name if card.set_name and card.set_name != "Unknown" else ""
+            price_data = prices.get((card.card_name.lower(), set_key.lower()))
+
+            if price_data:
+                data.update(price_data)
+                self.report["priced"] += 1
+            elif self.fetch_prices:
+                self.report["unmatched"].append({
+                    "row": row_number,
+                    "card_name": card.card_name,
+                    "set_name": card.set_name
+                })
+            values.append(data)
+
+        self.db.execute(insert(Card), values)
+        self.db.commit()
+        self.report["inserted"] += len(values)
+        log.info("imported card batch", rows=len(values), total=self.report["inserted"])
+        self._batch = []
+
+    def finish(self) -> Dict:
+        self.flush()
+        return self.report
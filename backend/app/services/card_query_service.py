@@ -0,0 +1,130 @@
+import base64
+import json
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database.prefix import starts_with
+from app.models.card import Card
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class CardQueryService:
+    """Filtered, keyset-paginated and streamed card listings"""
+
+    STREAM_CHUNK_SIZE = 1000
+
+    @staticmethod
+    def encode_cursor(last_id: int) -> str:
+        """Opaque cursor token for the page after `last_id`"""
+        raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+
+    @staticmethod
+    def filtered(statement, set_name: Optional[str] = None, rarity: Optional[str] = None,
+                 name: Optional[str] = None):
+        """Apply the listing filters (each backed by an index on cards)"""
+        if set_name:
+            statement = statement.where(Card.set_name == set_name)
+        if rarity:
+            statement = statement.where(Card.rarity == rarity)
+        if name:
+            # Case-insensitive prefix match, seeking ix_cards_card_name_lower
+            statement = statement.where(starts_with(func.lower(Card.card_name), name.lower()))
+        return statement
+
+    @staticmethod
+    def get_page(db: Session, limit: int = 100, cursor: Optional[str] = None, skip: int = 0,
+                 set_name: Optional[str] = None, rarity: Optional[str] = None,
+                 name: Optional[str] = None) -> Tuple[List[Card], Optional[str]]:
+        """
+        One page of cards ordered by id, plus the cursor for the next page
+        (None on the last page).
+
+        With a cursor the page starts right after the last seen id (an index
+        seek, so cost doesn't grow with page depth); `skip` is kept for older
+        clients that still page by offset.
+        """
+        statement = CardQueryService._paged(select(Card), limit, cursor, skip, set_name, rarity, name)
+        cards = db.execute(statement).scalars().all()
+
+        next_cursor = CardQueryService.encode_cursor(cards[-1].id) if len(cards) == limit else None
+        return cards, next_cursor
+
+    @staticmethod
+    def get_page_rows(db: Session, columns: List, limit: int = 100, cursor: Optional[str] = None,
+                      skip: int = 0, set_name: Optional[str] = None, rarity: Optional[str] = None,
+                      name: Optional[str] = None) -> List[tuple]:
+        """get_page as plain column tuples (no ORM objects), for the fast JSON path"""
+        statement = CardQueryService._paged(select(*columns), limit, cursor, skip, set_name, rarity, name)
+        return db.execute(statement).all()
+
+    @staticmethod
+    def _paged(statement, limit: int, cursor: Optional[str], skip: int, set_name: Optional[str],
+               rarity: Optional[str], name: Optional[str]):
+        statement = CardQueryService.filtered(statement, set_name, rarity, name)
+
+        if cursor:
+            statement = statement.where(Card.id > CardQueryService.decode_cursor(cursor))
+        elif skip:
+            statement = statement.offset(skip)
+
+        return statement.order_by(Card.id).limit(limit)
+
+    @staticmethod
+    def page_version(db: Session, limit: int = 100, cursor: Optional[str] = None, skip: int = 0,
+                     set_name: Optional[str] = None, rarity: Optional[str] = None,
+                     name: Optional[str] = None) -> Tuple[tuple, Optional[str]]:
+        """
+        What get_page would return, summarised in one aggregate row: a
+        version tuple for the ETag and the next cursor. Much cheaper than
+        loading and serializing the page.
+
+        No Last-Modified: a card deleted from the page, or one moving into it,
+        doesn't make the newest updated_at any newer.
+        """
+        page = CardQueryService._paged(
+            select(Card.id, Card.created_at, Card.updated_at, Card.last_price_update, Card.market_price),
+            limit, cursor, skip, set_name, rarity, name
+        ).subquery()
+        changed = func.coalesce(page.c.updated_at, page.c.created_at)
+        count, last_id, id_sum, last_changed, last_priced, price_sum = db.execute(select(
+            func.count(),
+            func.max(page.c.id),
+            # Which cards are on the page: changes when one leaves or joins it
+            func.sum(page.c.id),
+            func.max(changed),
+            func.max(page.c.last_price_update),
+            # Catches price updates landing within the same second
+            func.sum(page.c.market_price)
+        )).one()
+
+        next_cursor = CardQueryService.encode_cursor(last_id) if count == limit else None
+        return (count, last_id, id_sum, last_changed, last_priced, price_sum), next_cursor
+
+    @staticmethod
+    def stream(db: Session, set_name: Optional[str] = None, rarity: Optional[str] = None,
+               name: Optional[str] = None) -> Iterator[Card]:
+        """
+        Yield every matching card from a server-side cursor, fetching
+        STREAM_CHUNK_SIZE rows at a time (constant memory)
+        """
+        statement = CardQueryService.filtered(select(Card), set_name, rarity, name).order_by(Card.id)
+        result = db.execute(statement.execution_options(yield_per=CardQueryService.STREAM_CHUNK_SIZE))
+
+        for card in result.scalars():
+            yield card
+            # Drop rows we've already sent so the identity map stays small
+            db.expunge(card)
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.database.prefix import starts_with
+from app.database.upsert import upsert_statements
+from app.models.catalog import CatalogCard, CatalogSet, CatalogSource
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+CARD_COLUMNS = [
+    "name", "set_id", "set_name", "number", "rarity", "supertype",
+    "image_url", "release_date", "name_key", "set_key"
+]
+SET_COLUMNS = ["name", "series", "total", "release_date"]
+
+
+class CatalogService:
+    """
+    Offline copy of the PokemonTCG.io catalog, so card names can be
+    validated and autocompleted without a network round trip.
+
+    Ingests the JSON dumps from a directory (the pokemon-tcg-data layout -
+    sets/en.json plus cards/en/<set id>.json - or saved /v2/cards and
+    /v2/sets responses). Files are tracked by sha1, so a refresh only reads
+    new or changed ones, e.g. the file for a newly released set.
+    """
+
+    DUMP_DIR = os.getenv("CATALOG_DUMP_DIR", "")
+
+    @staticmethod
+    def _parse_date(value) -> Optional[date]:
+        # PokemonTCG.io writes "1999/01/09"
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value.replace("-", "/"), "%Y/%m/%d").date()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _is_set(item: Dict) -> bool:
+        return "supertype" not in item and ("series" in item or "printedTotal" in item)
+
+    @staticmethod
+    def _load(path: str) -> List[Dict]:
+        with open(path, "rb") as f:
+            items = json.load(f)
+        # Saved API responses wrap the list in {"data": [...]}
+        if isinstance(items, dict):
+            items = items.get("data", [])
+        return [item for item in items if isinstance(item, dict) and item.get("id")]
+
+    @staticmethod
+    def _digest(path: str) -> str:
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    @staticmethod
+    def _set_row(item: Dict) -> Dict:
+        return {
+            "id": item["id"],
+            "name": item.get("name") or item["id"],
+            "series": item.get("series"),
+            "total": item.get("total"),
+            "release_date": CatalogService._parse_date(item.get("releaseDate")),
+        }
+
+    @staticmethod
+    def _card_row(item: Dict, sets: Dict[str, Dict], default_set_id: str) -> Dict:
+        # API dumps embed the set; pokemon-tcg-data card files are named after it
+        card_set = item.get("set") or sets.get(default_set_id) or {"id": default_set_id}
+        set_id = card_set.get("id", default_set_id)
+        set_name = card_set.get("name") or sets.get(set_id, {}).get("name") or set_id
+        release_date = card_set.get("release_date") or CatalogService._parse_date(card_set.get("releaseDate"))
+        return {
+            "tcg_id": item["id"],
+            "name": item.get("name") or "",
+            "set_id": set_id,
+            "set_name": set_name,
+            "number": item.get("number"),
+            "rarity": item.get("rarity"),
+            "supertype": item.get("supertype"),
+            "image_url": (item.get("images") or {}).get("small"),
+            "release_date": release_date,
+            "name_key": (item.get("name") or "").lower(),
+            "set_key": set_name.lower(),
+        }
+
+    @staticmethod
+    def _record_source(conn, path: str, digest: str, records: int) -> None:
+        conn.execute(
+            next(upsert_statements(
+                conn.dialect.name, CatalogSource,
+                [{"path": path, "digest": digest, "records": records}],
+                ["path"], update_columns=["digest", "records"]
+            ))
+        )
+
+    @staticmethod
+    def ingest(engine: Engine, root: Optional[str] = None, force: bool = False) -> Dict:
+        """
+        Load new or changed dump files under `root` (default CATALOG_DUMP_DIR).
+        Each file is upserted in its own transaction; `force` re-reads all.
+        """
+        root = root or CatalogService.DUMP_DIR
+        if not root or not os.path.isdir(root):
+            raise ValueError(f"Catalog dump directory not found: {root!r}")
+
+        paths = sorted(
+            os.path.relpath(os.path.join(directory, name), root)
+            for directory, _, names in os.walk(root)
+            for name in names if name.endswith(".json")
+        )
+        report = {"files": len(paths), "unchanged_files": 0, "sets": 0, "cards": 0, "errors": []}
+
+        with engine.connect() as conn:
+            known = dict(conn.execute(select(CatalogSource.path, CatalogSource.digest)).all())
+
+        changed = []
+        for path in paths:
+            digest = CatalogService._digest(os.path.join(root, path))
+            if not force and known.get(path) == digest:
+                report["unchanged_files"] += 1
+            else:
+                changed.append((path, digest))
+
+        # Two passes: set files first, so card files can be labelled with set names
+        card_files = []
+        for path, digest in changed:
+            try:
+                items = CatalogService._load(os.path.join(root, path))
+            except (OSError, ValueError) as e:
+                report["errors"].append({"path": path, "error": str(e)})
+                continue
+            if not items or not CatalogService._is_set(items[0]):
+                card_files.append((path, digest))
+                continue
+
+            rows = [CatalogService._set_row(item) for item in items]
+            with engine.begin() as conn:
+                for statement in upsert_statements(conn.dialect.name, CatalogSet, rows, ["id"], SET_COLUMNS):
+                    conn.execute(statement)
+                CatalogService._record_source(conn, path, digest, len(rows))
+            report["sets"] += len(rows)
+
+        with engine.connect() as conn:
+            sets = {
+                row.id: {"id": row.id, "name": row.name, "release_date": row.release_date}
+                for row in conn.execute(select(CatalogSet.id, CatalogSet.name, CatalogSet.release_date))
+            }
+
+        for path, digest in card_files:
+            try:
+                items = CatalogService._load(os.path.join(root, path))
+            except (OSError, ValueError) as e:
+                report["errors"].append({"path": path, "error": str(e)})
+                continue
+
+            default_set_id = os.path.splitext(os.path.basename(path))[0]
+            rows = [CatalogService._card_row(item, sets, default_set_id) for item in items]
+            with engine.begin() as conn:
+                for statement in upsert_statements(conn.dialect.name, CatalogCard, rows, ["tcg_id"], CARD_COLUMNS):
+                    conn.execute(statement)
+                CatalogService._record_source(conn, path, digest, len(rows))
+            report["cards"] += len(rows)
+            log.debug("ingested catalog file", path=path, cards=len(rows))
+
+        log.info("catalog refresh finished", changed_files=len(changed), sets=report["sets"],
+                 cards=report["cards"], errors=len(report["errors"]))
+        return report
+
+    @staticmethod
+    def autocomplete(db: Session, q: str, limit: int = 10) -> List[CatalogCard]:
+        """
+        Cards whose name starts with `q` (newest printing first), topped
+        up with full-text matches when there are fewer than `limit`
+        """
+        prefix = q.strip().lower()
+        if not prefix:
+            return []
+
+        cards = db.execute(
+            select(CatalogCard)
+            .where(starts_with(CatalogCard.name_key, prefix))
+            .order_by(CatalogCard.name_key, CatalogCard.release_date.desc())
+            .limit(limit)
+        ).scalars().all()
+
+        if len(cards) < limit:
+            seen = {card.id for card in cards}
+            cards += [card for card in CatalogService.search(db, q, limit) if card.id not in seen]
+        return cards[:limit]
+
+    @staticmethod
+    def search(db: Session, q: str, limit: int = 20, set_name: Optional[str] = None) -> List[CatalogCard]:
+        """Full-text search over card and set names; every word is matched as a prefix"""
+        tokens = re.findall(r"\w+", q.lower())
+        if not tokens:
+            return []
+
+        set_filter = " AND catalog_cards.set_key = :set_key" if set_name else ""
+        params = {"limit": limit, "set_key": (set_name or "").lower()}
+
+        if db.bind.dialect.name == "postgresql":
+            document = "to_tsvector('simple', catalog_cards.name || ' ' || catalog_cards.set_name)"
+            statement = text(
+                f"SELECT catalog_cards.* FROM catalog_cards "
+                f"WHERE {document} @@ to_tsquery('simple', :query){set_filter} "
+                f"ORDER BY ts_rank({document}, to_tsquery('simple', :query)) DESC LIMIT :limit"
+            )
+            params["query"] = " & ".join(f"{token}:*" for token in tokens)
+            cards = db.execute(select(CatalogCard).from_statement(statement), params).scalars().all()
+            if cards:
+                return cards
+
+            # Nothing matched: probably a typo, try trigram similarity on the name
+            try:
+                with db.begin_nested():
+                    statement = text(
+                        f"SELECT catalog_cards.* FROM catalog_cards "
+                        f"WHERE catalog_cards.name_key % :name{set_filter} "
+                        f"ORDER BY similarity(catalog_cards.name_key, :name) DESC LIMIT :limit"
+                    )
+                    params["name"] = " ".join(tokens)
+                    return db.execute(select(CatalogCard).from_statement(statement), params).scalars().all()
+            except DBAPIError:
+                return []
+
+        statement = text(
+            f"SELECT catalog_cards.* FROM catalog_cards_fts "
+            f"JOIN catalog_cards ON catalog_cards.id = catalog_cards_fts.rowid "
+            f"WHERE catalog_cards_fts MATCH :query{set_filter} "
+            f"ORDER BY catalog_cards_fts.rank LIMIT :limit"
+        )
+        params["query"] = " ".join(f'"{token}"*' for token in tokens)
+        return db.execute(select(CatalogCard).from_statement(statement), params).scalars().all()
+
+    @staticmethod
+    def match(db: Session, card_name: str, set_name: Optional[str] = None) -> Optional[CatalogCard]:
+        """
+        The catalog card for an exact (case-insensitive) name and set name
+        or set id; newest printing when no set is given
+        """
+        statement = select(CatalogCard).where(CatalogCard.name_key == card_name.strip().lower())
+        if set_name and set_name != "Unknown":
+            statement = statement.where(or_(
+                CatalogCard.set_key == set_name.strip().lower(),
+                CatalogCard.set_id == set_name.strip()
+            ))
+        return db.execute(
+            statement.order_by(CatalogCard.release_date.desc()).limit(1)
+        ).scalars().first()
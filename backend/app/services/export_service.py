@@ -0,0 +1,279 @@
+import io
+import os
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import String, func, select, text, type_coerce
+from sqlalchemy.engine import Engine
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.services.log import get_logger
+from app.services.price_history_writer import export_lock
+
+log = get_logger(__name__)
+
+# Exportable column -> (SQL column, Arrow type)
+EXPORT_COLUMNS = {
+    "id": (PriceHistory.id, "int64"),
+    "card_id": (PriceHistory.card_id, "int64"),
+    "card_name": (Card.card_name, "string"),
+    "set_name": (Card.set_name, "string"),
+    "card_number": (Card.card_number, "string"),
+    "rarity": (Card.rarity, "string"),
+    "tcg_id": (Card.tcg_id, "string"),
+    "source": (PriceHistory.source, "string"),
+    "condition": (PriceHistory.condition, "string"),
+    "snapshot_day": (PriceHistory.snapshot_day, "date32"),
+    "snapshot_date": (PriceHistory.snapshot_date, "timestamp"),
+    "market_price": (PriceHistory.market_price, "float64"),
+    "low_price": (PriceHistory.low_price, "float64"),
+    "high_price": (PriceHistory.high_price, "float64"),
+}
+CARD_COLUMNS = {"card_name", "set_name", "card_number", "rarity", "tcg_id"}
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows"}
+
+MAX_CARD_IDS = 1000
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file pyarrow writes into; drained after every batch"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class PriceHistoryExport:
+    """
+    price_history with its card details, streamed as Parquet (one row group per
+    batch) or an Arrow IPC stream from a server-side cursor, so memory stays
+    at one batch however many rows are exported.
+
+    Incremental exports: pass the previous export's watermark as `after_id`
+    to get only rows added since. The watermark is fixed before streaming
+    starts (the highest matching id at that moment), so rows written during
+    the export are left for the next one. Ids aren't commit-ordered on
+    Postgres, so watermark() waits out writers still in flight (see
+    price_history_writer.EXPORT_LOCK_KEY); otherwise one committing a lower
+    id afterwards would be skipped by every later export.
+
+    pyarrow is imported on first use; only export requests pay for it.
+    """
+
+    DEFAULT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "100000"))
+    COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+    # How long to wait for the read replica to replay up to the watermark
+    # before streaming from the primary instead
+    REPLICA_WAIT_SECONDS = float(os.getenv("EXPORT_REPLICA_WAIT_SECONDS", "5"))
+
+    def __init__(self, columns: Optional[List[str]] = None, start: Optional[date] = None,
+                 end: Optional[date] = None, card_ids: Optional[List[int]] = None,
+                 set_name: Optional[str] = None, source: Optional[str] = None,
+                 after_id: int = 0, batch_rows: Optional[int] = None):
+        columns = columns or list(EXPORT_COLUMNS)
+        unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)} (available: {', '.join(EXPORT_COLUMNS)})")
+        if card_ids and len(card_ids) > MAX_CARD_IDS:
+            raise ValueError(f"At most {MAX_CARD_IDS} card ids per export")
+        if start and end and start > end:
+            raise ValueError("start is after end")
+
+        self.columns = list(dict.fromkeys(columns))
+        self.start = start
+        self.end = end
+        self.card_ids = card_ids
+        self.set_name = set_name
+        self.source = source
+        # Rows after this id only: a previous export's watermark, which is
+        # safe to resume from since watermark() waits out in-flight writers
+        self.after_id = after_id or 0
+        self._watermark_lsn = None
+        self.batch_rows = batch_rows or self.DEFAULT_BATCH_ROWS
+        self.rows = 0
+
+    def _where(self, statement):
+        statement = statement.where(PriceHistory.id > self.after_id)
+        if self.start:
+            statement = statement.where(PriceHistory.snapshot_day >= self.start)
+        if self.end:
+            statement = statement.where(PriceHistory.snapshot_day <= self.end)
+        if self.card_ids:
+            statement = statement.where(PriceHistory.card_id.in_(self.card_ids))
+        if self.set_name:
+            statement = statement.where(
+                PriceHistory.card_id.in_(select(Card.id).where(Card.set_name == self.set_name))
+            )
+        if self.source:
+            statement = statement.where(PriceHistory.source == self.source)
+        return statement
+
+    def watermark(self, engine: Engine) -> int:
+        """
+        The highest id this export will include (after_id if there's nothing
+        new). Read on the primary: only it can wait for in-flight writers.
+        """
+        with engine.connect() as conn:
+            lock = export_lock(conn.dialect.name, shared=False)
+            if lock is not None:
+                # Held until the connection rolls back below, a moment later
+                conn.execute(lock)
+            highest = conn.execute(self._where(select(func.max(PriceHistory.id)))).scalar()
+            if conn.dialect.name == "postgresql":
+                self._watermark_lsn = conn.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+        return highest if highest is not None else self.after_id
+
+    def read_engine(self, primary: Engine, replica: Engine) -> Engine:
+        """
+        The replica, once it has replayed everything up to the watermark;
+        streaming from a lagging one would skip rows the watermark covers
+        """
+        if replica is primary or self._watermark_lsn is None:
+            return replica
+        deadline = time.monotonic() + self.REPLICA_WAIT_SECONDS
+        with replica.connect() as conn:
+            while True:
+                caught_up = conn.execute(
+                    text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"), {"lsn": self._watermark_lsn}
+                ).scalar()
+                if caught_up is not False:
+                    return replica  # None: not a standby (say, a pooler in front of the primary)
+                if time.monotonic() >= deadline:
+                    log.warning("replica behind export watermark, using the primary", lsn=self._watermark_lsn)
+                    return primary
+                conn.rollback()
+                time.sleep(0.1)
+
+    def _schema(self):
+        import pyarrow as pa
+
+        types = {
+            "int64": pa.int64(),
+            "string": pa.string(),
+            "date32": pa.date32(),
+            "timestamp": pa.timestamp("us", tz="UTC"),
+            "float64": pa.float64(),
+        }
+        return pa.schema([(column, types[EXPORT_COLUMNS[column][1]]) for column in self.columns])
+
+    def _cards(self, conn, schema) -> Dict:
+        """
+        Card columns for every card, as Arrow arrays. Batches pick theirs
+        with a vectorized take instead of joining cards on every history row
+        (the table is collection-sized, not history-sized).
+        """
+        import pyarrow as pa
+
+        names = [column for column in self.columns if column in CARD_COLUMNS]
+        if not names:
+            return {}
+        statement = select(Card.id, *(EXPORT_COLUMNS[name][0] for name in names))
+        if self.card_ids:
+            statement = statement.where(Card.id.in_(self.card_ids))
+        if self.set_name:
+            statement = statement.where(Card.set_name == self.set_name)
+        columns = list(zip(*conn.execute(statement))) or [()] * (len(names) + 1)
+        cards = {"id": pa.array(columns[0], type=pa.int64())}
+        for name, values in zip(names, columns[1:]):
+            cards[name] = pa.array(values, type=schema.field(name).type)
+        return cards
+
+    @staticmethod
+    def _array(values, type, text: bool = False):
+        import pyarrow as pa
+
+        if text:
+            # SQLite dates/timestamps come back as ISO text: one vectorized
+            # cast instead of parsing every value in Python (stored naive, in UTC)
+            text = pa.array(values, type=pa.string())
+            if pa.types.is_timestamp(type):
+                return text.cast(pa.timestamp(type.unit)).cast(type)
+            return text.cast(type)
+        return pa.array(values, type=type)
+
+    def _batches(self, engine: Engine, watermark: int, schema) -> Iterator:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        with engine.connect() as conn:
+            cards = self._cards(conn, schema)
+            # card_id always comes along: card columns are looked up by it
+            selected = [column for column in self.columns if column not in CARD_COLUMNS]
+            if "card_id" not in selected:
+                selected.append("card_id")
+            sql_columns = [EXPORT_COLUMNS[column][0] for column in selected]
+            # Dates SQLite stores as text stay text for _array() to cast
+            text = {
+                name for name in selected
+                if conn.dialect.name == "sqlite" and EXPORT_COLUMNS[name][1] in ("date32", "timestamp")
+            }
+            sql_columns = [type_coerce(column, String) if name in text else column
+                           for name, column in zip(selected, sql_columns)]
+
+            result = conn.execution_options(stream_results=True, yield_per=self.batch_rows).execute(
+                self._where(select(*sql_columns)).where(PriceHistory.id <= watermark)
+            )
+            for rows in result.partitions(self.batch_rows):
+                arrays = {}
+                for name, values in zip(selected, zip(*rows)):
+                    type = pa.int64() if name == "card_id" else schema.field(name).type
+                    arrays[name] = self._array(values, type, name in text)
+                if cards:
+                    # Deleted cards find no match: null card columns, like an outer join
+                    positions = pc.index_in(arrays["card_id"], value_set=cards["id"])
+                    for name in cards:
+                        if name != "id":
+                            arrays[name] = cards[name].take(positions)
+                yield pa.RecordBatch.from_arrays([arrays[column] for column in self.columns], schema=schema)
+
+    def iter_bytes(self, engine: Engine, format: str, watermark: int) -> Iterator[bytes]:
+        """The export file, chunk by chunk (one chunk per batch of rows)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = self._schema()
+        sink = _Sink()
+        if format == "parquet":
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=self.COMPRESSION)
+        else:
+            writer = pa.ipc.new_stream(
+                pa.PythonFile(sink, mode="w"), schema,
+                options=pa.ipc.IpcWriteOptions(compression=self.COMPRESSION or None)
+            )
+
+        self.rows = 0
+        try:
+            for batch in self._batches(engine, watermark, schema):
+                writer.write_batch(batch)
+                self.rows += batch.num_rows
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+        log.info("price history exported", format=format, rows=self.rows, watermark=watermark,
+                 columns=len(self.columns))
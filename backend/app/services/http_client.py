@@ -0,0 +1,237 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+import httpx
+
+from app.services import metrics
+
+# Pool settings (per upstream host)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class _HostStats:
+    """Request / connection counters for one upstream host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failed = 0
+        self.new_connections = 0
+        self.pool_hits = 0
+        self.lock = threading.Lock()
+
+    def record(self, connected: bool, ok: bool) -> None:
+        """
+        One request: `connected` if it started opening a connection (counted
+        even when the connect failed), `ok` if a response came back. Only
+        answered requests that opened nothing count as pool hits.
+        """
+        with self.lock:
+            self.requests += 1
+            if connected:
+                self.new_connections += 1
+            if not ok:
+                self.failed += 1
+            elif not connected:
+                self.pool_hits += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "new_connections": self.new_connections,
+            "pool_hits": self.pool_hits,
+        }
+
+
+_stats: Dict[str, _HostStats] = {}
+_clients: Dict[str, httpx.Client] = {}
+# Async clients per event loop, keyed by the loop itself rather than its
+# id(): a closed loop's id can be handed to a new one
+_async_clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+_lock = threading.Lock()
+
+
+def _host_key(base_url: str) -> str:
+    parsed = urlparse(base_url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _get_stats(host: str) -> _HostStats:
+    with _lock:
+        if host not in _stats:
+            _stats[host] = _HostStats()
+        return _stats[host]
+
+
+class _TimedTransport(httpx.BaseTransport):
+    """Records latency and status of every upstream request in /metrics, and its pool use"""
+
+    def __init__(self, transport: httpx.BaseTransport, upstream: str, stats: _HostStats):
+        self.transport = transport
+        self.upstream = upstream
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        connected = []
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                connected.append(True)
+
+        request.extensions["trace"] = trace
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = self.transport.handle_request(request)
+            status = response.status_code
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        finally:
+            metrics.observe_upstream(self.upstream, status, time.perf_counter() - started)
+            self.stats.record(bool(connected), ok=isinstance(status, int))
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _AsyncTimedTransport(httpx.AsyncBaseTransport):
+    """Async variant of _TimedTransport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, upstream: str, stats: _HostStats):
+        self.transport = transport
+        self.upstream = upstream
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        connected = []
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                connected.append(True)
+
+        request.extensions["trace"] = trace
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = response.status_code
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        finally:
+            metrics.observe_upstream(self.upstream, status, time.perf_counter() - started)
+            self.stats.record(bool(connected), ok=isinstance(status, int))
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _transport_options() -> Dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        # Only negotiated over TLS (ALPN); plain http stays on HTTP/1.1
+        "http2": HTTP2_ENABLED,
+    }
+
+
+def _client_options(host: str) -> Dict:
+    return {
+        "base_url": host,
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def get_client(base_url: str) -> httpx.Client:
+    """
+    Shared keep-alive client for an upstream host.
+
+    One pool per host, so a slow upstream can't starve the others.
+    httpx.Client is thread-safe, so snapshot workers share it.
+    """
+    host = _host_key(base_url)
+    client = _clients.get(host)
+    if client is not None:
+        return client
+
+    with _lock:
+        if host not in _clients:
+            stats = _stats.setdefault(host, _HostStats())
+            _clients[host] = httpx.Client(
+                transport=_TimedTransport(
+                    httpx.HTTPTransport(**_transport_options()), urlparse(host).netloc, stats
+                ),
+                **_client_options(host)
+            )
+        return _clients[host]
+
+
+def _drop_closed_loops() -> None:
+    """Forget clients whose event loop has closed (asyncio.run in a script or test)"""
+    with _lock:
+        for loop in [loop for loop in _async_clients if loop.is_closed()]:
+            # Can't aclose() without their loop; their sockets go with the objects
+            del _async_clients[loop]
+
+
+def get_async_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Shared async keep-alive client for an upstream host.
+
+    Async connections are bound to an event loop, so clients are kept per
+    loop; the app's loop closes its own in aclose_clients(), clients of any
+    other loop are dropped once that loop has closed.
+    """
+    host = _host_key(base_url)
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop, {}).get(host)
+    if client is not None:
+        return client
+
+    _drop_closed_loops()
+    client = httpx.AsyncClient(
+        transport=_AsyncTimedTransport(
+            httpx.AsyncHTTPTransport(**_transport_options()), urlparse(host).netloc, _get_stats(host)
+        ),
+        **_client_options(host)
+    )
+    with _lock:
+        _async_clients.setdefault(loop, {})[host] = client
+    return client
+
+
+def get_stats() -> Dict[str, Dict]:
+    """Pool counters per upstream host"""
+    with _lock:
+        return {host: stats.to_dict() for host, stats in _stats.items()}
+
+
+def close_clients() -> None:
+    """Close the shared sync clients (call on shutdown)"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def aclose_clients() -> None:
+    """Close the async clients owned by the running event loop"""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
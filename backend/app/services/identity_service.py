@@ -0,0 +1,151 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.card_identity import CardIdentity
+from app.services.cache import MemoryCacheBackend
+
+ID_FIELDS = ("tcg_id", "tcgplayer_id")
+
+
+class CardIdentityService:
+    """
+    Remembers which upstream ids a (card name, set) search resolved to.
+
+    The first price or history lookup for a name/set does the fuzzy text
+    search and records the ids here (card_identities, fronted by an
+    in-process LRU); every later lookup - for any card with the same
+    name/set - goes straight to the by-id endpoint.
+
+    Everything runs on the caller's session, so a lookup never checks out
+    a second connection mid-request; writes join the caller's transaction
+    and are committed with it.
+    """
+
+    _memory = MemoryCacheBackend(max_entries=int(os.getenv("CARD_IDENTITY_CACHE_MAX_ENTRIES", "50000")))
+
+    @staticmethod
+    def key(card_name: str, set_name: Optional[str]) -> Tuple[str, str]:
+        # Same normalisation the bulk price matching uses
+        set_key = set_name if set_name and set_name != "Unknown" else ""
+        return card_name.lower(), set_key.lower()
+
+    @staticmethod
+    def _memory_key(key: Tuple[str, str]) -> str:
+        return f"{key[0]}|{key[1]}"
+
+    @staticmethod
+    def _remember_in_memory(key: Tuple[str, str], ids: Dict) -> Dict:
+        entry = CardIdentityService._memory.get(CardIdentityService._memory_key(key))
+        merged = dict(entry[0]) if entry else {field: None for field in ID_FIELDS}
+        merged.update({field: value for field, value in ids.items() if value})
+        CardIdentityService._memory.set(CardIdentityService._memory_key(key), merged, 0)
+        return merged
+
+    @staticmethod
+    def _select(key: Tuple[str, str]):
+        return select(CardIdentity.tcg_id, CardIdentity.tcgplayer_id).where(
+            CardIdentity.name_key == key[0],
+            CardIdentity.set_key == key[1]
+        )
+
+    @staticmethod
+    def _upsert(dialect_name: str, key: Tuple[str, str], ids: Dict):
+        """INSERT ... ON CONFLICT that only fills in the ids we were given"""
+        dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        statement = dialect_insert(CardIdentity).values(name_key=key[0], set_key=key[1], **ids)
+        return statement.on_conflict_do_update(
+            index_elements=["name_key", "set_key"],
+            set_={
+                **{
+                    field: func.coalesce(statement.excluded[field], getattr(CardIdentity, field))
+                    for field in ID_FIELDS
+                },
+                "updated_at": func.now()
+            }
+        )
+
+    @staticmethod
+    def get(db: Session, card_name: str, set_name: Optional[str]) -> Optional[Dict]:
+        """Known ids for a name/set ({"tcg_id", "tcgplayer_id"}), or None"""
+        key = CardIdentityService.key(card_name, set_name)
+        entry = CardIdentityService._memory.get(CardIdentityService._memory_key(key))
+        if entry is not None:
+            return entry[0]
+
+        row = db.execute(CardIdentityService._select(key)).first()
+        if row is None:
+            return None
+        return CardIdentityService._remember_in_memory(key, dict(row._mapping))
+
+    @staticmethod
+    async def get_async(db: AsyncSession, card_name: str, set_name: Optional[str]) -> Optional[Dict]:
+        """Async variant of get"""
+        key = CardIdentityService.key(card_name, set_name)
+        entry = CardIdentityService._memory.get(CardIdentityService._memory_key(key))
+        if entry is not None:
+            return entry[0]
+
+        row = (await db.execute(CardIdentityService._select(key))).first()
+        if row is None:
+            return None
+        return CardIdentityService._remember_in_memory(key, dict(row._mapping))
+
+    @staticmethod
+    def get_many(db: Session, cards: List[Tuple[str, Optional[str]]]) -> Dict[Tuple[str, str], Dict]:
+        """get() for a batch of (name, set) pairs, with one query for the memory misses"""
+        found: Dict[Tuple[str, str], Dict] = {}
+        missing = set()
+        for card_name, set_name in cards:
+            key = CardIdentityService.key(card_name, set_name)
+            entry = CardIdentityService._memory.get(CardIdentityService._memory_key(key))
+            if entry is not None:
+                found[key] = entry[0]
+            else:
+                missing.add(key)
+        if not missing:
+            return found
+
+        rows = db.execute(
+            select(CardIdentity.name_key, CardIdentity.set_key, CardIdentity.tcg_id, CardIdentity.tcgplayer_id)
+            .where(CardIdentity.name_key.in_({name for name, _ in missing}))
+        ).all()
+        for row in rows:
+            key = (row.name_key, row.set_key)
+            if key in missing:
+                found[key] = CardIdentityService._remember_in_memory(
+                    key, {"tcg_id": row.tcg_id, "tcgplayer_id": row.tcgplayer_id}
+                )
+        return found
+
+    @staticmethod
+    def _clean_ids(ids: Dict) -> Dict:
+        return {field: str(value) for field, value in ids.items() if field in ID_FIELDS and value}
+
+    @staticmethod
+    def remember(db: Session, card_name: str, set_name: Optional[str], **ids) -> None:
+        """Record resolved ids (tcg_id=..., tcgplayer_id=...); None values are ignored. No commit."""
+        CardIdentityService.remember_many(db, {CardIdentityService.key(card_name, set_name): ids})
+
+    @staticmethod
+    def remember_many(db: Session, identities: Dict[Tuple[str, str], Dict]) -> None:
+        """remember() for a batch: {key(name, set): {"tcg_id": ..., ...}}. No commit."""
+        identities = {key: CardIdentityService._clean_ids(ids) for key, ids in identities.items()}
+        for key, ids in identities.items():
+            if ids:
+                db.execute(CardIdentityService._upsert(db.bind.dialect.name, key, ids))
+                CardIdentityService._remember_in_memory(key, ids)
+
+    @staticmethod
+    async def remember_async(db: AsyncSession, card_name: str, set_name: Optional[str], **ids) -> None:
+        """Async variant of remember (no commit)"""
+        ids = CardIdentityService._clean_ids(ids)
+        if not ids:
+            return
+        key = CardIdentityService.key(card_name, set_name)
+        await db.execute(CardIdentityService._upsert(db.bind.dialect.name, key, ids))
+        CardIdentityService._remember_in_memory(key, ids)
@@ -0,0 +1,204 @@
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+# Queries slower than this are logged (with the request id) as well as counted
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds", "Upstream API call latency",
+    ["upstream", "status"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total", "Upstream calls retried after an error or timeout", ["upstream"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time",
+    ["engine", "operation"], buckets=DB_BUCKETS
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection",
+    ["engine"], buckets=DB_BUCKETS
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT (pool exhausted)", ["engine"]
+)
+DB_POOL_HOLD_SECONDS = Histogram(
+    "db_pool_connection_hold_seconds", "How long a pooled DB connection stays checked out",
+    ["engine"], buckets=LATENCY_BUCKETS
+)
+
+# Instrumented engines by name, for the occupancy gauges
+_engines = {}
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that times how long each checkout waits for a connection.
+    SQLAlchemy has no event before a checkout starts waiting, so this wraps
+    the pool's getter; engines pick it up through poolclass (see config).
+    """
+
+    metrics_name = None  # set by instrument_engine
+
+    def _do_get(self):
+        if self.metrics_name is None:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(engine=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(engine=self.metrics_name).observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep it instrumented
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def observe_upstream(upstream: str, status, seconds: float) -> None:
+    """status: HTTP status code, or "timeout" / "error" when there was no response"""
+    UPSTREAM_REQUEST_SECONDS.labels(upstream=upstream, status=str(status)).observe(seconds)
+
+
+def count_retry(upstream: str) -> None:
+    UPSTREAM_RETRIES.labels(upstream=upstream).inc()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time every statement, and how long pool connections are held, on a
+    (sync) engine, plus checkout waits when its pool is a Timed*QueuePool
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(" ", 1)[0].upper() or "OTHER"
+        if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            operation = "OTHER"
+        DB_QUERY_SECONDS.labels(engine=name, operation=operation).observe(elapsed)
+        if elapsed >= SLOW_QUERY_SECONDS:
+            log.warning("slow query", engine=name, seconds=round(elapsed, 4), statement=statement[:300])
+
+    # Long holds are what make other requests wait on a full pool
+    # (db_pool_checked_out shows how close to full it is)
+    @event.listens_for(engine.pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine.pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            DB_POOL_HOLD_SECONDS.labels(engine=name).observe(time.perf_counter() - checked_out_at)
+
+    if isinstance(engine.pool, _TimedCheckout):
+        engine.pool.metrics_name = name
+    _engines[name] = engine
+
+
+class _StatsCollector:
+    """Exposes the cache, upstream-pool and DB pool counters the app already keeps"""
+
+    def describe(self):
+        # Nothing to declare up front; without this, registering calls
+        # collect() while http_client may still be importing this module
+        return []
+
+    def collect(self):
+        # Imported here so this module has no import-time dependency on them
+        from app.services import cache, http_client
+
+        hits = CounterMetricFamily("cache_hits", "Cache lookups served from cache", labels=["cache"])
+        stale = CounterMetricFamily("cache_stale_hits", "Cache lookups served stale", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache lookups that had to load", labels=["cache"])
+        loads = CounterMetricFamily("cache_loads", "Loader calls (after single-flight)", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Hits (incl. stale) / lookups", labels=["cache"])
+        for name, stats in cache.get_stats().items():
+            hits.add_metric([name], stats["hits"])
+            stale.add_metric([name], stats["stale_hits"])
+            misses.add_metric([name], stats["misses"])
+            loads.add_metric([name], stats["loads"])
+            if stats["hit_ratio"] is not None:
+                ratio.add_metric([name], stats["hit_ratio"])
+        yield from (hits, stale, misses, loads, ratio)
+
+        requests = CounterMetricFamily("upstream_pool_requests", "Requests per upstream host", labels=["host"])
+        connections = CounterMetricFamily(
+            "upstream_pool_new_connections", "Connections opened (or attempted) per upstream host", labels=["host"]
+        )
+        failed = CounterMetricFamily(
+            "upstream_pool_failed_requests", "Requests per upstream host that got no response", labels=["host"]
+        )
+        pool_hits = CounterMetricFamily(
+            "upstream_pool_hits", "Requests served over an already open connection", labels=["host"]
+        )
+        for host, stats in http_client.get_stats().items():
+            requests.add_metric([host], stats["requests"])
+            connections.add_metric([host], stats["new_connections"])
+            failed.add_metric([host], stats["failed"])
+            pool_hits.add_metric([host], stats["pool_hits"])
+        yield from (requests, connections, failed, pool_hits)
+
+        size = GaugeMetricFamily("db_pool_size", "Connections the pool keeps open", labels=["engine"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond the pool size", labels=["engine"])
+        for name, engine in _engines.items():
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue  # NullPool / SingletonThreadPool keep no counts
+            size.add_metric([name], pool.size())
+            checked_out.add_metric([name], pool.checkedout())
+            overflow.add_metric([name], max(pool.overflow(), 0))
+        yield from (size, checked_out, overflow)
+
+
+REGISTRY.register(_StatsCollector())
+
+
+def render() -> Tuple[bytes, str]:
+    """Body and content type for GET /metrics"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Several uvicorn workers: merge the per-process metric files
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+
+
+class PortfolioService:
+    """Portfolio-wide valuation computed with SQL aggregates"""
+
+    @staticmethod
+    def _grouped_totals(db: Session, now: datetime) -> List:
+        """
+        Totals for the whole portfolio, per set and per rarity in one
+        UNION ALL statement (one round-trip, no card rows serialized)
+        """
+        day_ago = now - timedelta(days=1)
+        week_ago = now - timedelta(days=7)
+
+        def aggregates(kind: str, key):
+            return [
+                literal(kind).label("kind"),
+                key.label("key"),
+                func.count(Card.id).label("card_count"),
+                func.count(Card.market_price).label("priced_count"),
+                func.coalesce(func.sum(Card.market_price), 0).label("market_total"),
+                func.coalesce(func.sum(Card.low_price), 0).label("low_total"),
+                func.coalesce(func.sum(Card.high_price), 0).label("high_total"),
+                func.sum(case((Card.last_price_update.is_(None), 1), else_=0)).label("never_priced"),
+                func.sum(case((Card.last_price_update >= day_ago, 1), else_=0)).label("updated_last_day"),
+                func.sum(case(
+                    ((Card.last_price_update < day_ago) & (Card.last_price_update >= week_ago), 1),
+                    else_=0
+                )).label("updated_last_week"),
+                func.sum(case((Card.last_price_update < week_ago, 1), else_=0)).label("stale_over_week"),
+                func.min(Card.last_price_update).label("oldest_price_update"),
+            ]
+
+        statement = union_all(
+            select(*aggregates("total", literal(None))),
+            select(*aggregates("set", Card.set_name)).group_by(Card.set_name),
+            select(*aggregates("rarity", Card.rarity)).group_by(Card.rarity),
+        )
+        return db.execute(statement).all()
+
+    @staticmethod
+    def _top_movers(db: Session, days: int, limit: int, now: datetime) -> List[Dict]:
+        """
+        Cards with the largest % change between their oldest snapshot in the
+        window and their current market price
+        """
+        cutoff = now - timedelta(days=days)
+
+        first_snapshot = select(
+            PriceHistory.card_id,
+            func.min(PriceHistory.snapshot_date).label("snapshot_date")
+        ).where(
+            PriceHistory.source == "snapshot",
+            PriceHistory.snapshot_date >= cutoff,
+            PriceHistory.market_price > 0
+        ).group_by(PriceHistory.card_id).subquery()
+
+        change = (Card.market_price - PriceHistory.market_price) / PriceHistory.market_price * 100
+
+        rows = db.execute(
+            select(
+                Card.id,
+                Card.card_name,
+                Card.set_name,
+                PriceHistory.market_price.label("previous_price"),
+                Card.market_price,
+                change.label("change_percent")
+            )
+            .join(first_snapshot, first_snapshot.c.card_id == Card.id)
+            .join(PriceHistory, (PriceHistory.card_id == first_snapshot.c.card_id)
+                  & (PriceHistory.snapshot_date == first_snapshot.c.snapshot_date)
+                  & (PriceHistory.source == "snapshot"))
+            .where(Card.market_price.isnot(None))
+            .order_by(func.abs(change).desc())
+            .limit(limit)
+        ).all()
+
+        return [
+            {
+                "card_id": row.id,
+                "card_name": row.card_name,
+                "set_name": row.set_name,
+                "previous_price": row.previous_price,
+                "market_price": row.market_price,
+                "change_percent": round(row.change_percent, 2)
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def summary(db: Session, movers_days: int = 7, movers_limit: int = 5) -> Dict:
+        """
+        Total value, per-set / per-rarity breakdowns, staleness and top movers
+        """
+        now = datetime.utcnow()
+        totals = {}
+        by_set = []
+        by_rarity = []
+
+        for row in PortfolioService._grouped_totals(db, now):
+            group = {
+                "card_count": row.card_count,
+                "priced_count": row.priced_count,
+                "market_value": round(row.market_total, 2),
+                "low_value": round(row.low_total, 2),
+                "high_value": round(row.high_total, 2),
+            }
+            if row.kind == "total":
+                totals = group
+                staleness = {
+                    "never_priced": row.never_priced or 0,
+                    "updated_last_day": row.updated_last_day or 0,
+                    "updated_last_week": row.updated_last_week or 0,
+                    "stale_over_week": row.stale_over_week or 0,
+                    "oldest_price_update": row.oldest_price_update,
+                }
+            elif row.kind == "set":
+                by_set.append({"set_name": row.key, **group})
+            else:
+                by_rarity.append({"rarity": row.key, **group})
+
+        by_set.sort(key=lambda group: group["market_value"], reverse=True)
+        by_rarity.sort(key=lambda group: group["market_value"], reverse=True)
+
+        return {
+            **totals,
+            "by_set": by_set,
+            "by_rarity": by_rarity,
+            "staleness": staleness,
+            "top_movers": PortfolioService._top_movers(db, movers_days, movers_limit, now),
+            "generated_at": now
+        }
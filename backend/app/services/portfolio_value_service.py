@@ -0,0 +1,274 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.database.upsert import upsert_statements
+from app.models.card import Card
+from app.models.portfolio_value import PortfolioValueDaily
+from app.models.price_history import PriceHistory
+from app.services.price_rollup_service import PriceRollupService
+
+# The series follows our own daily snapshots (the default condition)
+SOURCE = "snapshot"
+CONDITION = "Near Mint"
+
+
+class PortfolioValueService:
+    """
+    portfolio_value_daily: the collection's total market value per day,
+    so the value chart reads one small table instead of joining cards and
+    price_history.
+
+    A card counts on every day from its first snapshot on, with its latest
+    snapshot price carried forward over gaps. A deleted card (whose history
+    goes with it) doesn't count on any day, as if it had never existed. Writes
+    are applied as deltas: price_history_writer captures the touched
+    cards' prices before the upsert and apply() adds the difference to the
+    days it changes (for a daily snapshot batch, one UPDATE of today's row).
+    """
+
+    # Keep card_id IN (...) lists under SQLite's bound parameter limit
+    CARD_CHUNK_SIZE = 500
+
+    @staticmethod
+    def _snapshots(statement):
+        return statement.where(
+            PriceHistory.source == SOURCE,
+            PriceHistory.condition == CONDITION,
+            PriceHistory.market_price.isnot(None)
+        )
+
+    @staticmethod
+    def _anchors(db: Session, card_ids: List[int], before: date) -> Dict[int, float]:
+        """Each card's latest price before `before` (one index seek per card)"""
+        latest = PortfolioValueService._snapshots(
+            select(PriceHistory.market_price)
+            .where(PriceHistory.card_id == Card.id, PriceHistory.snapshot_day < before)
+        ).order_by(PriceHistory.snapshot_day.desc()).limit(1).scalar_subquery()
+        return {
+            card_id: price
+            for card_id, price in db.execute(select(Card.id, latest).where(Card.id.in_(card_ids)))
+            if price is not None
+        }
+
+    @staticmethod
+    def _prices_since(db: Session, card_ids: List[int], since: date) -> Dict[int, List[Tuple[date, float]]]:
+        prices: Dict[int, List[Tuple[date, float]]] = {}
+        for card_id, day, price in db.execute(PortfolioValueService._snapshots(
+            select(PriceHistory.card_id, PriceHistory.snapshot_day, PriceHistory.market_price)
+            .where(PriceHistory.card_id.in_(card_ids), PriceHistory.snapshot_day >= since)
+        ).order_by(PriceHistory.card_id, PriceHistory.snapshot_day)):
+            prices.setdefault(card_id, []).append((day, price))
+        return prices
+
+    @staticmethod
+    def _changes(anchor: Optional[float], before: List[Tuple[date, float]],
+                 after: List[Tuple[date, float]]) -> List[Tuple[date, float, int]]:
+        """
+        Where one card's carried-forward price changed between two versions
+        of its rows: (day, value delta, priced-card delta) from that day on
+        """
+        changes = []
+        old = new = anchor
+        i = j = 0
+        applied = (0.0, 0)
+        for day in sorted({day for day, _ in before} | {day for day, _ in after}):
+            while i < len(before) and before[i][0] <= day:
+                old = before[i][1]
+                i += 1
+            while j < len(after) and after[j][0] <= day:
+                new = after[j][1]
+                j += 1
+            delta = ((new or 0.0) - (old or 0.0), (new is not None) - (old is not None))
+            if delta != applied:
+                changes.append((day, delta[0] - applied[0], delta[1] - applied[1]))
+                applied = delta
+        return changes
+
+    @staticmethod
+    def capture(db: Session, rows: List[Dict]) -> List[tuple]:
+        """
+        Before daily rows are written: the touched cards' prices from the
+        first written day on (pass the result to apply() afterwards)
+        """
+        first_day: Dict[int, date] = {}
+        for row in rows:
+            if row.get("source") != SOURCE or (row.get("condition") or CONDITION) != CONDITION:
+                continue
+            card_id = row["card_id"]
+            first_day[card_id] = min(first_day.get(card_id, row["snapshot_day"]), row["snapshot_day"])
+
+        card_ids = sorted(first_day)
+        captured = []
+        for start in range(0, len(card_ids), PortfolioValueService.CARD_CHUNK_SIZE):
+            chunk = card_ids[start:start + PortfolioValueService.CARD_CHUNK_SIZE]
+            since = min(first_day[card_id] for card_id in chunk)
+            captured.append((
+                chunk, since,
+                PortfolioValueService._anchors(db, chunk, since),
+                PortfolioValueService._prices_since(db, chunk, since)
+            ))
+        return captured
+
+    @staticmethod
+    def apply(db: Session, captured: List[tuple]) -> None:
+        """After the write: add what changed to the daily totals (no commit)"""
+        changes: Dict[date, List] = {}
+        for chunk, since, anchors, before in captured:
+            after = PortfolioValueService._prices_since(db, chunk, since)
+            for card_id in chunk:
+                for day, value, priced in PortfolioValueService._changes(
+                    anchors.get(card_id), before.get(card_id, []), after.get(card_id, [])
+                ):
+                    change = changes.setdefault(day, [0.0, 0])
+                    change[0] += value
+                    change[1] += priced
+        PortfolioValueService._apply_changes(
+            db, {day: change for day, change in changes.items() if change[0] or change[1]}
+        )
+
+    @staticmethod
+    def _apply_changes(db: Session, changes: Dict[date, List]) -> None:
+        if not changes:
+            return
+        first, last = db.execute(select(func.min(PortfolioValueDaily.day), func.max(PortfolioValueDaily.day))).one()
+        start, end = min(changes), max(changes)
+
+        # Keep the table dense: nothing was priced before its first day, and
+        # after its last day the last totals carry forward
+        rows = []
+        if first is None:
+            rows += PortfolioValueService._days(start, end, 0.0, 0)
+        else:
+            if start < first:
+                rows += PortfolioValueService._days(start, first - timedelta(days=1), 0.0, 0)
+            if end > last:
+                total, priced = db.execute(
+                    select(PortfolioValueDaily.total_value, PortfolioValueDaily.priced_cards)
+                    .where(PortfolioValueDaily.day == last)
+                ).one()
+                rows += PortfolioValueService._days(last + timedelta(days=1), end, total, priced)
+        for statement in upsert_statements(db.bind.dialect.name, PortfolioValueDaily, rows, ["day"]):
+            db.execute(statement)
+
+        for day in sorted(changes):
+            value, priced = changes[day]
+            db.execute(
+                update(PortfolioValueDaily)
+                .where(PortfolioValueDaily.day >= day)
+                .values(
+                    total_value=PortfolioValueDaily.total_value + value,
+                    priced_cards=PortfolioValueDaily.priced_cards + priced
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def _days(start: date, end: date, total: float, priced: int) -> List[Dict]:
+        return [
+            {"day": start + timedelta(days=offset), "total_value": total, "priced_cards": priced}
+            for offset in range((end - start).days + 1)
+        ]
+
+    @staticmethod
+    def remove_card(db: Session, card_id: int) -> None:
+        """
+        A card is being deleted: take it out of every day it counted on,
+        the same totals rebuild() gives without it (no commit; call before
+        its price history is deleted)
+        """
+        before = PortfolioValueService._prices_since(db, [card_id], date.min).get(card_id, [])
+        PortfolioValueService._apply_changes(db, {
+            day: [value, priced] for day, value, priced in PortfolioValueService._changes(None, before, [])
+        })
+
+    @staticmethod
+    def rebuild(conn) -> int:
+        """
+        Build every day from scratch (used once, when the table is new).
+        Only cards that still exist are counted.
+        """
+        result = conn.execution_options(yield_per=10000).execute(PortfolioValueService._snapshots(
+            select(PriceHistory.card_id, PriceHistory.snapshot_day, PriceHistory.market_price)
+            .join(Card, Card.id == PriceHistory.card_id)
+        ).order_by(PriceHistory.card_id, PriceHistory.snapshot_day))
+
+        changes: Dict[date, List] = {}
+        previous_card, previous_price = None, None
+        for card_id, day, price in result:
+            change = changes.setdefault(day, [0.0, 0])
+            if card_id != previous_card:
+                change[0] += price
+                change[1] += 1
+            else:
+                change[0] += price - previous_price
+            previous_card, previous_price = card_id, price
+        if not changes:
+            return 0
+
+        rows = []
+        total, priced = 0.0, 0
+        day, end = min(changes), max(changes)
+        while day <= end:
+            value, count = changes.get(day, (0.0, 0))
+            total += value
+            priced += count
+            rows.append({"day": day, "total_value": total, "priced_cards": priced})
+            day += timedelta(days=1)
+        for statement in upsert_statements(
+            conn.dialect.name, PortfolioValueDaily, rows, ["day"], ["total_value", "priced_cards"]
+        ):
+            conn.execute(statement)
+        return len(rows)
+
+    @staticmethod
+    def get_series(db: Session, days: int = 365, resolution: str = "auto",
+                   max_points: Optional[int] = None, until: Optional[date] = None) -> Dict:
+        """
+        Value chart: daily totals, or weekly/monthly OHLC of them, LTTB
+        downsampled if still longer than max_points. The last total is
+        carried forward to `until` (default today).
+        """
+        resolution = PriceRollupService.resolve_resolution(days, resolution, max_points)
+        end = until or datetime.utcnow().date()
+        cutoff = end - timedelta(days=days)
+
+        columns = (PortfolioValueDaily.day, PortfolioValueDaily.total_value, PortfolioValueDaily.priced_cards)
+        daily = [tuple(row) for row in db.execute(
+            select(*columns)
+            .where(PortfolioValueDaily.day >= cutoff, PortfolioValueDaily.day <= end)
+            .order_by(PortfolioValueDaily.day)
+        )]
+        # No snapshot since the last day (or in the window at all): carry forward
+        last = daily[-1] if daily else db.execute(
+            select(*columns).where(PortfolioValueDaily.day < cutoff).order_by(PortfolioValueDaily.day.desc()).limit(1)
+        ).first()
+        if last is not None and last[0] < end:
+            daily += [
+                (day["day"], last[1], last[2])
+                for day in PortfolioValueService._days(max(last[0] + timedelta(days=1), cutoff), end, 0.0, 0)
+            ]
+
+        points: List[Dict] = []
+        for day, total, priced in daily:
+            total = round(total, 2)
+            start = day if resolution == "day" else PriceRollupService._period_start(day, resolution)
+            if points and points[-1]["date"] == start:
+                point = points[-1]
+                point["high"] = max(point["high"], total)
+                point["low"] = min(point["low"], total)
+                point["close"] = total
+                point["priced_cards"] = priced
+                point["samples"] += 1
+            else:
+                points.append({"date": start, "open": total, "high": total, "low": total, "close": total,
+                               "samples": 1, "priced_cards": priced})
+
+        downsampled = False
+        if max_points and len(points) > max_points:
+            points = PriceRollupService._lttb(points, max_points)
+            downsampled = True
+
+        return {"days": days, "resolution": resolution, "downsampled": downsampled, "points": points}
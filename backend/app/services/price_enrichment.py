@@ -0,0 +1,296 @@
+import contextvars
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.config import SessionLocal
+from app.models.card import Card
+from app.models.price_job import FINAL_STATUSES, PriceJob
+from app.services.identity_service import CardIdentityService
+from app.services.log import get_logger
+from app.services.price_service import PriceFetchError, PriceService
+
+log = get_logger(__name__)
+
+
+class PriceEnrichmentQueue:
+    """
+    Prices newly created cards in the background.
+
+    create_card commits the card together with a price_jobs row and returns
+    straight away. Workers in every API process claim pending jobs with a
+    lease (conditional UPDATE, as in SnapshotScheduler), fetch prices on a
+    thread pool - one request per distinct name/set, however many jobs share
+    it - and write them back to the cards. Jobs survive restarts; a lease
+    left behind by a dead process expires and the job is picked up again.
+    """
+
+    ENABLED = os.getenv("PRICE_QUEUE_ENABLED", "true").lower() in ("1", "true", "yes")
+    WORKERS = int(os.getenv("PRICE_QUEUE_WORKERS", "8"))
+    BATCH_SIZE = int(os.getenv("PRICE_QUEUE_BATCH_SIZE", "32"))
+    LEASE_SECONDS = int(os.getenv("PRICE_QUEUE_LEASE_SECONDS", "300"))
+    POLL_SECONDS = float(os.getenv("PRICE_QUEUE_POLL_SECONDS", "2"))
+    MAX_ATTEMPTS = int(os.getenv("PRICE_QUEUE_MAX_ATTEMPTS", "3"))
+    RETRY_SECONDS = int(os.getenv("PRICE_QUEUE_RETRY_SECONDS", "30"))
+
+    def __init__(self, session_factory=SessionLocal, workers: Optional[int] = None):
+        self.session_factory = session_factory
+        self.workers = max(1, workers or self.WORKERS)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- producing ---------------------------------------------------------
+
+    @staticmethod
+    def enqueue(db: Session, card: Card) -> PriceJob:
+        """Add a job for `card` to the session (committed with the card)"""
+        name_key, set_key = CardIdentityService.key(card.card_name, card.set_name)
+        job = PriceJob(
+            card_id=card.id,
+            name_key=name_key,
+            set_key=set_key,
+            status="pending",
+            attempts=0,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        return job
+
+    def notify(self) -> None:
+        """Wake this process's worker now instead of at the next poll"""
+        self._wake.set()
+
+    # --- claiming ----------------------------------------------------------
+
+    def _claimable(self, now: datetime):
+        return (
+            ((PriceJob.status == "pending") & (PriceJob.run_after <= now))
+            | ((PriceJob.status == "running") & (PriceJob.lease_expires_at < now))
+        )
+
+    def _claim(self, db: Session) -> List[PriceJob]:
+        """
+        Lease up to BATCH_SIZE jobs, plus every other claimable job with the
+        same name/set so duplicates are answered by the same request
+        """
+        now = datetime.utcnow()
+        claimable = self._claimable(now)
+        first = db.execute(
+            select(PriceJob.id, PriceJob.name_key, PriceJob.set_key)
+            .where(claimable)
+            .order_by(PriceJob.id)
+            .limit(self.BATCH_SIZE)
+        ).all()
+        if not first:
+            return []
+
+        keys = {(row.name_key, row.set_key) for row in first}
+        duplicates = db.execute(
+            select(PriceJob.id, PriceJob.name_key, PriceJob.set_key)
+            .where(claimable, PriceJob.name_key.in_({name for name, _ in keys}))
+        ).all()
+        ids = {row.id for row in first} | {row.id for row in duplicates if (row.name_key, row.set_key) in keys}
+
+        # Compare-and-set: a job another process claimed meanwhile no longer matches
+        db.execute(
+            update(PriceJob)
+            .where(PriceJob.id.in_(ids), claimable)
+            .values(
+                status="running",
+                lease_owner=self.owner,
+                lease_expires_at=now + timedelta(seconds=self.LEASE_SECONDS),
+                attempts=PriceJob.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        return db.execute(
+            select(PriceJob).where(
+                PriceJob.id.in_(ids), PriceJob.status == "running", PriceJob.lease_owner == self.owner
+            )
+        ).scalars().all()
+
+    # --- working -----------------------------------------------------------
+
+    def _fetch(self, card_name: str, set_name: Optional[str], tcg_id: Optional[str]) -> Optional[Dict]:
+        # API failures raise (and the jobs are retried); None is a real "no price"
+        return PriceService.fetch_card_price(card_name, set_name, tcg_id=tcg_id, raise_errors=True)
+
+    def _finish(self, db: Session, jobs: List[PriceJob], cards: Dict[int, tuple],
+                price_data: Optional[Dict]) -> None:
+        """Write one group's result to its cards and jobs"""
+        now = datetime.utcnow()
+        if price_data:
+            values = [{
+                "id": job.card_id,
+                "market_price": price_data.get("market_price"),
+                "low_price": price_data.get("low_price"),
+                "high_price": price_data.get("high_price"),
+                "last_price_update": price_data.get("last_price_update"),
+                "tcg_id": price_data.get("tcg_id") or cards[job.card_id].tcg_id,
+            } for job in jobs if job.card_id in cards]
+            if values:
+                db.execute(update(Card), values)
+            if price_data.get("tcg_id") and values:
+                card = cards[values[0]["id"]]
+                CardIdentityService.remember(db, card.card_name, card.set_name, tcg_id=price_data["tcg_id"])
+
+        db.execute(
+            update(PriceJob)
+            .where(PriceJob.id.in_([job.id for job in jobs]), PriceJob.lease_owner == self.owner)
+            .values(
+                status="done" if price_data else "unpriced",
+                market_price=price_data.get("market_price") if price_data else None,
+                lease_owner=None,
+                lease_expires_at=None,
+                finished_at=now
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def _fail(self, db: Session, jobs: List[PriceJob], error: str) -> None:
+        """Retry later with backoff, or give up after MAX_ATTEMPTS"""
+        now = datetime.utcnow()
+        for job in jobs:
+            final = job.attempts >= self.MAX_ATTEMPTS
+            db.execute(
+                update(PriceJob)
+                .where(PriceJob.id == job.id, PriceJob.lease_owner == self.owner)
+                .values(
+                    status="failed" if final else "pending",
+                    error=error[:500],
+                    run_after=now + timedelta(seconds=self.RETRY_SECONDS * job.attempts),
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    finished_at=now if final else None
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    def run_once(self, executor: ThreadPoolExecutor) -> int:
+        """Claim and process one batch; returns how many jobs it held"""
+        db = self.session_factory()
+        try:
+            jobs = self._claim(db)
+            if not jobs:
+                return 0
+
+            cards = {
+                row.id: row for row in db.execute(
+                    select(Card.id, Card.card_name, Card.set_name, Card.tcg_id)
+                    .where(Card.id.in_({job.card_id for job in jobs}))
+                ).all()
+            }
+            groups: Dict[Tuple[str, str], List[PriceJob]] = {}
+            for job in jobs:
+                groups.setdefault((job.name_key, job.set_key), []).append(job)
+
+            # Ids resolved for these name/sets before (say, by a deleted card);
+            # looked up here since the worker threads don't touch the database
+            known = CardIdentityService.get_many(db, [
+                (card.card_name, card.set_name) for card in cards.values() if not card.tcg_id
+            ])
+
+            futures = {}
+            for key, group in groups.items():
+                present = [cards[job.card_id] for job in group if job.card_id in cards]
+                if not present:
+                    # Cards deleted before we got to them
+                    self._finish(db, group, cards, None)
+                    db.commit()
+                    continue
+                card = next((card for card in present if card.tcg_id), present[0])
+                tcg_id = card.tcg_id or (known.get(key) or {}).get("tcg_id")
+                futures[key] = executor.submit(
+                    contextvars.copy_context().run, self._fetch, card.card_name, card.set_name, tcg_id
+                )
+
+            for key, future in futures.items():
+                try:
+                    self._finish(db, groups[key], cards, future.result())
+                except PriceFetchError as e:
+                    log.warning("price lookup failed, will retry", name_key=key[0], set_key=key[1], error=str(e))
+                    db.rollback()
+                    self._fail(db, groups[key], str(e))
+                except Exception as e:
+                    log.exception("price job failed", name_key=key[0], set_key=key[1])
+                    db.rollback()
+                    self._fail(db, groups[key], str(e))
+                db.commit()
+
+            log.info("price jobs processed", jobs=len(jobs), requests=len(futures))
+            return len(jobs)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="price-job") as executor:
+            while not self._stop.is_set():
+                try:
+                    processed = self.run_once(executor)
+                except Exception:
+                    log.exception("price queue error")
+                    processed = 0
+                if not processed:
+                    self._wake.wait(self.POLL_SECONDS)
+                    self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="price-queue", daemon=True)
+        self._thread.start()
+        log.info("price queue started", owner=self.owner, workers=self.workers)
+
+    def stop(self, timeout: float = 30) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    # --- status ------------------------------------------------------------
+
+    @staticmethod
+    async def status_async(db: AsyncSession, card_id: int) -> Optional[Dict]:
+        """The card's latest price job and current prices (what clients poll for); None if no card"""
+        card = (await db.execute(
+            select(Card.market_price, Card.low_price, Card.high_price, Card.last_price_update)
+            .where(Card.id == card_id)
+        )).first()
+        if card is None:
+            return None
+        job = (await db.execute(
+            select(PriceJob.id, PriceJob.status, PriceJob.attempts, PriceJob.error)
+            .where(PriceJob.card_id == card_id)
+            .order_by(PriceJob.id.desc())
+            .limit(1)
+        )).first()
+
+        return {
+            "card_id": card_id,
+            "job_id": job.id if job else None,
+            "status": job.status if job else "none",
+            "final": job is None or job.status in FINAL_STATUSES,
+            "attempts": job.attempts if job else 0,
+            "error": job.error if job else None,
+            "market_price": card.market_price,
+            "low_price": card.low_price,
+            "high_price": card.high_price,
+            "last_price_update": card.last_price_update,
+        }
+
+
+# The process-wide queue worker (started from app startup when enabled)
+price_queue = PriceEnrichmentQueue()
@@ -1,12 +1,26 @@
-import requests
 from typing import Optional, Dict
 from datetime import datetime
 import os
 
+from app.services.cache import TTLCache, make_backend
+from app.services.http_client import get_async_client
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
 class PriceHistoryService:
     """Service to fetch historical price data from PokemonPriceTracker API"""
     
-    BASE_URL = "https://www.pokemonpricetracker.com/api/v2"
+    BASE_URL = os.getenv("POKEMON_PRICE_TRACKER_API_URL", "https://www.pokemonpricetracker.com/api/v2")
+    TIMEOUT = 20
+    
+    # Upstream data changes about once a day
+    cache = TTLCache(
+        "price_history",
+        make_backend("PRICE_HISTORY"),
+        ttl=float(os.getenv("PRICE_HISTORY_CACHE_TTL", "21600")),
+        stale_ttl=float(os.getenv("PRICE_HISTORY_CACHE_STALE_TTL", "86400"))
+    )
     
     @staticmethod
     def get_api_key() -> str:
@@ -14,72 +28,121 @@ class PriceHistoryService:
         return os.getenv('POKEMON_PRICE_TRACKER_API_KEY', '')
     
     @staticmethod
-    def get_price_history(card_name: str, set_name: str = None, days: int = 90) -> Optional[Dict]:
+    def _build_params(card_name: str, set_name: str = None, days: int = 90,
+                      tcgplayer_id: Optional[str] = None) -> Dict:
+        """Build search params - USE 'search' NOT 'name'"""
+        if tcgplayer_id:
+            # Direct lookup, no fuzzy matching
+            return {'tcgPlayerId': tcgplayer_id, 'includeHistory': 'true', 'days': days}
+
+        params = {
+            'search': card_name,  # ✅ FIXED
+            'limit': 1,
+            'includeHistory': 'true',
+            'days': days
+        }
+        
+        if set_name and set_name != "Unknown":
+            params['setName'] = set_name  # Also use setName not set
+        
+        return params
+    
+    @staticmethod
+    def _parse_response(card_name: str, response) -> Optional[Dict]:
+        """Turn an API response into our price history dict"""
+        if response.status_code != 200:
+            log.warning("price history API error", status=response.status_code, body=response.text[:500])
+            return None
+        
+        data = response.json()
+        
+        if not data.get('data') or len(data['data']) == 0:
+            log.info("price history: no cards found", card_name=card_name)
+            return None
+        
+        card_data = data['data'][0]
+        
+        # Extract price history
+        price_history = card_data.get('priceHistory', {})
+        
+        if not price_history:
+            log.info("price history: none in response", card_name=card_name, fields=list(card_data.keys()))
+            return None
+        
+        log.debug("price history fetched", card_name=card_name, points=len(price_history))
+        
+        return {
+            'card_id': card_data.get('tcgPlayerId') or card_data.get('id'),
+            'tcgplayer_id': card_data.get('tcgPlayerId'),
+            'card_name': card_data.get('name'),
+            'set_name': card_data.get('setName'),
+            'current_price': card_data.get('prices', {}).get('market'),
+            'price_history': price_history,
+            'last_updated': datetime.utcnow()
+        }
+    
+    @staticmethod
+    def _cache_key(card_name: str, set_name: Optional[str], days: int, tcgplayer_id: Optional[str]) -> str:
+        if tcgplayer_id:
+            return f"tcg:{tcgplayer_id}|{days}"
+        return f"{card_name}|{set_name or ''}|{days}"
+
+    @staticmethod
+    def _is_unknown_id(response) -> bool:
+        """True if a by-id request says the id doesn't exist (any more)"""
+        if response.status_code == 404:
+            return True
+        return response.status_code == 200 and not response.json().get('data')
+
+    @staticmethod
+    async def get_price_history_async(card_name: str, set_name: str = None, days: int = 90,
+                                      force_refresh: bool = False,
+                                      tcgplayer_id: Optional[str] = None) -> Optional[Dict]:
         """
         Get price history for a card (up to 7 days on free tier)
+
+        Served from the TTL cache when possible; concurrent misses for the
+        same card share a single upstream request. Looked up by tcgPlayerId
+        when the caller knows it (see CardIdentityService), else searched;
+        the result's tcgplayer_id is what it resolved to. No database access:
+        a cached load can outlive the request that started it.
+        """
+        return await PriceHistoryService.cache.get_or_load_async(
+            PriceHistoryService._cache_key(card_name, set_name, days, tcgplayer_id),
+            lambda: PriceHistoryService._fetch_price_history_async(card_name, set_name, days, tcgplayer_id),
+            force_refresh=force_refresh
+        )
+    
+    @staticmethod
+    async def _fetch_price_history_async(card_name: str, set_name: str = None, days: int = 90,
+                                         tcgplayer_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Fetch price history from the API without blocking (bypasses the cache)
         """
         try:
             api_key = PriceHistoryService.get_api_key()
             if not api_key:
-                print("ERROR: No PokemonPriceTracker API key found")
+                log.error("no PokemonPriceTracker API key configured")
                 return None
             
-            # Build search params - USE 'search' NOT 'name'
-            params = {
-                'search': card_name,  # ✅ FIXED
-                'limit': 1,
-                'includeHistory': 'true'
-            }
-            
-            if set_name and set_name != "Unknown":
-                params['setName'] = set_name  # Also use setName not set
-            
-            print(f"DEBUG: Request params: {params}")
+            params = PriceHistoryService._build_params(card_name, set_name, days, tcgplayer_id)
+            log.debug("price history request", params=params)
             
-            response = requests.get(
+            response = await get_async_client(PriceHistoryService.BASE_URL).get(
                 f"{PriceHistoryService.BASE_URL}/cards",
                 headers={'Authorization': f'Bearer {api_key}'},
                 params=params,
-                timeout=20
+                timeout=PriceHistoryService.TIMEOUT
             )
-            
-            print(f"DEBUG: Response Status: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"API Error {response.status_code}: {response.text}")
-                return None
-            
-            data = response.json()
-            
-            if not data.get('data') or len(data['data']) == 0:
-                print(f"No cards found for: {card_name}")
-                return None
-            
-            card_data = data['data'][0]
-            print(f"✓ Found card: {card_data.get('name')}")
-            
-            # Extract price history
-            price_history = card_data.get('priceHistory', {})
-            
-            if not price_history:
-                print(f"No price history (fields: {list(card_data.keys())})")
-                return None
-            
-            print(f"✓ Got {len(price_history)} days of price history!")
-            
-            return {
-                'card_id': card_data.get('tcgPlayerId') or card_data.get('id'),
-                'card_name': card_data.get('name'),
-                'set_name': card_data.get('setName'),
-                'current_price': card_data.get('prices', {}).get('market'),
-                'price_history': price_history,
-                'last_updated': datetime.utcnow()
-            }
+
+            if tcgplayer_id and PriceHistoryService._is_unknown_id(response):
+                log.info("tcgPlayerId not found, searching again", card_name=card_name, tcgplayer_id=tcgplayer_id)
+                return await PriceHistoryService._fetch_price_history_async(card_name, set_name, days)
+
+            return PriceHistoryService._parse_response(card_name, response)
             
         except Exception as e:
-            print(f"Error fetching price history: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("error fetching price history", card_name=card_name)
             return None
     
     @staticmethod
@@ -133,5 +196,5 @@ class PriceHistoryService:
             }
             
         except Exception as e:
-            print(f"Error analyzing trend: {e}")
+            log.exception("error analyzing trend")
             return {}
\ No newline at end of file
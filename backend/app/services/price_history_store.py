@@ -0,0 +1,154 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.services.identity_service import CardIdentityService
+from app.services.log import get_logger
+from app.services.price_history_service import PriceHistoryService
+from app.services.price_history_writer import daily_row, upsert_daily_rows_async
+
+log = get_logger(__name__)
+
+
+class PriceHistoryStore:
+    """
+    Keeps upstream (PokemonPriceTracker) price history in our price_history table.
+
+    The first request for a card downloads the full window; after that only
+    the days newer than the latest stored upstream row are fetched and merged.
+    """
+
+    SOURCE = "upstream"
+
+    @staticmethod
+    def _parse_date(value) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        # Store one row per calendar day
+        return datetime(parsed.year, parsed.month, parsed.day)
+
+    @staticmethod
+    def _latest_date_statement(card_id: int):
+        return select(func.max(PriceHistory.snapshot_date)).where(
+            PriceHistory.card_id == card_id,
+            PriceHistory.source == PriceHistoryStore.SOURCE
+        )
+
+    @staticmethod
+    def _missing_days(latest: Optional[datetime], days: int) -> Optional[int]:
+        """How many days to request upstream (None = we're up to date)"""
+        today = datetime.utcnow().date()
+        if latest is None:
+            return days
+        if latest.date() >= today - timedelta(days=1):
+            return None
+        return min(days, (today - latest.date()).days + 1)
+
+    @staticmethod
+    def _new_rows(card_id: int, price_history: Dict, after: Optional[datetime]) -> List[Dict]:
+        """Upstream history points newer than `after` as price_history rows"""
+        rows = []
+        for condition, condition_data in (price_history.get("conditions") or {}).items():
+            for entry in condition_data.get("history", []):
+                day = PriceHistoryStore._parse_date(entry.get("date"))
+                if day is None or entry.get("market") is None:
+                    continue
+                if after is not None and day <= after.replace(tzinfo=None):
+                    continue
+                rows.append(daily_row(
+                    card_id,
+                    market_price=entry.get("market"),
+                    low_price=entry.get("low"),
+                    high_price=entry.get("high"),
+                    snapshot_date=day,
+                    condition=condition,
+                    source=PriceHistoryStore.SOURCE
+                ))
+        return rows
+
+    @staticmethod
+    def _load_statement(card_id: int, days: int):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        return select(
+            PriceHistory.condition,
+            PriceHistory.snapshot_date,
+            PriceHistory.market_price,
+            PriceHistory.low_price,
+            PriceHistory.high_price
+        ).where(
+            PriceHistory.card_id == card_id,
+            PriceHistory.source == PriceHistoryStore.SOURCE,
+            PriceHistory.snapshot_date >= cutoff
+        ).order_by(PriceHistory.snapshot_date.asc())
+
+    @staticmethod
+    def _build(card: Card, rows, last_updated) -> Optional[Dict]:
+        """Rebuild the upstream priceHistory shape from stored rows"""
+        conditions: Dict[str, List[Dict]] = defaultdict(list)
+        for condition, snapshot_date, market, low, high in rows:
+            conditions[condition].append({
+                "date": snapshot_date.date().isoformat(),
+                "market": market,
+                "low": low,
+                "high": high
+            })
+
+        if not conditions:
+            return None
+
+        return {
+            "card_id": card.id,
+            "card_name": card.card_name,
+            "set_name": card.set_name,
+            "price_history": {
+                "conditions": {name: {"history": history} for name, history in conditions.items()}
+            },
+            "last_updated": last_updated
+        }
+
+    @staticmethod
+    async def get_price_history_async(db: AsyncSession, card: Card, days: int = 90) -> Optional[Dict]:
+        """
+        Price history for a card, served from the database.
+
+        Only the missing tail (days after the newest stored row) is requested
+        from the API; if we already have yesterday's data no request is made.
+        """
+        latest = (await db.execute(PriceHistoryStore._latest_date_statement(card.id))).scalar()
+        last_updated = latest
+
+        missing_days = PriceHistoryStore._missing_days(latest, days)
+        if missing_days:
+            tcgplayer_id = card.tcgplayer_id
+            if not tcgplayer_id:
+                # Another card with the same name/set may have resolved it
+                identity = await CardIdentityService.get_async(db, card.card_name, card.set_name)
+                tcgplayer_id = identity["tcgplayer_id"] if identity else None
+            history_data = await PriceHistoryService.get_price_history_async(
+                card.card_name, card.set_name, missing_days, tcgplayer_id=tcgplayer_id
+            )
+
+            if history_data:
+                resolved = history_data.get("tcgplayer_id")
+                if resolved and resolved != card.tcgplayer_id:
+                    # Saved now: the upsert below only commits when there are new rows
+                    card.tcgplayer_id = resolved
+                    await CardIdentityService.remember_async(db, card.card_name, card.set_name,
+                                                             tcgplayer_id=resolved)
+                    await db.commit()
+                rows = PriceHistoryStore._new_rows(card.id, history_data.get("price_history") or {}, latest)
+                await upsert_daily_rows_async(db, rows)
+                log.info("stored price history points", card_id=card.id, rows=len(rows))
+                last_updated = history_data.get("last_updated")
+
+        rows = (await db.execute(PriceHistoryStore._load_statement(card.id, days))).all()
+        return PriceHistoryStore._build(card, rows, last_updated)
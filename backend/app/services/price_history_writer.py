@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.upsert import upsert_statements
+from app.models.price_history import DAILY_KEY, PriceHistory
+from app.services.alert_service import AlertService
+from app.services.portfolio_value_service import PortfolioValueService
+from app.services.price_rollup_service import PriceRollupService
+
+# Postgres hands out ids at INSERT but rows become visible at COMMIT, so a
+# writer can commit id N after an export already read max(id) > N. Writers
+# hold this advisory lock shared until they commit; an export takes it
+# exclusively before reading its watermark, which waits them out.
+EXPORT_LOCK_KEY = 7_304_121_411
+
+
+def export_lock(dialect_name: str, shared: bool = True):
+    """The statement taking EXPORT_LOCK_KEY for this transaction (None off Postgres)"""
+    if dialect_name != "postgresql":
+        return None  # SQLite writers are serialized anyway
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    return select(lock(EXPORT_LOCK_KEY))
+
+
+def daily_row(card_id: int, market_price: Optional[float], low_price: Optional[float] = None,
+              high_price: Optional[float] = None, snapshot_date: Optional[datetime] = None,
+              condition: str = "Near Mint", source: str = "snapshot") -> Dict:
+    """A price_history row as a dict, with its snapshot_day key filled in"""
+    snapshot_date = snapshot_date or datetime.utcnow()
+    return {
+        "card_id": card_id,
+        "market_price": market_price,
+        "low_price": low_price,
+        "high_price": high_price,
+        "snapshot_date": snapshot_date,
+        "snapshot_day": snapshot_date.date(),
+        "condition": condition,
+        "source": source,
+    }
+
+
+def upsert_daily_rows(db: Session, rows: List[Dict]) -> None:
+    """
+    Bulk INSERT ... ON CONFLICT on the (card, source, condition, day) key.
+    Rows already stored for the day are kept (first write of the day wins).
+    The weekly/monthly rollups covering the rows and the daily portfolio
+    value are refreshed, and price alerts checked, in the same transaction.
+    Commits.
+    """
+    if not rows:
+        return
+    lock = export_lock(db.bind.dialect.name)
+    if lock is not None:
+        db.execute(lock)
+    portfolio_before = PortfolioValueService.capture(db, rows)
+    for statement in upsert_statements(db.bind.dialect.name, PriceHistory, rows, DAILY_KEY):
+        db.execute(statement)
+    PriceRollupService.refresh(db, rows)
+    AlertService.evaluate(db, rows)
+    PortfolioValueService.apply(db, portfolio_before)
+    db.commit()
+
+
+async def upsert_daily_rows_async(db: AsyncSession, rows: List[Dict]) -> None:
+    """
+    Async variant of upsert_daily_rows, used for upstream history only
+    (which neither fires alerts nor counts towards the portfolio value)
+    """
+    if not rows:
+        return
+    lock = export_lock(db.bind.dialect.name)
+    if lock is not None:
+        await db.execute(lock)
+    for statement in upsert_statements(db.bind.dialect.name, PriceHistory, rows, DAILY_KEY):
+        await db.execute(statement)
+    await PriceRollupService.refresh_async(db, rows)
+    await db.commit()
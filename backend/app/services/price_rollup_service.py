@@ -0,0 +1,294 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database.upsert import upsert_statements
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import ROLLUP_KEY, PriceRollup
+
+PERIODS = ("week", "month")
+ROLLUP_COLUMNS = ["open", "high", "low", "close", "samples"]
+
+
+class PriceRollupService:
+    """
+    Weekly and monthly OHLC rollups of price_history, plus the chart reads
+    that pick a rollup (or downsample) so responses stay ~max_points long.
+
+    Rollups are refreshed from the daily rows whenever those are written
+    (see price_history_writer), so they never need a separate batch job.
+    """
+
+    DEFAULT_MAX_POINTS = 150
+    # Keep card_id IN (...) lists under SQLite's bound parameter limit
+    CARD_CHUNK_SIZE = 500
+
+    @staticmethod
+    def _period_start(day: date, period: str) -> date:
+        if period == "week":
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1)
+
+    @staticmethod
+    def _period_end(day: date, period: str) -> date:
+        """First day after the period containing `day`"""
+        start = PriceRollupService._period_start(day, period)
+        if period == "week":
+            return start + timedelta(days=7)
+        return (start + timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def _aggregate(rows: Iterable, targets: Optional[Set[Tuple[str, date]]] = None) -> List[Dict]:
+        """
+        OHLC of market_price per (card, source, condition, period).
+
+        `rows` are (card_id, source, condition, snapshot_day, market_price)
+        ordered by day; with `targets` only those (period, period_start)
+        buckets are returned.
+        """
+        buckets: "OrderedDict[tuple, Dict]" = OrderedDict()
+        for card_id, source, condition, day, market in rows:
+            if market is None or day is None:
+                continue
+            for period in PERIODS:
+                start = PriceRollupService._period_start(day, period)
+                if targets is not None and (period, start) not in targets:
+                    continue
+                key = (card_id, source, condition or "Near Mint", period, start)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = dict(zip(ROLLUP_KEY, key), open=market, high=market,
+                                        low=market, close=market, samples=1)
+                else:
+                    bucket["high"] = max(bucket["high"], market)
+                    bucket["low"] = min(bucket["low"], market)
+                    bucket["close"] = market
+                    bucket["samples"] += 1
+        return list(buckets.values())
+
+    @staticmethod
+    def _refresh_plan(rows: List[Dict]):
+        """
+        Which buckets a batch of written daily rows touches, and the
+        statements that load every daily row in those buckets
+        """
+        days = [row["snapshot_day"] for row in rows]
+        targets = {
+            (period, PriceRollupService._period_start(day, period))
+            for day in set(days) for period in PERIODS
+        }
+        window_start = min(start for _, start in targets)
+        window_end = max(PriceRollupService._period_end(max(days), period) for period in PERIODS)
+
+        card_ids = sorted({row["card_id"] for row in rows})
+        sources = sorted({row["source"] for row in rows})
+        statements = []
+        for chunk_start in range(0, len(card_ids), PriceRollupService.CARD_CHUNK_SIZE):
+            chunk = card_ids[chunk_start:chunk_start + PriceRollupService.CARD_CHUNK_SIZE]
+            statements.append(select(
+                PriceHistory.card_id,
+                PriceHistory.source,
+                PriceHistory.condition,
+                PriceHistory.snapshot_day,
+                PriceHistory.market_price
+            ).where(
+                PriceHistory.card_id.in_(chunk),
+                PriceHistory.source.in_(sources),
+                PriceHistory.snapshot_day >= window_start,
+                PriceHistory.snapshot_day < window_end
+            ).order_by(PriceHistory.snapshot_day))
+        return targets, statements
+
+    @staticmethod
+    def refresh(db: Session, rows: List[Dict]) -> None:
+        """Recompute the rollups containing the given daily rows (no commit)"""
+        if not rows:
+            return
+        targets, statements = PriceRollupService._refresh_plan(rows)
+        for statement in statements:
+            rollups = PriceRollupService._aggregate(db.execute(statement), targets)
+            for upsert in upsert_statements(
+                db.bind.dialect.name, PriceRollup, rollups, ROLLUP_KEY, ROLLUP_COLUMNS
+            ):
+                db.execute(upsert)
+
+    @staticmethod
+    async def refresh_async(db: AsyncSession, rows: List[Dict]) -> None:
+        """Async variant of refresh"""
+        if not rows:
+            return
+        targets, statements = PriceRollupService._refresh_plan(rows)
+        for statement in statements:
+            rollups = PriceRollupService._aggregate((await db.execute(statement)).all(), targets)
+            for upsert in upsert_statements(
+                db.bind.dialect.name, PriceRollup, rollups, ROLLUP_KEY, ROLLUP_COLUMNS
+            ):
+                await db.execute(upsert)
+
+    @staticmethod
+    def rebuild(conn) -> int:
+        """
+        Build every rollup from scratch (used once, when the table is new).
+        Streams price_history one card at a time.
+        """
+        result = conn.execution_options(yield_per=10000).execute(select(
+            PriceHistory.card_id,
+            PriceHistory.source,
+            PriceHistory.condition,
+            PriceHistory.snapshot_day,
+            PriceHistory.market_price
+        ).order_by(PriceHistory.card_id, PriceHistory.snapshot_day))
+
+        written = 0
+        card_rows: List = []
+
+        def write():
+            rollups = PriceRollupService._aggregate(card_rows)
+            for upsert in upsert_statements(
+                conn.dialect.name, PriceRollup, rollups, ROLLUP_KEY, ROLLUP_COLUMNS
+            ):
+                conn.execute(upsert)
+            return len(rollups)
+
+        for row in result:
+            if card_rows and row[0] != card_rows[-1][0]:
+                written += write()
+                card_rows = []
+            card_rows.append(tuple(row))
+        if card_rows:
+            written += write()
+        return written
+
+    @staticmethod
+    def _lttb(points: List[Dict], threshold: int) -> List[Dict]:
+        """
+        Largest-Triangle-Three-Buckets downsampling on the close price:
+        keeps the first and last points and, per bucket, the point that
+        best preserves the visual shape of the line
+        """
+        if threshold >= len(points) or threshold < 3:
+            return points
+
+        x = [point["date"].toordinal() for point in points]
+        y = [point["close"] for point in points]
+        sampled = [points[0]]
+        bucket_size = (len(points) - 2) / (threshold - 2)
+        a = 0
+
+        for i in range(threshold - 2):
+            start = int(i * bucket_size) + 1
+            end = int((i + 1) * bucket_size) + 1
+            # Average of the next bucket is the third triangle vertex
+            next_start = end
+            next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+            if next_start >= next_end:
+                next_start, next_end = len(points) - 1, len(points)
+            avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+            best, best_area = start, -1.0
+            for j in range(start, end):
+                area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+                if area > best_area:
+                    best, best_area = j, area
+            sampled.append(points[best])
+            a = best
+
+        sampled.append(points[-1])
+        return sampled
+
+    @staticmethod
+    def _pick_resolution(days: int, max_points: int) -> str:
+        """Finest resolution whose point count fits in max_points"""
+        if days <= max_points:
+            return "day"
+        if days / 7 <= max_points:
+            return "week"
+        return "month"
+
+    @staticmethod
+    def resolve_resolution(days: int, resolution: str = "auto", max_points: Optional[int] = None) -> str:
+        """The resolution get_series will use ("auto" resolved)"""
+        if resolution != "auto":
+            return resolution
+        return PriceRollupService._pick_resolution(days, max_points or PriceRollupService.DEFAULT_MAX_POINTS)
+
+    @staticmethod
+    def is_final(until: Optional[date], resolution: str) -> bool:
+        """
+        True if a series ending at `until` can no longer change: snapshots
+        are only written for today, so that's once the last day (or the
+        week/month rollup containing it) is in the past
+        """
+        if until is None:
+            return False
+        today = datetime.utcnow().date()
+        if resolution == "day":
+            return until < today
+        return PriceRollupService._period_end(until, resolution) <= today
+
+    @staticmethod
+    def get_series(db: Session, card_id: int, days: int = 90, resolution: str = "auto",
+                   max_points: Optional[int] = None, source: str = "snapshot",
+                   condition: str = "Near Mint", until: Optional[date] = None) -> Dict:
+        """
+        Chart series for a card: daily points or weekly/monthly rollups,
+        downsampled with LTTB if still longer than max_points. `until`
+        ends the window on an earlier day than today.
+        """
+        resolution = PriceRollupService.resolve_resolution(days, resolution, max_points)
+
+        cutoff = (until or datetime.utcnow().date()) - timedelta(days=days)
+
+        if resolution == "day":
+            statement = select(
+                PriceHistory.snapshot_day, PriceHistory.market_price
+            ).where(
+                PriceHistory.card_id == card_id,
+                PriceHistory.source == source,
+                PriceHistory.condition == condition,
+                PriceHistory.snapshot_day >= cutoff,
+                PriceHistory.market_price.isnot(None)
+            )
+            if until:
+                statement = statement.where(PriceHistory.snapshot_day <= until)
+            rows = db.execute(statement.order_by(PriceHistory.snapshot_day)).all()
+            points = [
+                {"date": day, "open": price, "high": price, "low": price, "close": price, "samples": 1}
+                for day, price in rows
+            ]
+        else:
+            statement = select(
+                PriceRollup.period_start, PriceRollup.open, PriceRollup.high,
+                PriceRollup.low, PriceRollup.close, PriceRollup.samples
+            ).where(
+                PriceRollup.card_id == card_id,
+                PriceRollup.source == source,
+                PriceRollup.condition == condition,
+                PriceRollup.period == resolution,
+                PriceRollup.period_start >= PriceRollupService._period_start(cutoff, resolution)
+            )
+            if until:
+                statement = statement.where(PriceRollup.period_start <= until)
+            rows = db.execute(statement.order_by(PriceRollup.period_start)).all()
+            points = [
+                {"date": start, "open": o, "high": h, "low": l, "close": c, "samples": n}
+                for start, o, h, l, c, n in rows
+            ]
+
+        downsampled = False
+        if max_points and len(points) > max_points:
+            points = PriceRollupService._lttb(points, max_points)
+            downsampled = True
+
+        return {
+            "card_id": card_id,
+            "days": days,
+            "resolution": resolution,
+            "downsampled": downsampled,
+            "points": points
+        }
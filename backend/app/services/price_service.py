@@ -1,83 +1,319 @@
-import requests
-from typing import Optional, Dict
+import asyncio
+import httpx
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
+import os
 import time
+from urllib.parse import urlparse
+
+from sqlalchemy.orm import Session
+
+from app.services import metrics
+from app.services.http_client import get_async_client, get_client
+from app.services.identity_service import CardIdentityService
+from app.services.log import get_logger
+
+log = get_logger(__name__)
+
+class PriceFetchError(Exception):
+    """The price API was unreachable or kept failing (not: no such card, or no prices)"""
 
 class PriceService:
     """Service to fetch Pokemon card prices from PokemonTCG.io API"""
-    
-    BASE_URL = "https://api.pokemontcg.io/v2"
-    
+
+    # Overridable so snapshot runs can be pointed at a local fake server
+    BASE_URL = os.getenv("POKEMONTCG_API_URL", "https://api.pokemontcg.io/v2")
+
+    MAX_RETRIES = 2
+    RETRY_DELAY = 2
+    TIMEOUT = 30
+
+    # Bulk lookups: names OR-ed into one query, and result paging
+    BULK_QUERY_SIZE = 25
+    BULK_PAGE_SIZE = 250
+    BULK_MAX_PAGES = 4
+
+    @staticmethod
+    def _build_params(card_name: str, set_name: str = None) -> Dict:
+        """Build the search query params"""
+        query = f'name:"{card_name}"'
+        if set_name and set_name != "Unknown":
+            query += f' set.name:"{set_name}"'
+        return {"q": query, "select": "id,name,set,tcgplayer"}
+
+    @staticmethod
+    def _lookup(card_name: str, set_name: Optional[str], tcg_id: Optional[str]) -> Tuple[str, Dict]:
+        """URL and params: by-id when the card's PokemonTCG.io id is known, else a search"""
+        if tcg_id:
+            return f"{PriceService.BASE_URL}/cards/{tcg_id}", {"select": "id,name,set,tcgplayer"}
+        return f"{PriceService.BASE_URL}/cards", PriceService._build_params(card_name, set_name)
+
+    @staticmethod
+    def _parse_response(card_name: str, data: Dict) -> Optional[Dict]:
+        """Pull TCGPlayer prices out of a search (list) or by-id (object) response"""
+        card = data.get("data")
+        if isinstance(card, list):
+            card = card[0] if card else None  # first matching card
+        if not card:
+            log.info("no cards found", card_name=card_name)
+            return None
+
+        price_data = PriceService._extract_prices(card)
+
+        if not price_data:
+            log.info("no price data available", card_name=card_name)
+            return None
+
+        return price_data
+
+    @staticmethod
+    def _extract_prices(card: Dict) -> Optional[Dict]:
+        """TCGPlayer prices for one API card object"""
+        tcgplayer = card.get("tcgplayer", {})
+        prices = tcgplayer.get("prices", {})
+
+        # Try different price categories
+        price_data = None
+        for category in ["holofoil", "normal", "reverseHolofoil", "1stEditionHolofoil"]:
+            if category in prices:
+                price_data = prices[category]
+                break
+
+        if not price_data:
+            return None
+
+        return {
+            "tcg_id": card.get("id"),
+            "market_price": price_data.get("market"),
+            "low_price": price_data.get("low"),
+            "high_price": price_data.get("high"),
+            "last_price_update": datetime.utcnow()
+        }
+
+    @staticmethod
+    def _retry(attempt: int, max_retries: int) -> bool:
+        """Count a retry in /metrics; False when attempts are used up"""
+        if attempt >= max_retries - 1:
+            return False
+        metrics.count_retry(urlparse(PriceService.BASE_URL).netloc)
+        return True
+
+    @staticmethod
+    def _give_up(raise_errors: bool, error: str) -> None:
+        if raise_errors:
+            raise PriceFetchError(error)
+        return None
+
     @staticmethod
-    def fetch_card_price(card_name: str, set_name: str = None) -> Optional[Dict]:
+    def fetch_card_price(card_name: str, set_name: str = None, tcg_id: Optional[str] = None,
+                         raise_errors: bool = False) -> Optional[Dict]:
         """
         Fetch price data for a Pokemon card with retry logic
+
+        Goes straight to /cards/{id} when the card's id is known (the card's
+        own, or one CardIdentityService remembered), otherwise searches by
+        name/set. The result's tcg_id is the id it resolved to, for the
+        caller to store. No database access: this runs on worker threads.
+
+        None means the card or its prices weren't found - or, unless
+        raise_errors is set, that the API failed (then PriceFetchError).
         """
-        max_retries = 2
-        
+        max_retries = PriceService.MAX_RETRIES
+        client = get_client(PriceService.BASE_URL)
+        url, params = PriceService._lookup(card_name, set_name, tcg_id)
+
         for attempt in range(max_retries):
             try:
-                # Build search query
-                query = f'name:"{card_name}"'
-                if set_name and set_name != "Unknown":
-                    query += f' set.name:"{set_name}"'
-                
-                # Make API request with longer timeout
-                response = requests.get(
+                # Make API request over the shared keep-alive pool
+                response = client.get(url, params=params, timeout=PriceService.TIMEOUT)
+
+                if response.status_code == 404 and tcg_id:
+                    # Stale id - fall back to a search
+                    log.info("card id not found, searching again", card_name=card_name, tcg_id=tcg_id)
+                    return PriceService.fetch_card_price(card_name, set_name, raise_errors=raise_errors)
+
+                if response.status_code != 200:
+                    log.warning("price API error", status=response.status_code, card_name=card_name,
+                                attempt=attempt + 1)
+                    if PriceService._retry(attempt, max_retries):
+                        time.sleep(PriceService.RETRY_DELAY)
+                        continue
+                    return PriceService._give_up(raise_errors, f"HTTP {response.status_code}")
+
+                return PriceService._parse_response(card_name, response.json())
+
+            except httpx.TimeoutException:
+                log.warning("timeout fetching price", card_name=card_name, attempt=attempt + 1,
+                            max_retries=max_retries)
+                if PriceService._retry(attempt, max_retries):
+                    time.sleep(PriceService.RETRY_DELAY)
+                    continue
+                return PriceService._give_up(raise_errors, "timeout")
+            except httpx.HTTPError as e:
+                log.warning("network error fetching price", card_name=card_name, error=str(e))
+                return PriceService._give_up(raise_errors, f"{type(e).__name__}: {e}")
+            except PriceFetchError:
+                raise
+            except Exception as e:
+                log.exception("error fetching price", card_name=card_name)
+                return PriceService._give_up(raise_errors, f"{type(e).__name__}: {e}")
+
+        return None
+
+    @staticmethod
+    def _get_with_retry(params: Dict) -> Optional[Dict]:
+        """GET /cards with the usual retry policy; returns the JSON body"""
+        max_retries = PriceService.MAX_RETRIES
+        client = get_client(PriceService.BASE_URL)
+
+        for attempt in range(max_retries):
+            try:
+                response = client.get(
                     f"{PriceService.BASE_URL}/cards",
-                    params={"q": query, "select": "id,name,set,tcgplayer"},
-                    timeout=30  # Increased from 10 to 30 seconds
+                    params=params,
+                    timeout=PriceService.TIMEOUT
                 )
-                
+                if response.status_code == 200:
+                    return response.json()
+                log.warning("price API error", status=response.status_code, attempt=attempt + 1)
+            except httpx.TimeoutException:
+                log.warning("timeout fetching prices", attempt=attempt + 1, max_retries=max_retries)
+            except httpx.HTTPError as e:
+                log.warning("network error fetching prices", error=str(e))
+                return None
+
+            if PriceService._retry(attempt, max_retries):
+                time.sleep(PriceService.RETRY_DELAY)
+
+        return None
+
+    @staticmethod
+    def _search_pages(query: str):
+        """Yield every card a bulk `q=` query matches, following pages"""
+        for page in range(1, PriceService.BULK_MAX_PAGES + 1):
+            data = PriceService._get_with_retry({
+                "q": query,
+                "select": "id,name,set,tcgplayer",
+                "page": page,
+                "pageSize": PriceService.BULK_PAGE_SIZE
+            })
+            if not data or not data.get("data"):
+                return
+
+            yield from data["data"]
+
+            total = data.get("totalCount", 0)
+            if page * PriceService.BULK_PAGE_SIZE >= total:
+                return
+            if page == PriceService.BULK_MAX_PAGES:
+                # Cards past the last page go unmatched (or unpriced)
+                log.warning("bulk price search truncated", total=total,
+                            fetched=page * PriceService.BULK_PAGE_SIZE, max_pages=PriceService.BULK_MAX_PAGES,
+                            query=query[:200])
+
+    @staticmethod
+    def fetch_card_prices_bulk(db: Session, cards: List[Tuple[str, Optional[str]]]) -> Dict[Tuple[str, str], Dict]:
+        """
+        Fetch prices for many cards with as few API requests as possible.
+
+        Cards whose id is already known are fetched by id, OR-combined into
+        one `q=` query per BULK_QUERY_SIZE ids. The rest are grouped by set
+        and their names OR-combined the same way; the ids those searches
+        resolve to are remembered for next time (in db's transaction, no
+        commit). Results are matched back by (name, set), case-insensitively.
+
+        Returns {(card_name.lower(), set_name.lower() or ""): price_data}
+        for every card that was found with prices.
+        """
+        identities = CardIdentityService.get_many(db, cards)
+
+        # Several name/set keys can share an id (set name spellings, say)
+        by_id: Dict[str, List[Tuple[str, str]]] = {}
+        by_set: Dict[str, set] = {}
+        for card_name, set_name in cards:
+            key = CardIdentityService.key(card_name, set_name)
+            identity = identities.get(key)
+            if identity and identity["tcg_id"]:
+                keys = by_id.setdefault(identity["tcg_id"], [])
+                if key not in keys:
+                    keys.append(key)
+            else:
+                set_key = set_name if set_name and set_name != "Unknown" else ""
+                by_set.setdefault(set_key, set()).add(card_name)
+
+        found: Dict[Tuple[str, str], Dict] = {}
+
+        ids = sorted(by_id)
+        for start in range(0, len(ids), PriceService.BULK_QUERY_SIZE):
+            chunk = ids[start:start + PriceService.BULK_QUERY_SIZE]
+            query = "(" + " OR ".join(f'id:"{tcg_id}"' for tcg_id in chunk) + ")"
+            for card in PriceService._search_pages(query):
+                price_data = PriceService._extract_prices(card)
+                if price_data:
+                    for key in by_id.get(card.get("id"), []):
+                        found[key] = price_data
+
+        resolved: Dict[Tuple[str, str], Dict] = {}
+        for set_name, names in by_set.items():
+            names = sorted(names)
+            for start in range(0, len(names), PriceService.BULK_QUERY_SIZE):
+                chunk = names[start:start + PriceService.BULK_QUERY_SIZE]
+                query = "(" + " OR ".join(f'name:"{name}"' for name in chunk) + ")"
+                if set_name:
+                    query += f' set.name:"{set_name}"'
+
+                for card in PriceService._search_pages(query):
+                    key = (card.get("name", "").lower(), set_name.lower())
+                    if key in resolved:
+                        continue  # first match wins, like fetch_card_price
+                    resolved[key] = {"tcg_id": card.get("id")}
+                    price_data = PriceService._extract_prices(card)
+                    if price_data:
+                        found[key] = price_data
+
+        CardIdentityService.remember_many(db, resolved)
+        return found
+
+    @staticmethod
+    async def fetch_card_price_async(card_name: str, set_name: str = None,
+                                     tcg_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Async variant of fetch_card_price (same retry logic, non-blocking)
+        """
+        max_retries = PriceService.MAX_RETRIES
+        client = get_async_client(PriceService.BASE_URL)
+        url, params = PriceService._lookup(card_name, set_name, tcg_id)
+
+        for attempt in range(max_retries):
+            try:
+                response = await client.get(url, params=params, timeout=PriceService.TIMEOUT)
+
+                if response.status_code == 404 and tcg_id:
+                    log.info("card id not found, searching again", card_name=card_name, tcg_id=tcg_id)
+                    return await PriceService.fetch_card_price_async(card_name, set_name)
+
                 if response.status_code != 200:
-                    print(f"API Error: {response.status_code}")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
+                    log.warning("price API error", status=response.status_code, card_name=card_name,
+                                attempt=attempt + 1)
+                    if PriceService._retry(attempt, max_retries):
+                        await asyncio.sleep(PriceService.RETRY_DELAY)
                         continue
                     return None
-                
-                data = response.json()
-                
-                if not data.get("data"):
-                    print(f"No cards found for: {card_name}")
-                    return None
-                
-                # Get the first matching card
-                card = data["data"][0]
-                
-                # Extract TCGPlayer prices
-                tcgplayer = card.get("tcgplayer", {})
-                prices = tcgplayer.get("prices", {})
-                
-                # Try different price categories
-                price_data = None
-                for category in ["holofoil", "normal", "reverseHolofoil", "1stEditionHolofoil"]:
-                    if category in prices:
-                        price_data = prices[category]
-                        break
-                
-                if not price_data:
-                    print(f"No price data available for: {card_name}")
-                    return None
-                
-                return {
-                    "market_price": price_data.get("market"),
-                    "low_price": price_data.get("low"),
-                    "high_price": price_data.get("high"),
-                    "last_price_update": datetime.utcnow()
-                }
-                
-            except requests.Timeout:
-                print(f"Timeout fetching price (attempt {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
+
+                return PriceService._parse_response(card_name, response.json())
+
+            except httpx.TimeoutException:
+                log.warning("timeout fetching price", card_name=card_name, attempt=attempt + 1,
+                            max_retries=max_retries)
+                if PriceService._retry(attempt, max_retries):
+                    await asyncio.sleep(PriceService.RETRY_DELAY)
                     continue
                 return None
-            except requests.RequestException as e:
-                print(f"Network error fetching price: {e}")
+            except httpx.HTTPError as e:
+                log.warning("network error fetching price", card_name=card_name, error=str(e))
                 return None
-            except Exception as e:
-                print(f"Error fetching price: {e}")
+            except Exception:
+                log.exception("error fetching price", card_name=card_name)
                 return None
-        
-        return None
\ No newline at end of file
+
+        return None
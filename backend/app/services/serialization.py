@@ -0,0 +1,34 @@
+from typing import Iterable, List, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+# Same datetime format pydantic emits for aware UTC values ("...Z")
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def schema_columns(schema: Type[BaseModel], model) -> List:
+    """The model's columns for each schema field, in the schema's field order"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_json(schema: Type[BaseModel], rows: Iterable) -> bytes:
+    """
+    Encode rows selected with schema_columns as the JSON list the schema
+    would produce. No per-row validation: only use it for our own DB rows.
+    """
+    keys = list(schema.model_fields)
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], option=ORJSON_OPTIONS)
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """
+    Pre-encoded JSON, keeping the headers the route set on its injected
+    `response` (returning a Response directly would drop them otherwise)
+    """
+    headers = {
+        key: value for key, value in response.headers.items()
+        if key not in ("content-length", "content-type")
+    }
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,215 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.services.identity_service import CardIdentityService
+from app.services.log import get_logger
+from app.services.price_history_writer import daily_row, upsert_daily_rows
+from app.services.price_service import PriceService
+
+log = get_logger(__name__)
+
+
+class HostRateLimiter:
+    """Thread-safe per-host rate limiter (evenly spaced request slots)"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> None:
+        """Block until the next request slot for this host is free"""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        # Sleep outside the lock so other hosts are not held up
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SnapshotEngine:
+    """
+    Captures price snapshots for many cards with bounded parallelism.
+
+    Upstream fetches run on a thread pool (limited by `concurrency` and a
+    per-host rate limit); all DB work stays on the calling thread, and new
+    snapshots are committed once per batch instead of once per card.
+    """
+
+    DEFAULT_CONCURRENCY = int(os.getenv("SNAPSHOT_CONCURRENCY", "8"))
+    DEFAULT_RATE_LIMIT = float(os.getenv("SNAPSHOT_RATE_LIMIT", "10"))  # requests/sec per host
+    DEFAULT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "100"))
+
+    def __init__(self, concurrency: Optional[int] = None, rate_limit: Optional[float] = None,
+                 batch_size: Optional[int] = None):
+        self.concurrency = max(1, concurrency or self.DEFAULT_CONCURRENCY)
+        self.batch_size = max(1, batch_size or self.DEFAULT_BATCH_SIZE)
+        self.rate_limiter = HostRateLimiter(
+            rate_limit if rate_limit is not None else self.DEFAULT_RATE_LIMIT
+        )
+        self.host = urlparse(PriceService.BASE_URL).netloc
+
+    def _fetch(self, card_name: str, set_name: Optional[str], tcg_id: Optional[str] = None) -> Dict:
+        """Fetch prices for one card (runs on a worker thread)"""
+        self.rate_limiter.acquire(self.host)
+        started = time.perf_counter()
+        price_data = PriceService.fetch_card_price(card_name, set_name, tcg_id=tcg_id)
+        return {"price_data": price_data, "latency": time.perf_counter() - started}
+
+    def _flush(self, db: Session, pending: List[Dict], pending_meta: List[Dict],
+               results: Dict, resolved_ids: List[Dict], identities: Dict) -> None:
+        """Write one batch of snapshots with a bulk upsert and commit"""
+        if not pending:
+            return
+
+        try:
+            # Newly resolved PokemonTCG.io ids go in the same transaction
+            if resolved_ids:
+                db.execute(update(Card), resolved_ids)
+            CardIdentityService.remember_many(db, identities)
+            upsert_daily_rows(db, pending)
+            results["successful"] += len(pending)
+            results["snapshots"].extend(pending_meta)
+            results["timing"]["batches_committed"] += 1
+        except Exception:
+            db.rollback()
+            log.exception("error committing snapshot batch", rows=len(pending))
+            results["failed"] += len(pending)
+
+        pending.clear()
+        pending_meta.clear()
+        resolved_ids.clear()
+        identities.clear()
+
+    def run(self, db: Session, cards: Optional[List] = None) -> Dict:
+        """
+        Capture price snapshots for ALL cards in the database, or just
+        `cards` (rows with id, card_name, set_name, tcg_id)
+        """
+        started = time.perf_counter()
+
+        # One query for every card that already has a snapshot today
+        existing_query = db.query(PriceHistory.card_id, PriceHistory.market_price).filter(
+            PriceHistory.snapshot_day == datetime.utcnow().date(),
+            PriceHistory.source == "snapshot"
+        )
+        if cards is None:
+            cards = db.query(Card.id, Card.card_name, Card.set_name, Card.tcg_id).all()
+        else:
+            existing_query = existing_query.filter(PriceHistory.card_id.in_([card.id for card in cards]))
+        existing = dict(existing_query.all())
+
+        results = {
+            "total_cards": len(cards),
+            "successful": 0,
+            "skipped": 0,
+            "failed": 0,
+            "snapshots": [],
+            "timing": {
+                "concurrency": self.concurrency,
+                "batches_committed": 0,
+            },
+        }
+
+        to_fetch = []
+        for card in cards:
+            if card.id in existing:
+                results["successful"] += 1
+                results["snapshots"].append({
+                    "card_id": card.id,
+                    "card_name": card.card_name,
+                    "price": existing[card.id]
+                })
+            else:
+                to_fetch.append(card)
+
+        latencies = []
+        pending: List[Dict] = []
+        pending_meta: List[Dict] = []
+        resolved_ids: List[Dict] = []
+        identities: Dict = {}
+
+        # Ids other cards with the same name/set resolved to, looked up here:
+        # the worker threads don't touch the database
+        known = CardIdentityService.get_many(db, [(card.card_name, card.set_name) for card in to_fetch if not card.tcg_id])
+
+        def tcg_id(card) -> Optional[str]:
+            return card.tcg_id or (known.get(CardIdentityService.key(card.card_name, card.set_name)) or {}).get("tcg_id")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # copy_context keeps the request id on worker-thread log lines
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run, self._fetch, card.card_name, card.set_name, tcg_id(card)
+                ): card
+                for card in to_fetch
+            }
+
+            for future in as_completed(futures):
+                card = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception:
+                    log.exception("error capturing snapshot", card_id=card.id)
+                    results["failed"] += 1
+                    continue
+
+                latencies.append(outcome["latency"])
+                price_data = outcome["price_data"]
+                if not price_data:
+                    log.info("no price data for snapshot", card_id=card.id)
+                    results["skipped"] += 1
+                    continue
+
+                pending.append(daily_row(
+                    card.id,
+                    market_price=price_data.get("market_price"),
+                    low_price=price_data.get("low_price"),
+                    high_price=price_data.get("high_price")
+                ))
+                pending_meta.append({
+                    "card_id": card.id,
+                    "card_name": card.card_name,
+                    "price": price_data.get("market_price")
+                })
+                if price_data.get("tcg_id") and price_data["tcg_id"] != card.tcg_id:
+                    resolved_ids.append({"id": card.id, "tcg_id": price_data["tcg_id"]})
+                    identities[CardIdentityService.key(card.card_name, card.set_name)] = {
+                        "tcg_id": price_data["tcg_id"]
+                    }
+
+                if len(pending) >= self.batch_size:
+                    self._flush(db, pending, pending_meta, results, resolved_ids, identities)
+
+        self._flush(db, pending, pending_meta, results, resolved_ids, identities)
+
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        results["timing"].update({
+            "elapsed_seconds": round(elapsed, 3),
+            "fetched": len(latencies),
+            "cards_per_second": round(len(cards) / elapsed, 2) if elapsed > 0 else None,
+            "fetch_latency_avg": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "fetch_latency_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None,
+            "fetch_latency_max": round(latencies[-1], 3) if latencies else None,
+        })
+
+        log.info("snapshot run finished", successful=results["successful"], skipped=results["skipped"],
+                 failed=results["failed"], cards=len(cards), seconds=round(elapsed, 3))
+        return results
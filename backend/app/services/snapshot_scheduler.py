@@ -0,0 +1,286 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.database.config import SessionLocal
+from app.database.upsert import upsert_statements
+from app.models.card import Card
+from app.models.snapshot_shard import SnapshotRun, SnapshotShard
+from app.services.log import get_logger
+from app.services.snapshot_engine import SnapshotEngine
+
+log = get_logger(__name__)
+
+
+class SnapshotScheduler:
+    """
+    Runs the daily snapshot job inside the API process.
+
+    Each day's card table is split into id-range shards (rows in
+    snapshot_shards). Every replica's scheduler claims shards through a
+    lease (a conditional UPDATE, so it works the same on SQLite and
+    Postgres), commits a checkpoint after each batch and renews the lease
+    with it. A replica that dies stops renewing; once its lease expires
+    another replica picks the shard up from the checkpoint. More replicas
+    means more shards in flight, not repeated work.
+    """
+
+    ENABLED = os.getenv("SNAPSHOT_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+    SHARDS = int(os.getenv("SNAPSHOT_SHARDS", "16"))
+    LEASE_SECONDS = int(os.getenv("SNAPSHOT_LEASE_SECONDS", "300"))
+    SCHEDULE_HOUR = int(os.getenv("SNAPSHOT_SCHEDULE_HOUR", "6"))  # UTC
+    POLL_SECONDS = float(os.getenv("SNAPSHOT_SCHEDULER_POLL_SECONDS", "60"))
+
+    def __init__(self, session_factory=SessionLocal, shards: Optional[int] = None,
+                 lease_seconds: Optional[int] = None, engine: Optional[SnapshotEngine] = None):
+        self.session_factory = session_factory
+        self.shards = max(1, shards or self.SHARDS)
+        self.lease_seconds = lease_seconds or self.LEASE_SECONDS
+        self.engine = engine or SnapshotEngine()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._finished_day: Optional[date] = None
+
+    # --- shards and leases -------------------------------------------------
+
+    def _ensure_shards(self, db: Session, day: date) -> int:
+        """
+        Create the day's run and shards if no replica has yet; returns the
+        day's shard count. The run row is inserted first: only the replica
+        whose insert lands creates shards, in the same transaction, so
+        replicas with different SNAPSHOT_SHARDS (or card counts) never mix
+        shard sets. On Postgres a concurrent insert waits for that commit.
+        """
+        existing = db.execute(select(SnapshotRun.shard_count).where(SnapshotRun.run_day == day)).scalar()
+        if existing is not None:
+            return existing
+
+        # Days started before snapshot_runs existed keep their shards
+        count = db.execute(
+            select(func.max(SnapshotShard.shard_count)).where(SnapshotShard.run_day == day)
+        ).scalar()
+        if count is None:
+            total = db.query(func.count(Card.id)).scalar() or 0
+            count = max(1, min(self.shards, total))
+        else:
+            total = None
+
+        (statement,) = upsert_statements(db.bind.dialect.name, SnapshotRun, [{
+            "run_day": day, "shard_count": count, "created_by": self.owner, "created_at": datetime.utcnow()
+        }], ["run_day"])
+        if not db.execute(statement).rowcount:
+            # Another replica created the run (and its shards) first
+            db.rollback()
+            return db.execute(select(SnapshotRun.shard_count).where(SnapshotRun.run_day == day)).scalar_one()
+
+        if total is not None:
+            # Boundaries at every total/count-th card id, so shards are even
+            bounds = [0]
+            for k in range(1, count):
+                bounds.append(db.execute(
+                    select(Card.id).order_by(Card.id).offset(k * total // count).limit(1)
+                ).scalar())
+            bounds.append(None)
+
+            db.execute(insert(SnapshotShard), [{
+                "run_day": day,
+                "shard_no": k,
+                "shard_count": count,
+                "id_from": bounds[k],
+                "id_to": bounds[k + 1],
+                "status": "pending",
+                "successful": 0,
+                "skipped": 0,
+                "failed": 0
+            } for k in range(count)])
+        db.commit()
+        log.info("snapshot run created", run_day=day, shard_count=count)
+        return count
+
+    def _claim(self, db: Session, day: date, shard_count: int) -> Optional[SnapshotShard]:
+        """Take the lease on the next unfinished, unleased shard of the day's run"""
+        now = datetime.utcnow()
+        claimable = (
+            (SnapshotShard.lease_owner.is_(None))
+            | (SnapshotShard.lease_expires_at < now)
+            | (SnapshotShard.lease_owner == self.owner)
+        )
+        candidates = db.execute(
+            select(SnapshotShard.id)
+            .where(SnapshotShard.run_day == day, SnapshotShard.shard_count == shard_count,
+                   SnapshotShard.status != "done", claimable)
+            .order_by(SnapshotShard.shard_no)
+        ).scalars().all()
+
+        for shard_id in candidates:
+            # Compare-and-set: only one replica's UPDATE can match
+            claimed = db.execute(
+                update(SnapshotShard)
+                .where(SnapshotShard.id == shard_id, SnapshotShard.status != "done", claimable)
+                .values(
+                    lease_owner=self.owner,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    status="running",
+                    started_at=func.coalesce(SnapshotShard.started_at, now)
+                )
+            ).rowcount
+            db.commit()
+            if claimed:
+                return db.get(SnapshotShard, shard_id)
+        return None
+
+    def _checkpoint(self, db: Session, shard: SnapshotShard, last_card_id: int,
+                    results: Dict, done: bool = False) -> bool:
+        """Record progress and renew the lease; False if the lease was lost"""
+        now = datetime.utcnow()
+        values = {
+            "checkpoint_card_id": last_card_id,
+            "successful": SnapshotShard.successful + results.get("successful", 0),
+            "skipped": SnapshotShard.skipped + results.get("skipped", 0),
+            "failed": SnapshotShard.failed + results.get("failed", 0),
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds)
+        }
+        if done:
+            values.update(status="done", finished_at=now, lease_owner=None, lease_expires_at=None)
+
+        renewed = db.execute(
+            update(SnapshotShard)
+            .where(SnapshotShard.id == shard.id, SnapshotShard.lease_owner == self.owner)
+            .values(**values)
+        ).rowcount
+        db.commit()
+        return bool(renewed)
+
+    def _release(self, db: Session, shard: SnapshotShard) -> None:
+        """Give a shard back early (shutdown), keeping its checkpoint"""
+        db.execute(
+            update(SnapshotShard)
+            .where(SnapshotShard.id == shard.id, SnapshotShard.lease_owner == self.owner)
+            .values(lease_owner=None, lease_expires_at=None, status="pending")
+        )
+        db.commit()
+
+    def _process(self, db: Session, shard: SnapshotShard) -> None:
+        """Snapshot a shard's cards in id order, one checkpoint per batch"""
+        last_id = shard.checkpoint_card_id
+        while True:
+            if self._stop.is_set():
+                self._release(db, shard)
+                return
+
+            statement = select(Card.id, Card.card_name, Card.set_name, Card.tcg_id).where(Card.id >= shard.id_from)
+            if shard.id_to is not None:
+                statement = statement.where(Card.id < shard.id_to)
+            if last_id is not None:
+                statement = statement.where(Card.id > last_id)
+            cards = db.execute(statement.order_by(Card.id).limit(self.engine.batch_size)).all()
+
+            if not cards:
+                self._checkpoint(db, shard, last_id, {}, done=True)
+                log.info("snapshot shard done", run_day=shard.run_day, shard=shard.shard_no,
+                         shard_count=shard.shard_count)
+                return
+
+            results = self.engine.run(db, cards)
+            last_id = cards[-1].id
+            if not self._checkpoint(db, shard, last_id, results):
+                log.warning("lost lease on snapshot shard", run_day=shard.run_day, shard=shard.shard_no)
+                return
+
+    # --- running -----------------------------------------------------------
+
+    def run(self, day: Optional[date] = None) -> Dict:
+        """
+        Work through the day's shards until none are left to claim.
+        Returns the day's status (including shards other replicas ran).
+        """
+        day = day or datetime.utcnow().date()
+        db = self.session_factory()
+        try:
+            shard_count = self._ensure_shards(db, day)
+            while not self._stop.is_set():
+                shard = self._claim(db, day, shard_count)
+                if shard is None:
+                    break
+                self._process(db, shard)
+            return self.status(db, day)
+        finally:
+            db.close()
+
+    def tick(self) -> None:
+        """One scheduler pass: run today's job if it's due and not finished"""
+        now = datetime.utcnow()
+        if now.hour < self.SCHEDULE_HOUR or self._finished_day == now.date():
+            return
+        status = self.run(now.date())
+        if status["status"] == "done":
+            self._finished_day = now.date()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                log.exception("snapshot scheduler error")
+            self._stop.wait(self.POLL_SECONDS)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="snapshot-scheduler", daemon=True)
+        self._thread.start()
+        log.info("snapshot scheduler started", owner=self.owner, shards=self.shards,
+                 schedule_hour_utc=self.SCHEDULE_HOUR)
+
+    def stop(self, timeout: float = 30) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @staticmethod
+    def status(db: Session, day: Optional[date] = None) -> Dict:
+        """Progress of a day's run across all replicas"""
+        day = day or datetime.utcnow().date()
+        shards = db.query(SnapshotShard).filter(SnapshotShard.run_day == day) \
+            .order_by(SnapshotShard.shard_no).all()
+
+        if not shards:
+            status = "not_started"
+        elif all(shard.status == "done" for shard in shards):
+            status = "done"
+        else:
+            status = "running"
+
+        return {
+            "run_day": day,
+            "status": status,
+            "shards_done": sum(1 for shard in shards if shard.status == "done"),
+            "shard_count": len(shards),
+            "successful": sum(shard.successful for shard in shards),
+            "skipped": sum(shard.skipped for shard in shards),
+            "failed": sum(shard.failed for shard in shards),
+            "shards": [{
+                "shard_no": shard.shard_no,
+                "status": shard.status,
+                "lease_owner": shard.lease_owner,
+                "lease_expires_at": shard.lease_expires_at,
+                "checkpoint_card_id": shard.checkpoint_card_id,
+                "successful": shard.successful,
+                "skipped": shard.skipped,
+                "failed": shard.failed,
+                "started_at": shard.started_at,
+                "finished_at": shard.finished_at
+            } for shard in shards]
+        }
+
+
+# The process-wide scheduler (started from app startup when enabled)
+scheduler = SnapshotScheduler()
@@ -1,13 +1,29 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models.card import Card
 from app.models.price_history import PriceHistory
+from app.services.identity_service import CardIdentityService
+from app.services.log import get_logger
+from app.services.price_history_writer import daily_row, upsert_daily_rows
 from app.services.price_service import PriceService
-from datetime import datetime, timedelta
-from typing import List, Dict
+from app.services.snapshot_engine import SnapshotEngine
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+log = get_logger(__name__)
 
 class SnapshotService:
     """Service to capture daily price snapshots"""
     
+    @staticmethod
+    def _get_daily(db: Session, card_id: int, day) -> Optional[PriceHistory]:
+        return db.query(PriceHistory).filter(
+            PriceHistory.card_id == card_id,
+            PriceHistory.source == "snapshot",
+            PriceHistory.condition == "Near Mint",
+            PriceHistory.snapshot_day == day
+        ).first()
+    
     @staticmethod
     def capture_snapshot(db: Session, card_id: int) -> PriceHistory:
         """
@@ -18,83 +34,99 @@ class SnapshotService:
         if not card:
             return None
         
-        # Check if we already have a snapshot today
+        # Check if we already have a snapshot today (an index lookup on the
+        # daily key - it saves the upstream call, the upsert below is what
+        # guarantees one row per day)
         today = datetime.utcnow().date()
-        existing = db.query(PriceHistory).filter(
-            PriceHistory.card_id == card_id,
-            PriceHistory.snapshot_date >= datetime.combine(today, datetime.min.time())
-        ).first()
+        existing = SnapshotService._get_daily(db, card_id, today)
         
         if existing:
-            print(f"Snapshot already exists for card {card_id} today")
+            log.debug("snapshot already exists today", card_id=card_id)
             return existing
         
         # Fetch current prices
-        price_data = PriceService.fetch_card_price(card.card_name, card.set_name)
+        tcg_id = card.tcg_id
+        if not tcg_id:
+            identity = CardIdentityService.get(db, card.card_name, card.set_name)
+            tcg_id = identity["tcg_id"] if identity else None
+        price_data = PriceService.fetch_card_price(card.card_name, card.set_name, tcg_id=tcg_id)
         
         if not price_data:
-            print(f"No price data for card {card_id}")
+            log.info("no price data for snapshot", card_id=card_id)
             return None
+        if price_data.get("tcg_id") and price_data["tcg_id"] != card.tcg_id:
+            card.tcg_id = price_data["tcg_id"]
+            CardIdentityService.remember(db, card.card_name, card.set_name, tcg_id=card.tcg_id)
         
-        # Create snapshot
-        snapshot = PriceHistory(
-            card_id=card_id,
+        # Create snapshot (a concurrent run may have beaten us to it)
+        upsert_daily_rows(db, [daily_row(
+            card_id,
             market_price=price_data.get("market_price"),
             low_price=price_data.get("low_price"),
-            high_price=price_data.get("high_price"),
-            condition="Near Mint"
-        )
-        
-        db.add(snapshot)
-        db.commit()
-        db.refresh(snapshot)
+            high_price=price_data.get("high_price")
+        )])
+        snapshot = SnapshotService._get_daily(db, card_id, today)
         
-        print(f"✓ Snapshot created for {card.card_name}: ${snapshot.market_price}")
+        log.info("snapshot created", card_id=card_id, market_price=snapshot.market_price)
         return snapshot
     
     @staticmethod
-    def capture_all_snapshots(db: Session) -> Dict:
+    def capture_all_snapshots(db: Session, concurrency: Optional[int] = None,
+                              rate_limit: Optional[float] = None,
+                              batch_size: Optional[int] = None) -> Dict:
         """
         Capture price snapshots for ALL cards in the database
+
+        Fetches run concurrently (see SnapshotEngine); snapshots are
+        committed in batches.
         """
-        cards = db.query(Card).all()
-        
-        results = {
-            "total_cards": len(cards),
-            "successful": 0,
-            "skipped": 0,
-            "failed": 0,
-            "snapshots": []
-        }
-        
-        for card in cards:
-            try:
-                snapshot = SnapshotService.capture_snapshot(db, card.id)
-                if snapshot:
-                    results["successful"] += 1
-                    results["snapshots"].append({
-                        "card_id": card.id,
-                        "card_name": card.card_name,
-                        "price": snapshot.market_price
-                    })
-                else:
-                    results["skipped"] += 1
-            except Exception as e:
-                print(f"Error capturing snapshot for card {card.id}: {e}")
-                results["failed"] += 1
-        
-        return results
+        engine = SnapshotEngine(
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            batch_size=batch_size
+        )
+        return engine.run(db)
     
     @staticmethod
-    def get_card_history(db: Session, card_id: int, days: int = 90) -> List[PriceHistory]:
+    def _history_filter(query, card_id: int, days: int, until: Optional[date] = None):
+        """The last N days, or the N days up to and including `until`"""
+        query = query.filter(PriceHistory.card_id == card_id, PriceHistory.source == "snapshot")
+        if until is None:
+            return query.filter(PriceHistory.snapshot_date >= datetime.utcnow() - timedelta(days=days))
+        return query.filter(
+            PriceHistory.snapshot_day >= until - timedelta(days=days),
+            PriceHistory.snapshot_day <= until
+        )
+
+    @staticmethod
+    def get_card_history(db: Session, card_id: int, days: int = 90,
+                         until: Optional[date] = None) -> List[PriceHistory]:
         """
-        Get price history for a card over the last N days
+        Get price history for a card over the last N days (or the N days up to `until`)
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        history = db.query(PriceHistory).filter(
-            PriceHistory.card_id == card_id,
-            PriceHistory.snapshot_date >= cutoff_date
+        history = SnapshotService._history_filter(
+            db.query(PriceHistory), card_id, days, until
         ).order_by(PriceHistory.snapshot_date.asc()).all()
         
-        return history
\ No newline at end of file
+        return history
+
+    @staticmethod
+    def get_card_history_rows(db: Session, columns: List, card_id: int, days: int = 90,
+                              until: Optional[date] = None) -> List[tuple]:
+        """get_card_history as plain column tuples, for the fast JSON path"""
+        return SnapshotService._history_filter(
+            db.query(*columns), card_id, days, until
+        ).order_by(PriceHistory.snapshot_date.asc()).all()
+
+    @staticmethod
+    def history_version(db: Session, card_id: int, days: int = 90,
+                        until: Optional[date] = None) -> Tuple[int, Optional[int], Optional[datetime]]:
+        """
+        (row count, max id, newest snapshot_date) of the window
+        get_card_history reads. Rows are only ever inserted, so this changes
+        whenever the window's contents do.
+        """
+        return tuple(SnapshotService._history_filter(
+            db.query(func.count(PriceHistory.id), func.max(PriceHistory.id), func.max(PriceHistory.snapshot_date)),
+            card_id, days, until
+        ).one())
\ No newline at end of file
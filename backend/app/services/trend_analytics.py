@@ -0,0 +1,213 @@
+import warnings
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+
+
+class TrendAnalyticsService:
+    """
+    Batch trend analytics for many cards at once.
+
+    Every (card, condition) series is laid out on a shared daily grid as one
+    row of a 2D NumPy array, so each metric is a single vectorized pass over
+    the whole portfolio instead of a Python loop per card.
+    """
+
+    CHANGE_WINDOWS = (1, 7, 30, 90)
+
+    @staticmethod
+    def _load_matrix(db: Session, days: int, card_ids: Optional[List[int]] = None,
+                     condition: Optional[str] = None, source: str = "snapshot"):
+        """
+        Load one source's market prices into a (series x days) matrix with
+        one query. Sources aren't mixed: our snapshots and upstream history
+        can differ on the same day.
+
+        Returns (keys, matrix) where keys[i] = (card_id, condition) and days
+        with no data are NaN.
+        """
+        start = datetime.utcnow().date() - timedelta(days=days - 1)
+
+        query = db.query(
+            PriceHistory.card_id,
+            PriceHistory.condition,
+            PriceHistory.snapshot_date,
+            PriceHistory.market_price
+        ).filter(
+            PriceHistory.source == source,
+            PriceHistory.snapshot_date >= datetime.combine(start, datetime.min.time()),
+            PriceHistory.market_price.isnot(None)
+        )
+        if card_ids:
+            query = query.filter(PriceHistory.card_id.in_(card_ids))
+        if condition:
+            query = query.filter(PriceHistory.condition == condition)
+
+        rows = query.order_by(PriceHistory.snapshot_date.asc()).all()
+        if not rows:
+            return [], np.empty((0, days))
+
+        card_col = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        conditions = np.array([r[1] or "Near Mint" for r in rows], dtype=object)
+        day_col = np.fromiter(
+            ((r[2].date() - start).days for r in rows), dtype=np.int64, count=len(rows)
+        )
+        price_col = np.fromiter((r[3] for r in rows), dtype=np.float64, count=len(rows))
+
+        # Map each (card, condition) pair to a matrix row
+        # (card ids are numeric, so splitting on the first "|" is unambiguous)
+        pair_labels = np.char.add(np.char.add(card_col.astype(str), "|"), conditions.astype(str))
+        unique_pairs, series_idx = np.unique(pair_labels, return_inverse=True)
+        keys = []
+        for label in unique_pairs:
+            card_id, cond = label.split("|", 1)
+            keys.append((int(card_id), cond))
+
+        matrix = np.full((len(unique_pairs), days), np.nan)
+        # Rows are date-ordered, so later rows for the same day win
+        day_col = np.clip(day_col, 0, days - 1)
+        matrix[series_idx, day_col] = price_col
+
+        return keys, matrix
+
+    @staticmethod
+    def _last_observed(matrix: np.ndarray) -> np.ndarray:
+        """Per cell, the column of the latest observation at or before it (0 before the first)"""
+        idx = np.where(~np.isnan(matrix), np.arange(matrix.shape[1]), 0)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        return idx
+
+    @staticmethod
+    def _forward_fill(matrix: np.ndarray) -> np.ndarray:
+        idx = TrendAnalyticsService._last_observed(matrix)
+        return matrix[np.arange(matrix.shape[0])[:, None], idx]
+
+    @staticmethod
+    def _ema(matrix: np.ndarray, span: int) -> np.ndarray:
+        """Last EMA value per row (recursion over time, vectorized across series)"""
+        alpha = 2.0 / (span + 1)
+        ema = np.full(matrix.shape[0], np.nan)
+        for column in matrix.T:
+            has_value = ~np.isnan(column)
+            fresh = has_value & np.isnan(ema)
+            ema = np.where(fresh, column, ema)
+            update = has_value & ~fresh
+            ema = np.where(update, alpha * column + (1 - alpha) * ema, ema)
+        return ema
+
+    @staticmethod
+    def compute(matrix: np.ndarray, sma_window: int = 7, ema_span: int = 7) -> Dict[str, np.ndarray]:
+        """
+        Compute every metric for every row of the price matrix.
+
+        Returns a dict of metric name -> 1D array (one value per series).
+        """
+        n_days = matrix.shape[1]
+        counts = (~np.isnan(matrix)).sum(axis=1)
+
+        # All-NaN slices (e.g. a single observation) are expected and become None
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+
+            # Min / max / mean over actual observations, like analyze_trend
+            metrics = {
+                "lowest_price": np.nanmin(matrix, axis=1),
+                "highest_price": np.nanmax(matrix, axis=1),
+                "average_price": np.nanmean(matrix, axis=1),
+                "total_data_points": counts.astype(np.float64),
+            }
+
+            observed = matrix
+            # Everything time-based runs on the gap-free (carried forward) grid
+            matrix = TrendAnalyticsService._forward_fill(matrix)
+            current = matrix[:, -1]
+            metrics["current_price"] = current
+
+            # Multi-window percent change on the daily grid
+            for window in TrendAnalyticsService.CHANGE_WINDOWS:
+                if window < n_days:
+                    past = matrix[:, -1 - window]
+                    metrics[f"change_{window}d_percent"] = np.where(
+                        past > 0, (current - past) / past * 100, np.nan
+                    )
+
+            # Simple moving average of the last `sma_window` days
+            window = min(sma_window, n_days)
+            metrics[f"sma_{sma_window}"] = np.nanmean(matrix[:, -window:], axis=1)
+            metrics[f"ema_{ema_span}"] = TrendAnalyticsService._ema(matrix, ema_span)
+
+            # Volatility: std dev of daily returns, in percent. Only returns
+            # between observed prices count (carried-forward days would add
+            # zeros), each scaled to one day by the gap it spans
+            previous = matrix[:, :-1]
+            gaps = np.arange(1, n_days) - TrendAnalyticsService._last_observed(observed)[:, :-1]
+            returns = (observed[:, 1:] - previous) / previous / np.sqrt(gaps)
+            metrics["volatility_percent"] = np.nanstd(returns, axis=1) * 100
+
+            # Max drawdown: worst drop from a running peak, in percent
+            peaks = np.fmax.accumulate(matrix, axis=1)
+            drawdowns = (matrix - peaks) / peaks
+            metrics["max_drawdown_percent"] = np.nanmin(drawdowns, axis=1) * 100
+
+        return metrics
+
+    @staticmethod
+    def _trend_label(week_change: float) -> str:
+        # Same thresholds as PriceHistoryService.analyze_trend
+        if week_change > 10:
+            return "Strong Upward"
+        if week_change > 5:
+            return "Upward"
+        if week_change < -10:
+            return "Strong Downward"
+        if week_change < -5:
+            return "Downward"
+        return "Stable"
+
+    @staticmethod
+    def portfolio_trends(db: Session, days: int = 90, card_ids: Optional[List[int]] = None,
+                         condition: Optional[str] = None, sma_window: int = 7,
+                         ema_span: int = 7, source: str = "snapshot") -> Dict:
+        """
+        Trend metrics for every card and condition in the portfolio, from
+        our daily snapshots or the upstream history (`source`)
+        """
+        keys, matrix = TrendAnalyticsService._load_matrix(db, days, card_ids, condition, source)
+        if not keys:
+            return {"days": days, "source": source, "total_series": 0, "cards": []}
+
+        metrics = TrendAnalyticsService.compute(matrix, sma_window, ema_span)
+
+        names = dict(db.query(Card.id, Card.card_name).filter(
+            Card.id.in_({card_id for card_id, _ in keys})
+        ).all())
+
+        cards: Dict[int, Dict] = {}
+        for i, (card_id, cond) in enumerate(keys):
+            values = {}
+            for name, column in metrics.items():
+                value = column[i]
+                values[name] = None if np.isnan(value) else round(float(value), 2)
+            values["total_data_points"] = int(metrics["total_data_points"][i])
+
+            week_change = values.get("change_7d_percent")
+            values["trend"] = TrendAnalyticsService._trend_label(week_change or 0)
+
+            entry = cards.setdefault(card_id, {
+                "card_id": card_id,
+                "card_name": names.get(card_id),
+                "conditions": {}
+            })
+            entry["conditions"][cond] = values
+
+        return {
+            "days": days,
+            "source": source,
+            "total_series": len(keys),
+            "cards": list(cards.values())
+        }
@@ -0,0 +1,134 @@
+"""
+Check that slow insight generation doesn't stall the rest of the API.
+
+Starts the app under uvicorn against fake upstreams (slow Anthropic stub),
+fires a burst of /cards/{id}/ai-insights requests and meanwhile measures
+latency of /health and /cards, compared with an idle baseline.
+
+Usage:
+    python -m benchmarks.async_load --insight-latency 2 --insight-requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.fake_anthropic import start_fake_anthropic
+from benchmarks.fake_pokemontcg import start_fake_pokemontcg
+from benchmarks.fake_pricetracker import start_fake_pricetracker
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(pct / 100 * len(values)))] * 1000, 2)
+
+
+def summarize(latencies):
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": percentile(latencies, 100),
+    }
+
+
+async def probe(client, path, seconds):
+    """Hit `path` sequentially for `seconds`, recording latencies"""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def run(base_url, card_ids, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        baseline = await asyncio.gather(probe(client, "/health", 2), probe(client, "/cards/?limit=20", 2))
+
+        insight_calls = [
+            client.get(f"/cards/{card_ids[i % len(card_ids)]}/ai-insights", params={"refresh": "true"})
+            for i in range(args.insight_requests)
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            probe(client, "/health", args.insight_latency + 1),
+            probe(client, "/cards/?limit=20", args.insight_latency + 1),
+            *insight_calls
+        )
+        insights_elapsed = time.perf_counter() - started
+
+    return {
+        "idle": {"health": summarize(baseline[0]), "cards": summarize(baseline[1])},
+        "under_insight_load": {"health": summarize(results[0]), "cards": summarize(results[1])},
+        "insights": {
+            "requests": args.insight_requests,
+            "ok": sum(1 for r in results[2:] if r.status_code == 200),
+            "elapsed_seconds": round(insights_elapsed, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop responsiveness under insight load")
+    parser.add_argument("--insight-latency", type=float, default=2.0)
+    parser.add_argument("--insight-requests", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=20)
+    args = parser.parse_args()
+
+    _, anthropic_url = start_fake_anthropic(latency=args.insight_latency)
+    _, tracker_url = start_fake_pricetracker(latency=0.2)
+    _, tcg_url = start_fake_pokemontcg()
+
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}",
+        "ANTHROPIC_BASE_URL": anthropic_url,
+        "ANTHROPIC_API_KEY": "fake",
+        "POKEMON_PRICE_TRACKER_API_URL": tracker_url,
+        "POKEMON_PRICE_TRACKER_API_KEY": "fake",
+        "POKEMONTCG_API_URL": tcg_url,
+    })
+
+    import uvicorn
+    from app.database.config import SessionLocal, engine
+    from app.database.migrations import run_migrations
+    from app.main import app
+    from app.models.card import Card
+
+    # Seeding happens before the app's startup would migrate
+    run_migrations(engine)
+
+    db = SessionLocal()
+    cards = [Card(card_name=f"Load Card {i}", set_name="Base Set", market_price=10.0) for i in range(args.cards)]
+    db.add_all(cards)
+    db.commit()
+    card_ids = [card.id for card in cards]
+    db.close()
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    report = asyncio.run(run(f"http://127.0.0.1:{port}", card_ids, args))
+    server.should_exit = True
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Cold start: how long a fresh worker takes to import the app and to answer
+its first requests, i.e. what every scale-up or redeploy pays.
+
+Each run is a new process:
+  - import: `import app.main` in a fresh interpreter (plus the packages
+    that take longest, from -X importtime)
+  - first response: uvicorn started from scratch, GET /health polled until
+    it answers, then one GET /cards (first query on the pool)
+
+Runs against a migrated database by default, as a deploy would after its
+one-shot `python migrate_db.py`; --migrate-on-startup makes the app check
+and migrate the schema itself.
+
+Usage:
+    python -m benchmarks.cold_start --repeat 5
+    python -m benchmarks.cold_start --database-url postgresql://localhost/bench --migrate-on-startup
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.harness import run_metadata
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env(database_url: str, migrate_on_startup: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "LOG_LEVEL": "WARNING",
+        "MIGRATE_ON_STARTUP": "true" if migrate_on_startup else "false",
+        "SNAPSHOT_SCHEDULER_ENABLED": "false",
+        "PRICE_QUEUE_ENABLED": "false",
+    })
+    return env
+
+
+def _import_time(env: dict) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=BACKEND_DIR, env=env, check=True)
+    return time.perf_counter() - started
+
+
+def _slowest_imports(env: dict, top: int) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    # Self time summed per top-level package (cumulative times nest and would double count)
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|")
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(self_us)
+        except ValueError:
+            continue  # the header line
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": package, "ms": round(us / 1000, 1)} for package, us in slowest]
+
+
+def _first_response(env: dict, timeout: float = 60) -> dict:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    base_url = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=5) as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("app did not start in time")
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {process.returncode}")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            query_started = time.perf_counter()
+            client.get("/cards/", params={"limit": 1}).raise_for_status()
+            first_query = time.perf_counter() - query_started
+    finally:
+        process.terminate()
+        process.wait(10)
+    return {"ready": ready, "first_query": first_query}
+
+
+def _median_ms(samples) -> float:
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to first response")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    parser.add_argument("--migrate-on-startup", action="store_true")
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cold_start.db')}"
+    env = _env(database_url, args.migrate_on_startup)
+
+    # Migrate once up front, like the deploy step
+    subprocess.run([sys.executable, "migrate_db.py"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    imports = [_import_time(env) for _ in range(args.repeat)]
+    responses = [_first_response(env) for _ in range(args.repeat)]
+
+    report = {
+        "metadata": run_metadata(),
+        "database": database_url.split("://")[0],
+        "migrate_on_startup": args.migrate_on_startup,
+        "repeat": args.repeat,
+        "import_ms": _median_ms(imports),
+        "time_to_first_response_ms": _median_ms([r["ready"] for r in responses]),
+        "first_query_ms": _median_ms([r["first_query"] for r in responses]),
+        "slowest_imports": _slowest_imports(env, args.top),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two benchmark suite reports and flag regressions.
+
+Usage:
+    python -m benchmarks.compare results/baseline.json results/current.json --threshold 10
+
+Exits 1 if any scenario's p95 latency grew (or throughput dropped) by more
+than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+# (metric, True if bigger is worse)
+METRICS = [("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("throughput_rps", False)]
+GATED = {"p95_ms", "throughput_rps"}
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    rows = {}
+    regressions = []
+    for name, new in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            continue
+        row = {}
+        for metric, bigger_is_worse in METRICS:
+            change = _change(old.get(metric), new.get(metric))
+            row[metric] = {"baseline": old.get(metric), "current": new.get(metric), "change_pct": change}
+            if change is None or metric not in GATED:
+                continue
+            worse = change if bigger_is_worse else -change
+            if worse > threshold:
+                regressions.append(f"{name}.{metric} {change:+.1f}%")
+        row["errors"] = {"baseline": old.get("errors"), "current": new.get("errors")}
+        rows[name] = row
+
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("git_commit"),
+        "current_commit": current.get("meta", {}).get("git_commit"),
+        "threshold_pct": threshold,
+        "scenarios": rows,
+        "regressions": regressions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark suite reports")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    result = compare(baseline, current, args.threshold)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Bulk export: rows/s, output size and peak memory of export_price_history.py
+per format, for every column and for a narrow projection.
+
+Each export is a fresh process so peak RSS is that export's own; it should
+stay flat as history grows (one batch in memory at a time).
+
+Usage:
+    python -m benchmarks.export --history-cards 20000 --history-days 90
+    python -m benchmarks.export --database-url sqlite:////tmp/bench.db
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+from benchmarks.harness import run_metadata
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the CLI in-process and reports its peak RSS alongside its own report
+RUNNER = """
+import json, resource, runpy, sys
+from contextlib import redirect_stdout
+from io import StringIO
+sys.argv = ["export_price_history.py"] + sys.argv[1:]
+out = StringIO()
+with redirect_stdout(out):
+    runpy.run_path("export_price_history.py", run_name="__main__")
+report = json.loads(out.getvalue())
+report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+print(json.dumps(report))
+"""
+
+PROJECTIONS = {
+    "all": None,
+    "narrow": "card_id,snapshot_day,market_price",
+}
+
+
+def _export(env: dict, output: str, format: str, columns: str = None) -> dict:
+    args = [output, "--format", format] + (["--columns", columns] if columns else [])
+    result = subprocess.run([sys.executable, "-c", RUNNER, *args], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"]) if report["seconds"] else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Parquet/Arrow price history export")
+    parser.add_argument("--database-url", default=None, help="an already seeded database (skips seeding)")
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--history-cards", type=int, default=20000)
+    parser.add_argument("--history-days", type=int, default=90)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database_url = args.database_url
+    if database_url is None:
+        from app.database.migrations import run_migrations
+        from benchmarks.seed import seed
+
+        database_url = f"sqlite:///{os.path.join(workdir, 'export.db')}"
+        engine = create_engine(database_url)
+        run_migrations(engine)
+        seed(engine, args.cards, args.history_cards, args.history_days)
+        engine.dispose()
+
+    env = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL="WARNING")
+    results = {}
+    for format in ("parquet", "arrow"):
+        for projection, columns in PROJECTIONS.items():
+            output = os.path.join(workdir, f"{projection}.{format}")
+            report = _export(env, output, format, columns)
+            results[f"{format}/{projection}"] = {
+                key: report[key] for key in ("rows", "seconds", "rows_per_second", "bytes", "peak_rss_mb")
+            }
+            os.remove(output)
+
+    print(json.dumps({
+        "metadata": run_metadata(),
+        "database": database_url.split("://")[0],
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Local stub of the Anthropic Messages API.
+
+Usage:
+    python -m benchmarks.fake_anthropic --port 8903 --latency 2 --error-rate 0.05
+
+Then run the backend with ANTHROPIC_BASE_URL=http://127.0.0.1:8903 and any
+non-empty ANTHROPIC_API_KEY.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.fake_pokemontcg import FakeServer
+
+INSIGHT = {
+    "prediction": "Prices should hold steady over the next few weeks.",
+    "recommendation": "HOLD",
+    "reasoning": "Stub response from the local fake Messages API.",
+    "confidence": 70
+}
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    error_rate = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        with self._count_lock:
+            type(self).request_count += 1
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._send_json(529, {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "fake upstream error"}
+            })
+            return
+
+        self._send_json(200, {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": "```json\n" + json.dumps(INSIGHT) + "\n```"}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 1, "output_tokens": 1}
+        })
+
+
+def start_fake_anthropic(port: int = 0, latency: float = 0.0, error_rate: float = 0.0):
+    """Start the stub on a background thread; returns (server, base_url)"""
+    handler = type("Handler", (FakeAnthropicHandler,), {
+        "latency": latency,
+        "error_rate": error_rate,
+        "request_count": 0,
+    })
+    server = FakeServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8903)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_anthropic(args.port, args.latency, args.error_rate)
+    print(f"Fake Anthropic API listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
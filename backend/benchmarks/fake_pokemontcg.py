@@ -0,0 +1,128 @@
+"""
+Local fake of the PokemonTCG.io cards API.
+
+Usage:
+    python -m benchmarks.fake_pokemontcg --port 8901 --latency 0.2
+
+Then point the backend at it with POKEMONTCG_API_URL=http://127.0.0.1:8901/v2
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# id -> (name, set) for every card a search has returned, so by-id lookups work
+_registry = {}
+
+
+def _fake_card(name: str, set_name: str) -> dict:
+    # Deterministic price and id per name so repeated runs are comparable
+    base = (sum(ord(c) for c in name) % 500) + 1.0
+    card_id = f"fake-{zlib.crc32(f'{name}|{set_name}'.encode())}"
+    _registry[card_id] = (name, set_name)
+    return {
+        "id": card_id,
+        "name": name,
+        "set": {"name": set_name or "Base Set"},
+        "tcgplayer": {
+            "prices": {
+                "holofoil": {"low": round(base * 0.8, 2), "market": base, "high": round(base * 1.5, 2)}
+            }
+        },
+    }
+
+
+class FakePokemonTCGHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    latency = 0.0
+    error_rate = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        with self._count_lock:
+            type(self).request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._send_json(503, {"error": "fake upstream error"})
+            return
+
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/")
+        if "/cards/" in path:
+            # GET /cards/{id}
+            card_id = path.rsplit("/", 1)[1]
+            if card_id not in _registry:
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {"data": _fake_card(*_registry[card_id])})
+            return
+        if not path.endswith("/cards"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        query = parse_qs(parsed.query).get("q", [""])[0]
+        ids = re.findall(r'\bid:"([^"]*)"', query)
+        if ids:
+            cards = [_fake_card(*_registry[card_id]) for card_id in ids if card_id in _registry]
+            self._send_json(200, {"data": cards, "totalCount": len(cards)})
+            return
+
+        names = re.findall(r'(?<!\.)\bname:"([^"]*)"', query)
+        set_match = re.search(r'set\.name:"([^"]*)"', query)
+        set_name = set_match.group(1) if set_match else ""
+
+        cards = [_fake_card(name, set_name) for name in names]
+        self._send_json(200, {"data": cards, "totalCount": len(cards)})
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default (5) drops bursts of concurrent connects
+
+
+def start_fake_pokemontcg(port: int = 0, latency: float = 0.0, error_rate: float = 0.0):
+    """Start the fake server on a background thread; returns (server, base_url)"""
+    handler = type("Handler", (FakePokemonTCGHandler,), {
+        "latency": latency,
+        "error_rate": error_rate,
+        "request_count": 0,
+    })
+    server = FakeServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake PokemonTCG.io server")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_fake_pokemontcg(args.port, args.latency, args.error_rate)
+    print(f"Fake PokemonTCG.io listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
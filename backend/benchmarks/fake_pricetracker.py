@@ -0,0 +1,119 @@
+"""
+Local fake of the PokemonPriceTracker v2 cards API (with price history).
+
+Usage:
+    python -m benchmarks.fake_pricetracker --port 8902 --latency 0.5
+
+Then run the backend with POKEMON_PRICE_TRACKER_API_URL=http://127.0.0.1:8902/api/v2
+and any non-empty POKEMON_PRICE_TRACKER_API_KEY.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.fake_pokemontcg import FakeServer
+
+# tcgPlayerId -> (name, set) for every card a search has returned
+_registry = {}
+
+
+def _fake_history(name: str, days: int) -> list:
+    # Deterministic random walk per card name
+    rng = random.Random(name)
+    price = rng.uniform(1, 500)
+    history = []
+    for offset in range(days - 1, -1, -1):
+        price = max(0.5, price * rng.uniform(0.97, 1.03))
+        history.append({
+            "date": (date.today() - timedelta(days=offset)).isoformat(),
+            "market": round(price, 2)
+        })
+    return history
+
+
+class FakePriceTrackerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    error_rate = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        with self._count_lock:
+            type(self).request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._send_json(503, {"error": "fake upstream error"})
+            return
+
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        days = min(int(params.get("days", ["90"])[0]), 3650)
+        if "tcgPlayerId" in params:
+            tcgplayer_id = params["tcgPlayerId"][0]
+            if tcgplayer_id not in _registry:
+                self._send_json(200, {"data": []})
+                return
+            name, set_name = _registry[tcgplayer_id]
+        else:
+            name = params.get("search", ["Unknown"])[0]
+            set_name = params.get("setName", ["Base Set"])[0]
+            tcgplayer_id = str(zlib.crc32(name.encode()) % 1000000)
+            _registry[tcgplayer_id] = (name, set_name)
+        history = _fake_history(name, days)
+
+        self._send_json(200, {"data": [{
+            "id": f"ppt-{tcgplayer_id}",
+            "tcgPlayerId": tcgplayer_id,
+            "name": name,
+            "setName": set_name,
+            "prices": {"market": history[-1]["market"]},
+            "priceHistory": {"conditions": {"Near Mint": {"history": history}}}
+        }]})
+
+
+def start_fake_pricetracker(port: int = 0, latency: float = 0.0, error_rate: float = 0.0):
+    """Start the fake server on a background thread; returns (server, base_url)"""
+    handler = type("Handler", (FakePriceTrackerHandler,), {
+        "latency": latency,
+        "error_rate": error_rate,
+        "request_count": 0,
+    })
+    server = FakeServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake PokemonPriceTracker server")
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_pricetracker(args.port, args.latency, args.error_rate)
+    print(f"Fake PokemonPriceTracker listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,73 @@
+"""
+Local webhook receiver for price alerts: prints and records every POST.
+
+Usage:
+    python -m benchmarks.fake_webhook --port 8904 --error-rate 0.2
+
+Then create a rule with "webhook_url": "http://127.0.0.1:8904/alerts" and
+trigger a snapshot; POST /alerts/deliver sends due webhooks immediately.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.fake_pokemontcg import FakeServer
+
+
+class FakeWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    error_rate = 0.0
+    verbose = False
+    received: list = []
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        failed = bool(self.error_rate and random.random() < self.error_rate)
+        if not failed:
+            with self._lock:
+                self.received.append({
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": json.loads(body or b"null"),
+                })
+            if self.verbose:
+                print(f"{self.path} {self.headers.get('X-Alert-Event-Id')}: {body.decode()}", flush=True)
+
+        self.send_response(503 if failed else 204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def start_fake_webhook(port: int = 0, error_rate: float = 0.0, verbose: bool = False):
+    """Start the receiver on a background thread; returns (server, url). Payloads collect in server.received"""
+    handler = type("Handler", (FakeWebhookHandler,), {
+        "error_rate": error_rate,
+        "verbose": verbose,
+        "received": [],
+    })
+    server = FakeServer(("127.0.0.1", port), handler)
+    server.received = handler.received
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/alerts"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake webhook receiver for price alerts")
+    parser.add_argument("--port", type=int, default=8904)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server, url = start_fake_webhook(args.port, args.error_rate, verbose=True)
+    print(f"Fake webhook receiver listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
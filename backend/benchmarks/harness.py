@@ -0,0 +1,134 @@
+"""
+Shared pieces for the benchmark scripts: fake upstreams, running the app
+under uvicorn, closed-loop load generation and latency summaries.
+"""
+import asyncio
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_anthropic import start_fake_anthropic
+from benchmarks.fake_pokemontcg import start_fake_pokemontcg
+from benchmarks.fake_pricetracker import start_fake_pricetracker
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """pct-th percentile of latencies (seconds) in milliseconds"""
+    values = sorted(values)
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(pct / 100 * len(values)))] * 1000, 2)
+
+
+def summarize(latencies: List[float], errors: int = 0, elapsed: Optional[float] = None) -> Dict:
+    summary = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": percentile(latencies, 100),
+    }
+    if elapsed:
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["throughput_rps"] = round(len(latencies) / elapsed, 2)
+    return summary
+
+
+def start_fake_upstreams(latency: float = 0.0, error_rate: float = 0.0,
+                         anthropic_latency: Optional[float] = None) -> Dict:
+    """
+    Start fake PokemonTCG.io, PokemonPriceTracker and Anthropic servers and
+    point the app's env vars at them. Call before importing app modules.
+    """
+    tcg, tcg_url = start_fake_pokemontcg(latency=latency, error_rate=error_rate)
+    tracker, tracker_url = start_fake_pricetracker(latency=latency, error_rate=error_rate)
+    anthropic, anthropic_url = start_fake_anthropic(
+        latency=latency if anthropic_latency is None else anthropic_latency, error_rate=error_rate
+    )
+    os.environ.update({
+        "POKEMONTCG_API_URL": tcg_url,
+        "POKEMON_PRICE_TRACKER_API_URL": tracker_url,
+        "POKEMON_PRICE_TRACKER_API_KEY": "fake",
+        "ANTHROPIC_BASE_URL": anthropic_url,
+        "ANTHROPIC_API_KEY": "fake",
+    })
+    return {"pokemontcg": tcg, "pricetracker": tracker, "anthropic": anthropic}
+
+
+def upstream_request_counts(servers: Dict) -> Dict[str, int]:
+    return {name: server.RequestHandlerClass.request_count for name, server in servers.items()}
+
+
+def start_app(app) -> tuple:
+    """Serve `app` with uvicorn on a free port; returns (server, base_url)"""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def closed_loop(client: httpx.AsyncClient, make_request: Callable[[int], Awaitable[httpx.Response]],
+                      concurrency: int, requests: int, duration: Optional[float] = None) -> Dict:
+    """
+    `concurrency` workers issue requests back to back until `requests`
+    have been sent (or `duration` seconds pass). Non-2xx responses and
+    transport errors count as errors and are left out of the latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if deadline and time.perf_counter() > deadline:
+                return
+            started = time.perf_counter()
+            try:
+                response = await make_request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_metadata() -> Dict:
+    """Commit, time and platform, so result files can be compared across commits"""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    return {
+        "git_commit": git("rev-parse", "HEAD"),
+        "git_dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,111 @@
+"""
+History reads and snapshot writes against a large price_history table.
+
+Seeds --cards x --days rows (default 2000 x 500 = 1M), then times
+SnapshotService.get_card_history for random cards and a bulk snapshot
+upsert for every card (first write of the day, then a same-day rerun
+where every row conflicts).
+
+Usage:
+    python -m benchmarks.price_history_scale --cards 20000 --days 500   # 10M rows
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def _seed(db_path: str, cards: int, days: int) -> float:
+    """Bulk-load rows with plain sqlite3 (the ORM would take longer than the benchmark)"""
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO cards (id, card_name, set_name, rarity) VALUES (?, ?, 'Base Set', 'Rare')",
+        ((i, f"Bench Card {i}") for i in range(1, cards + 1))
+    )
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    for day_offset in range(days, 0, -1):
+        day = today - timedelta(days=day_offset)
+        conn.executemany(
+            "INSERT INTO price_history (card_id, market_price, low_price, high_price, snapshot_date, "
+            "snapshot_day, condition, source) VALUES (?, ?, ?, ?, ?, ?, 'Near Mint', 'snapshot')",
+            (
+                (card_id, price, price * 0.9, price * 1.1, day.isoformat(sep=" "), day.date().isoformat())
+                for card_id in range(1, cards + 1)
+                for price in (round(random.uniform(1, 200), 2),)
+            )
+        )
+    conn.commit()
+    conn.close()
+    return time.perf_counter() - started
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price_history reads/writes at scale")
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--history-days", type=int, default=90)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from app.database.config import SessionLocal, engine
+    from app.database.migrations import run_migrations
+    from app.services.price_history_writer import daily_row, upsert_daily_rows
+    from app.services.snapshot_service import SnapshotService
+
+    run_migrations(engine)
+    seed_seconds = _seed(db_path, args.cards, args.days)
+
+    db = SessionLocal()
+    try:
+        read_latencies = []
+        for _ in range(args.reads):
+            card_id = random.randint(1, args.cards)
+            started = time.perf_counter()
+            SnapshotService.get_card_history(db, card_id, days=args.history_days)
+            read_latencies.append(time.perf_counter() - started)
+            db.expunge_all()
+
+        rows = [daily_row(card_id, market_price=10.0, low_price=9.0, high_price=11.0)
+                for card_id in range(1, args.cards + 1)]
+        writes = {}
+        for label in ("insert", "rerun_all_conflicts"):
+            started = time.perf_counter()
+            upsert_daily_rows(db, rows)
+            writes[label] = {
+                "rows": len(rows),
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+            writes[label]["rows_per_sec"] = round(len(rows) / max(writes[label]["seconds"], 1e-9))
+    finally:
+        db.close()
+
+    print(json.dumps({
+        "rows": args.cards * args.days,
+        "seed_seconds": round(seed_seconds, 1),
+        "history_read": {"days": args.history_days, "samples": args.reads, **_percentiles(read_latencies)},
+        "snapshot_upsert": writes
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
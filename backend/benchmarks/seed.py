@@ -0,0 +1,91 @@
+"""
+Synthetic portfolio for benchmarks: N cards across a few dozen sets and
+rarities, plus daily price_history (and its rollups) for a subset of them.
+
+Uses bulk Core inserts, so it works on SQLite and Postgres alike.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+SETS = [f"Bench Set {i:02d}" for i in range(40)]
+RARITIES = ["Common", "Uncommon", "Rare", "Rare Holo", "Ultra Rare", "Secret Rare"]
+CHUNK_SIZE = 5000
+
+
+def seed(engine: Engine, cards: int, history_cards: int = 1000, history_days: int = 730,
+         rng_seed: int = 42) -> Dict:
+    """
+    Insert `cards` cards and `history_days` days of snapshots for the first
+    `history_cards` of them. Deterministic for a given rng_seed.
+    """
+    from app.models.card import Card
+    from app.models.price_history import PriceHistory
+    from app.services.price_rollup_service import PriceRollupService
+
+    rng = random.Random(rng_seed)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        # Ids are handed out sequentially, so the new cards start after the current max
+        first_id = (conn.execute(select(func.max(Card.id))).scalar() or 0) + 1
+        for start in range(0, cards, CHUNK_SIZE):
+            rows = []
+            for i in range(start, min(start + CHUNK_SIZE, cards)):
+                price = round(rng.lognormvariate(2.5, 1.2), 2)
+                rows.append({
+                    "card_name": f"Bench Card {i}",
+                    "set_name": rng.choice(SETS),
+                    "rarity": rng.choice(RARITIES),
+                    "market_price": price,
+                    "low_price": round(price * 0.85, 2),
+                    "high_price": round(price * 1.2, 2),
+                    "last_price_update": now - timedelta(hours=rng.randint(0, 24 * 14)),
+                })
+            conn.execute(insert(Card), rows)
+    cards_seconds = time.perf_counter() - started
+
+    history_cards = min(history_cards, cards)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    history_rows = 0
+    with engine.begin() as conn:
+        batch = []
+        for card_id in range(first_id, first_id + history_cards):
+            price = rng.lognormvariate(2.5, 1.2)
+            for offset in range(history_days, 0, -1):
+                price = max(0.1, price * rng.uniform(0.97, 1.03))
+                day = today - timedelta(days=offset)
+                batch.append({
+                    "card_id": card_id,
+                    "market_price": round(price, 2),
+                    "low_price": round(price * 0.9, 2),
+                    "high_price": round(price * 1.1, 2),
+                    "snapshot_date": day,
+                    "snapshot_day": day.date(),
+                    "condition": "Near Mint",
+                    "source": "snapshot",
+                })
+                if len(batch) >= CHUNK_SIZE:
+                    conn.execute(insert(PriceHistory), batch)
+                    history_rows += len(batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(PriceHistory), batch)
+            history_rows += len(batch)
+        rollups = PriceRollupService.rebuild(conn)
+
+    return {
+        "cards": cards,
+        "first_card_id": first_id,
+        "history_cards": history_cards,
+        "history_days": history_days,
+        "price_history_rows": history_rows,
+        "rollups": rollups,
+        "cards_seconds": round(cards_seconds, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+    }
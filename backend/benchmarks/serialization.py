@@ -0,0 +1,112 @@
+"""
+Per-row cost of the list/history response paths: the default FastAPI path
+(ORM objects -> response_model validation -> json.dumps) versus plain
+column tuples encoded with orjson. Both include the query; the report
+also checks that the two produce the same JSON.
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+
+def _time(fn, repeat: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(samples) * 1000, 2)}
+
+
+def _fastapi_json(content) -> bytes:
+    # What fastapi.responses.JSONResponse does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'serialization.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from pydantic import TypeAdapter
+
+    from app.database.config import SessionLocal, engine
+    from app.database.migrations import run_migrations
+    from app.models.card import Card
+    from app.models.price_history import PriceHistory
+    from app.schemas.card import CardResponse
+    from app.schemas.price_history import PriceHistoryResponse
+    from app.services import serialization
+    from app.services.card_query_service import CardQueryService
+    from app.services.snapshot_service import SnapshotService
+    from benchmarks.seed import seed
+
+    run_migrations(engine)
+    seeded = seed(engine, args.rows, history_cards=1, history_days=args.rows)
+    card_id = seeded["first_card_id"]
+
+    card_columns = serialization.schema_columns(CardResponse, Card)
+    history_columns = serialization.schema_columns(PriceHistoryResponse, PriceHistory)
+    cards_adapter = TypeAdapter(List[CardResponse])
+    history_adapter = TypeAdapter(List[PriceHistoryResponse])
+
+    db = SessionLocal()
+    paths = {
+        "cards": {
+            "orm_pydantic": lambda: _fastapi_json(cards_adapter.dump_python(
+                cards_adapter.validate_python(CardQueryService.get_page(db, limit=args.rows)[0], from_attributes=True),
+                mode="json"
+            )),
+            "rows_orjson": lambda: serialization.rows_json(
+                CardResponse, CardQueryService.get_page_rows(db, card_columns, limit=args.rows)
+            ),
+        },
+        "price_history": {
+            "orm_pydantic": lambda: _fastapi_json(history_adapter.dump_python(
+                history_adapter.validate_python(
+                    SnapshotService.get_card_history(db, card_id, args.rows + 1), from_attributes=True
+                ),
+                mode="json"
+            )),
+            "rows_orjson": lambda: serialization.rows_json(
+                PriceHistoryResponse,
+                SnapshotService.get_card_history_rows(db, history_columns, card_id, args.rows + 1)
+            ),
+        },
+    }
+
+    report = {"rows": args.rows, "repeat": args.repeat, "endpoints": {}}
+    try:
+        for endpoint, variants in paths.items():
+            result = {}
+            outputs = {}
+            for name, fn in variants.items():
+                db.expire_all()
+                outputs[name] = json.loads(fn())
+                timing = _time(fn, args.repeat)
+                timing["us_per_row"] = round(timing["median_ms"] * 1000 / max(len(outputs[name]), 1), 2)
+                result[name] = timing
+            result["rows"] = len(outputs["rows_orjson"])
+            result["identical_json"] = outputs["orm_pydantic"] == outputs["rows_orjson"]
+            result["speedup"] = round(result["orm_pydantic"]["median_ms"] / result["rows_orjson"]["median_ms"], 2)
+            report["endpoints"][endpoint] = result
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
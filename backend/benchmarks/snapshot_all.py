@@ -0,0 +1,61 @@
+"""
+Time a full snapshot-all run against the fake PokemonTCG.io server.
+
+Usage:
+    python -m benchmarks.snapshot_all --cards 2000 --latency 0.2 --concurrency 16
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.fake_pokemontcg import start_fake_pokemontcg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark POST /price-history/snapshot-all")
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests/sec per host (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    server, url = start_fake_pokemontcg(latency=args.latency)
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    # Must be set before the app modules read them at import time
+    os.environ["POKEMONTCG_API_URL"] = url
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from app.database.config import Base, SessionLocal, engine
+    from app.models.card import Card
+    from app.models.price_history import PriceHistory  # noqa: F401 (registers table)
+    from app.services import http_client
+    from app.services.snapshot_service import SnapshotService
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        db.add_all([Card(card_name=f"Bench Card {i}", set_name="Base Set") for i in range(args.cards)])
+        db.commit()
+
+        results = SnapshotService.capture_all_snapshots(
+            db,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+        server.shutdown()
+
+    results.pop("snapshots")
+    results["upstream_requests"] = server.RequestHandlerClass.request_count
+    results["http_pool"] = http_client.get_stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
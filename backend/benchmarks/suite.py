@@ -0,0 +1,166 @@
+"""
+End-to-end benchmark suite: runs the API under uvicorn against fake
+PokemonTCG.io / PokemonPriceTracker / Anthropic servers, seeds a synthetic
+portfolio and load-tests the main endpoints. Results are JSON (with the
+git commit) so runs can be diffed with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.suite --cards 10000 --output results/baseline.json
+    python -m benchmarks.suite --cards 1000000 --history-cards 5000 \\
+        --scenarios list_cards,price_history_chart --output results/1m.json
+    python -m benchmarks.suite --database-url postgresql://localhost/bench ...
+
+Scenarios: list_cards, list_cards_deep, create_card, price_history,
+price_history_chart, ai_insights, snapshot_all
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.harness import (
+    closed_loop, run_metadata, start_app, start_fake_upstreams, summarize, upstream_request_counts
+)
+
+SCENARIOS = [
+    "list_cards", "list_cards_deep", "create_card", "price_history",
+    "price_history_chart", "ai_insights", "snapshot_all"
+]
+
+
+def _request_factories(client: httpx.AsyncClient, seeded: dict, rng: random.Random):
+    from app.services.card_query_service import CardQueryService
+
+    first = seeded["first_card_id"]
+    all_ids = (first, first + seeded["cards"] - 1)
+    history_ids = (first, first + max(seeded["history_cards"], 1) - 1)
+
+    return {
+        # First page, optionally filtered by set
+        "list_cards": lambda i: client.get("/cards/", params={"limit": 100}),
+        # Random deep pages via keyset cursor
+        "list_cards_deep": lambda i: client.get("/cards/", params={
+            "limit": 100, "cursor": CardQueryService.encode_cursor(rng.randint(*all_ids))
+        }),
+        "create_card": lambda i: client.post("/cards/", json={
+            "card_name": f"Load Card {rng.randint(0, 10 ** 9)}", "set_name": "Base Set"
+        }),
+        "price_history": lambda i: client.get(f"/cards/{rng.randint(*history_ids)}/price-history"),
+        "price_history_chart": lambda i: client.get(
+            f"/price-history/{rng.randint(*history_ids)}",
+            params={"days": seeded["history_days"], "max_points": 150}
+        ),
+        "ai_insights": lambda i: client.get(f"/cards/{rng.randint(*history_ids)}/ai-insights"),
+    }
+
+
+async def run_scenarios(base_url: str, seeded: dict, upstreams: dict, args) -> dict:
+    rng = random.Random(args.seed)
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        factories = _request_factories(client, seeded, rng)
+
+        for name in args.scenarios:
+            before = upstream_request_counts(upstreams)
+
+            if name == "snapshot_all":
+                started = time.perf_counter()
+                response = await client.post("/price-history/snapshot-all")
+                elapsed = time.perf_counter() - started
+                ok = response.status_code == 200
+                result = summarize([elapsed] if ok else [], 0 if ok else 1, elapsed)
+                if ok:
+                    run = response.json()["results"]
+                    result["cards"] = run["total_cards"]
+                    result["cards_per_second"] = run["timing"].get("cards_per_second")
+                    result["successful"] = run["successful"]
+            else:
+                requests = args.requests
+                # Warm-up requests aren't counted
+                if args.warmup:
+                    await closed_loop(client, factories[name], args.concurrency, args.warmup)
+                result = await closed_loop(client, factories[name], args.concurrency, requests, args.duration)
+
+            after = upstream_request_counts(upstreams)
+            result["upstream_requests"] = {key: after[key] - before[key] for key in after}
+            results[name] = result
+            print(f"{name}: {json.dumps(result)}", file=sys.stderr)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PokéMarket API benchmark suite")
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--history-cards", type=int, default=200, help="cards that get price_history")
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--database-url", default=None, help="default: a fresh temporary SQLite file")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake upstream latency (seconds)")
+    parser.add_argument("--anthropic-latency", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake upstream error rate (0-1)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="uncounted requests per scenario")
+    parser.add_argument("--duration", type=float, default=None, help="max seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Env must be set before the app modules are imported
+    upstreams = start_fake_upstreams(args.latency, args.error_rate, args.anthropic_latency)
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'suite.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SNAPSHOT_RATE_LIMIT", "0")
+
+    from app.database.config import engine
+    from app.database.migrations import run_migrations
+    from app.main import app
+    from benchmarks.seed import seed
+
+    # Seeding happens before the app's startup would migrate
+    run_migrations(engine)
+    seeded = seed(engine, args.cards, args.history_cards, args.history_days, args.seed)
+    print(f"seeded: {json.dumps(seeded)}", file=sys.stderr)
+
+    server, base_url = start_app(app)
+    try:
+        results = asyncio.run(run_scenarios(base_url, seeded, upstreams, args))
+    finally:
+        server.should_exit = True
+
+    report = {
+        "meta": {
+            **run_metadata(),
+            "database": engine.dialect.name,
+            "args": {key: value for key, value in vars(args).items() if key != "database_url"},
+        },
+        "seed": seeded,
+        "scenarios": results,
+    }
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Export price history (joined with card details) to a Parquet file or an
+Arrow IPC stream, for notebooks and warehouse loads.
+
+With --state, the run only exports rows newer than the watermark saved by
+the previous run, then saves the new one (after the file is complete).
+
+Usage:
+    python export_price_history.py out.parquet [--columns card_id,snapshot_day,market_price]
+        [--start 2024-01-01] [--end 2024-12-31] [--card-id 12 --card-id 34] [--set-name "Base"]
+    python export_price_history.py daily.arrows --format arrow --state export_state.json
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date
+
+from app.database.config import engine
+from app.services.export_service import PriceHistoryExport
+
+def main():
+    parser = argparse.ArgumentParser(description="Export price history as Parquet or Arrow")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--format", choices=["parquet", "arrow"],
+                        help="default: from the file extension (.arrow/.arrows = arrow, otherwise parquet)")
+    parser.add_argument("--columns", help="comma-separated (default: every column)")
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--card-id", type=int, action="append", dest="card_ids")
+    parser.add_argument("--set-name")
+    parser.add_argument("--source", choices=["snapshot", "upstream"])
+    parser.add_argument("--after-id", type=int, default=0, help="only rows after this watermark")
+    parser.add_argument("--state", help="JSON file holding the watermark between incremental runs")
+    parser.add_argument("--batch-rows", type=int)
+    args = parser.parse_args()
+
+    format = args.format or ("arrow" if args.output.endswith((".arrow", ".arrows")) else "parquet")
+    after_id = args.after_id
+    if args.state and os.path.exists(args.state):
+        with open(args.state) as f:
+            after_id = json.load(f)["watermark"]
+
+    started = time.perf_counter()
+    try:
+        export = PriceHistoryExport(
+            columns=args.columns.split(",") if args.columns else None,
+            start=args.start, end=args.end, card_ids=args.card_ids, set_name=args.set_name,
+            source=args.source, after_id=after_id, batch_rows=args.batch_rows
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    watermark = export.watermark(engine)
+
+    # Write next to the target and rename, so a failed run never leaves half a file
+    partial = f"{args.output}.partial"
+    with open(partial, "wb") as f:
+        for chunk in export.iter_bytes(engine, format, watermark):
+            f.write(chunk)
+    os.replace(partial, args.output)
+
+    if args.state:
+        with open(args.state, "w") as f:
+            json.dump({"watermark": watermark}, f)
+
+    print(json.dumps({
+        "output": args.output,
+        "format": format,
+        "rows": export.rows,
+        "after_id": after_id,
+        "watermark": watermark,
+        "bytes": os.path.getsize(args.output),
+        "seconds": round(time.perf_counter() - started, 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Bulk import cards from a CSV or JSON/NDJSON file.
+
+Usage:
+    python import_cards.py cards.csv [--no-prices] [--batch-size 500]
+"""
+import argparse
+import json
+
+from app.database.config import SessionLocal, engine
+from app.database.migrations import run_migrations
+from app.services.card_import_service import CardImporter, make_parser
+
+CHUNK_SIZE = 64 * 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import cards")
+    parser.add_argument("path", help="CSV, JSON array or NDJSON file")
+    parser.add_argument("--no-prices", action="store_true", help="skip the PokemonTCG.io price lookup")
+    parser.add_argument("--batch-size", type=int, default=CardImporter.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    run_migrations(engine)
+
+    row_parser = make_parser("text/csv" if args.path.lower().endswith(".csv") else "application/json")
+    db = SessionLocal()
+    try:
+        importer = CardImporter(db, batch_size=args.batch_size, fetch_prices=not args.no_prices)
+        with open(args.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                importer.add_rows(row_parser.feed(chunk))
+        importer.add_rows(row_parser.close())
+        report = importer.finish()
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
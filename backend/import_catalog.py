@@ -0,0 +1,28 @@
+"""
+Load the PokemonTCG.io card catalog from JSON dumps (e.g. a checkout of
+github.com/PokemonTCG/pokemon-tcg-data) into the local catalog tables.
+Re-running only reads files that are new or changed.
+
+Usage:
+    python import_catalog.py path/to/pokemon-tcg-data [--force]
+"""
+import argparse
+import json
+
+from app.database.config import engine
+from app.database.migrations import run_migrations
+from app.services.catalog_service import CatalogService
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the card catalog")
+    parser.add_argument("path", nargs="?", default=CatalogService.DUMP_DIR,
+                        help="dump directory (default: CATALOG_DUMP_DIR)")
+    parser.add_argument("--force", action="store_true", help="re-read files that haven't changed")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    report = CatalogService.ingest(engine, args.path, force=args.force)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,37 @@
-from app.database.config import engine, Base
-from app.models.card import Card
+"""
+Bring the database schema up to date: create missing tables, columns and
+indexes and run the backfills (see app.database.migrations). Safe to run
+on every deploy; the only thing it ever deletes is same-day duplicate
+price_history rows, which --check lists first. The API doesn't migrate on
+startup when MIGRATE_ON_STARTUP=false, so run this first.
 
-print("Dropping old tables...")
-Base.metadata.drop_all(bind=engine)
+Usage:
+    python migrate_db.py           # migrate
+    python migrate_db.py --check   # exit 1 if migrations are pending
+"""
+import argparse
+import sys
+import time
 
-print("Creating new tables with price columns...")
-Base.metadata.create_all(bind=engine)
+from app.database.config import engine
+from app.database.migrations import pending_migrations, run_migrations
 
-print("✓ Database recreated successfully!")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or update the database schema")
+    parser.add_argument("--check", action="store_true", help="only report pending migrations")
+    args = parser.parse_args()
+
+    pending = pending_migrations(engine)
+    for item in pending:
+        print(f"pending: {item}")
+    if args.check:
+        sys.exit(1 if pending else 0)
+
+    started = time.perf_counter()
+    run_migrations(engine)
+    print(f"✓ Schema up to date ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
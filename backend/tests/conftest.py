@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before anything imports app.database.config
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("PRICE_QUEUE_ENABLED", "false")
+os.environ.setdefault("ALERT_WEBHOOKS_ENABLED", "false")
+os.environ.setdefault("SNAPSHOT_SCHEDULER_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database.config import SessionLocal, engine
+from app.database.migrations import run_migrations
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    run_migrations(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
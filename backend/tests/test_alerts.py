@@ -0,0 +1,92 @@
+import socket
+from datetime import date, datetime
+
+import httpx
+import pytest
+
+from app.database.config import SessionLocal
+from app.models.card import Card
+from app.models.price_alert import AlertEvent, AlertRule
+from app.services.alert_dispatcher import AlertWebhookDispatcher
+
+
+@pytest.mark.parametrize("webhook_url", [
+    "http://127.0.0.1:8000/hook",
+    "http://localhost/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://[::1]/hook",
+    "http://[::ffff:192.168.1.1]/hook",
+])
+def test_rule_rejects_internal_webhooks(client, webhook_url):
+    response = client.post("/alerts/rules", json={
+        "set_name": "Base", "kind": "price_above", "threshold": 10, "webhook_url": webhook_url
+    })
+
+    assert response.status_code == 400
+    assert "non-public" in response.json()["detail"]
+
+
+def test_rule_accepts_public_webhook(client):
+    response = client.post("/alerts/rules", json={
+        "set_name": "Base", "kind": "price_above", "threshold": 10, "webhook_url": "https://93.184.216.34/hook"
+    })
+
+    assert response.status_code == 200
+
+
+def test_dispatcher_refuses_internal_webhook(db):
+    card = Card(card_name="Blastoise", set_name="Base", condition="Near Mint")
+    db.add(card)
+    db.flush()
+    # Stored before the check existed (or its DNS changed since)
+    rule = AlertRule(card_id=card.id, kind="price_above", threshold=1, webhook_url="http://127.0.0.1:9/hook")
+    db.add(rule)
+    db.flush()
+    event = AlertEvent(
+        rule_id=rule.id, card_id=card.id, snapshot_day=date.today(), kind="price_above", market_price=2,
+        message="Blastoise is above $1.00", delivery_status="pending", webhook_url=rule.webhook_url,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(event)
+    db.commit()
+
+    report = AlertWebhookDispatcher(SessionLocal).run_once()
+
+    db.refresh(event)
+    assert report["failed"] == 1
+    assert event.delivery_status == "pending"
+    assert "non-public" in event.last_error
+
+
+def test_dispatcher_connects_to_the_checked_address(monkeypatch):
+    # A rebinding resolver: public for the check, internal for any later lookup
+    answers = ["93.184.216.34", "127.0.0.1"]
+
+    def getaddrinfo(host, *args, **kwargs):
+        address = answers.pop(0) if len(answers) > 1 else answers[0]
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, 0))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+    sent = []
+
+    def receiver(request):
+        sent.append(request)
+        return httpx.Response(204)
+
+    dispatcher = AlertWebhookDispatcher()
+    dispatcher._client = httpx.Client(transport=httpx.MockTransport(receiver))
+    event = AlertEvent(
+        id=1, rule_id=1, card_id=1, snapshot_day=date.today(), kind="price_above", market_price=2,
+        message="Blastoise is above $1.00", webhook_url="https://hooks.example.com:8443/hook"
+    )
+
+    assert dispatcher._post(event) is None
+
+    request = sent[0]
+    assert request.url.host == "93.184.216.34"
+    assert request.url.port == 8443
+    assert request.headers["host"] == "hooks.example.com:8443"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+    assert answers == ["127.0.0.1"]  # resolved exactly once
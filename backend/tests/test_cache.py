@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import CacheBackend, MemoryCacheBackend, TTLCache
+
+
+def test_backend_must_implement_every_method():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_stale_refresh_is_kept_and_failures_logged(caplog):
+    cache = TTLCache("test_stale_refresh", MemoryCacheBackend(), ttl=1, stale_ttl=60)
+    cache.backend.set("k", "old", time.time() - 10)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    async def run():
+        value = await cache.get_or_load_async("k", failing)
+        assert len(cache._refreshes) == 1
+        await asyncio.gather(*cache._refreshes, return_exceptions=True)
+        await asyncio.sleep(0)  # let the done callback run
+        return value
+
+    with caplog.at_level("ERROR", logger="app"):
+        assert asyncio.run(run()) == "old"
+
+    assert not cache._refreshes
+    assert "background cache refresh failed" in caplog.text
@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from app.models.ai_insight import AIInsight
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import PriceRollup
+from app.services.card_query_service import CardQueryService
+
+
+def test_delete_card_removes_its_rows(client, db):
+    card = Card(card_name="Delete Test", set_name="Base", condition="Near Mint")
+    db.add(card)
+    db.flush()
+    db.add(PriceHistory(card_id=card.id, market_price=1.0, snapshot_date=datetime(2024, 1, 1),
+                        snapshot_day=date(2024, 1, 1), source="upstream"))
+    db.add(PriceRollup(card_id=card.id, source="upstream", condition="Near Mint", period="week",
+                       period_start=date(2024, 1, 1), close=1.0, samples=1))
+    db.add(AIInsight(card_id=card.id, fingerprint=f"delete-test-{card.id}", insights={}))
+    db.commit()
+    card_id = card.id
+
+    assert client.delete(f"/cards/{card_id}").status_code == 200
+    db.expire_all()
+    for model in (PriceHistory, PriceRollup, AIInsight):
+        assert db.scalar(select(func.count()).select_from(model).where(model.card_id == card_id)) == 0
+
+
+def test_name_filter_is_a_literal_prefix(client, db):
+    db.add_all([Card(card_name=name, set_name="Prefix Test", condition="Near Mint")
+                for name in ("Porygon_Z", "PorygonZ", "Porygon2")])
+    db.commit()
+
+    response = client.get("/cards/", params={"name": "porygon_", "set_name": "Prefix Test"})
+
+    assert [card["card_name"] for card in response.json()] == ["Porygon_Z"]
+
+
+def test_name_filter_uses_like_on_postgres():
+    # A >= / < range is wrong under Postgres' linguistic collations
+    statement = CardQueryService.filtered(select(Card.id), name="Pika")
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "LIKE" in sql
+    assert ">=" not in sql and "<" not in sql
+
+
+def test_list_etag_changes_when_a_card_leaves_the_page(client, db):
+    cards = [Card(card_name=f"Etag Test {i}", set_name="Etag Test", condition="Near Mint") for i in range(3)]
+    db.add_all(cards)
+    db.commit()
+    params = {"set_name": "Etag Test"}
+
+    first = client.get("/cards/", params=params)
+    assert "last-modified" not in first.headers
+
+    assert client.delete(f"/cards/{cards[1].id}").status_code == 200
+    again = client.get("/cards/", params=params, headers={"If-None-Match": first.headers["etag"]})
+
+    assert again.status_code == 200
+    assert len(again.json()) == 2
@@ -0,0 +1,76 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import pytest
+
+from app.services import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    # Drop the kept-alive connection first, or the handler never returns
+    http_client.close_clients()
+    server.shutdown()
+    server.server_close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_reused_connections_are_pool_hits(server):
+    client = http_client.get_client(server)
+    for _ in range(3):
+        assert client.get("/").status_code == 200
+
+    stats = http_client.get_stats()[server]
+    assert stats == {"requests": 3, "failed": 0, "new_connections": 1, "pool_hits": 2}
+
+
+def test_failed_connects_are_not_pool_hits():
+    base_url = f"http://127.0.0.1:{_free_port()}"  # nothing listening
+    client = http_client.get_client(base_url)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            client.get("/")
+
+    stats = http_client.get_stats()[base_url]
+    assert stats == {"requests": 2, "failed": 2, "new_connections": 2, "pool_hits": 0}
+
+
+def test_async_clients_of_closed_loops_are_dropped():
+    base_url = "http://async-client.test"
+
+    async def client():
+        return http_client.get_async_client(base_url)
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+
+    # A fresh loop (maybe reusing the dead one's id) gets a fresh client,
+    # and the closed loop's client isn't kept around
+    assert second is not first
+    stored = [client for clients in http_client._async_clients.values() for client in clients.values()]
+    assert first not in stored
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc
+
+from app.services import metrics
+
+
+def test_metrics_content_type(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+
+
+def test_metrics_pool_hold_times(client):
+    # Any request that touches the database checks a connection out and back in
+    client.get("/cards/")
+
+    body = client.get("/metrics").text
+    assert 'db_pool_connection_hold_seconds_count{engine="sync"}' in body
+
+
+def _sample(name: str, engine: str) -> float:
+    return REGISTRY.get_sample_value(name, {"engine": engine}) or 0.0
+
+
+def _full_pool(name: str, timeout: float):
+    """A one-connection instrumented pool, plus its only connection (checked out)"""
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pool.db')}",
+        poolclass=metrics.TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=timeout
+    )
+    metrics.instrument_engine(engine, name)
+    return engine, engine.connect()
+
+
+def test_pool_checkout_wait_is_observed():
+    engine, held = _full_pool("test_wait", timeout=5)
+    threading.Timer(0.3, held.close).start()
+
+    started = time.perf_counter()
+    with engine.connect():
+        waited = time.perf_counter() - started
+
+    assert waited >= 0.25
+    assert _sample("db_pool_checkout_seconds_sum", "test_wait") >= 0.25
+    assert _sample("db_pool_checkout_seconds_count", "test_wait") == 2
+    assert _sample("db_pool_timeouts_total", "test_wait") == 0
+
+
+def test_pool_timeouts_are_counted():
+    engine, held = _full_pool("test_timeout", timeout=0.1)
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    assert _sample("db_pool_timeouts_total", "test_timeout") == 1
+    assert _sample("db_pool_checkout_seconds_sum", "test_timeout") >= 0.1
+
+
+def test_app_engines_time_checkouts(client):
+    client.get("/cards/")
+
+    assert _sample("db_pool_checkout_seconds_count", "sync") > 0
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+
+from app.database.migrations import pending_migrations, run_migrations
+
+
+def test_snapshot_day_dedupe_is_reported_then_applied():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'old.db')}")
+    run_migrations(engine)
+    # Rows written before snapshot_day existed: two on the same day, one the next
+    with engine.begin() as conn:
+        for snapshot_date in ("2024-05-01 08:00:00", "2024-05-01 20:00:00", "2024-05-02 08:00:00"):
+            conn.execute(text(
+                "INSERT INTO price_history (card_id, market_price, snapshot_date, condition, source) "
+                "VALUES (1, 10.0, :snapshot_date, 'Near Mint', 'snapshot')"
+            ), {"snapshot_date": snapshot_date})
+
+    assert pending_migrations(engine) == [
+        "backfill price_history.snapshot_day (deletes 1 same-day duplicate rows)"
+    ]
+
+    run_migrations(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT snapshot_date FROM price_history ORDER BY id")).scalars().all()
+    assert [str(row) for row in rows] == ["2024-05-01 20:00:00", "2024-05-02 08:00:00"]
+    assert pending_migrations(engine) == []
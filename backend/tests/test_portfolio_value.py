@@ -0,0 +1,52 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session
+
+from app.database.migrations import run_migrations
+from app.models.card import Card
+from app.models.portfolio_value import PortfolioValueDaily
+from app.models.price_history import PriceHistory
+from app.services.portfolio_value_service import PortfolioValueService
+from app.services.price_history_writer import daily_row, upsert_daily_rows
+
+
+def _series(db):
+    return db.execute(select(
+        PortfolioValueDaily.day, PortfolioValueDaily.total_value, PortfolioValueDaily.priced_cards
+    ).order_by(PortfolioValueDaily.day)).all()
+
+
+def test_deleted_card_matches_rebuild():
+    # Own database: rebuild() recounts every card's history
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'portfolio.db')}")
+    run_migrations(engine)
+    db = Session(engine)
+
+    kept = Card(card_name="Pikachu", set_name="Base", condition="Near Mint")
+    deleted = Card(card_name="Charizard", set_name="Base", condition="Near Mint")
+    db.add_all([kept, deleted])
+    db.commit()
+
+    start = datetime.utcnow() - timedelta(days=3)
+    upsert_daily_rows(db, [
+        daily_row(deleted.id, 100.0, snapshot_date=start),
+        daily_row(kept.id, 5.0, snapshot_date=start + timedelta(days=1)),
+        daily_row(deleted.id, 120.0, snapshot_date=start + timedelta(days=2)),
+    ])
+
+    # What DELETE /cards/{id} does
+    PortfolioValueService.remove_card(db, deleted.id)
+    db.execute(delete(PriceHistory).where(PriceHistory.card_id == deleted.id))
+    db.delete(deleted)
+    db.commit()
+
+    incremental = _series(db)
+    assert [(total, priced) for _, total, priced in incremental] == [(0.0, 0), (5.0, 1), (5.0, 1)]
+
+    with engine.begin() as conn:
+        PortfolioValueService.rebuild(conn)
+    assert _series(db) == incremental
+    db.close()
@@ -0,0 +1,63 @@
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models.card import Card
+from app.models.price_job import PriceJob
+from app.services.price_enrichment import PriceEnrichmentQueue
+from app.services.price_service import PriceService
+
+
+def _refused_url() -> str:
+    # A port nothing listens on: every request is a connection error
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}/v2"
+
+
+@pytest.fixture
+def api_down(monkeypatch):
+    monkeypatch.setattr(PriceService, "BASE_URL", _refused_url())
+    monkeypatch.setattr(PriceService, "RETRY_DELAY", 0)
+
+
+def _queued_card(db) -> PriceJob:
+    card = Card(card_name="Outage Test", set_name="Base", card_number="1", rarity="Rare",
+                condition="Near Mint")
+    db.add(card)
+    db.flush()
+    job = PriceEnrichmentQueue.enqueue(db, card)
+    db.commit()
+    return job
+
+
+def _run(db, queue, job) -> PriceJob:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        queue.run_once(executor)
+    db.expire_all()
+    return db.get(PriceJob, job.id)
+
+
+def test_outage_is_retried_not_unpriced(db, api_down):
+    queue = PriceEnrichmentQueue(workers=1)
+    job = _queued_card(db)
+
+    job = _run(db, queue, job)
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert job.error
+    assert job.run_after > datetime.utcnow()
+
+    # Due again: retried until MAX_ATTEMPTS, then given up on
+    for attempt in range(2, queue.MAX_ATTEMPTS + 1):
+        db.execute(update(PriceJob).where(PriceJob.id == job.id).values(run_after=datetime.utcnow()))
+        db.commit()
+        job = _run(db, queue, job)
+        assert job.attempts == attempt
+    assert job.status == "failed"
+    assert job.finished_at is not None
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.database.config import AsyncSessionLocal
+from app.models.card import Card
+from app.services.identity_service import CardIdentityService
+from app.services.price_history_service import PriceHistoryService
+from app.services.price_history_store import PriceHistoryStore
+
+
+def test_resolved_tcgplayer_id_is_saved_without_new_rows(db, monkeypatch):
+    card = Card(card_name="Mew ex", set_name="151", condition="Near Mint")
+    db.add(card)
+    db.commit()
+
+    async def no_new_points(*args, **kwargs):
+        return {"tcgplayer_id": "517045", "price_history": {}, "last_updated": None}
+
+    monkeypatch.setattr(PriceHistoryService, "get_price_history_async", no_new_points)
+
+    async def fetch():
+        async with AsyncSessionLocal() as session:
+            async_card = await session.get(Card, card.id)
+            await PriceHistoryStore.get_price_history_async(session, async_card)
+
+    asyncio.run(fetch())
+
+    db.refresh(card)
+    assert card.tcgplayer_id == "517045"
+
+
+def test_identity_is_shared_through_the_callers_session(db, monkeypatch):
+    first = Card(card_name="Mewtwo ex", set_name="151", condition="Near Mint")
+    second = Card(card_name="Mewtwo ex", set_name="151", condition="Lightly Played")
+    db.add_all([first, second])
+    db.commit()
+
+    asked_for = []
+
+    async def lookup(card_name, set_name, days, tcgplayer_id=None, **kwargs):
+        asked_for.append(tcgplayer_id)
+        return {"tcgplayer_id": "517050", "price_history": {}, "last_updated": None}
+
+    monkeypatch.setattr(PriceHistoryService, "get_price_history_async", lookup)
+
+    async def fetch(card_id):
+        async with AsyncSessionLocal() as session:
+            await PriceHistoryStore.get_price_history_async(session, await session.get(Card, card_id))
+
+    asyncio.run(fetch(first.id))
+    CardIdentityService._memory.clear()  # make the second lookup read card_identities
+    asyncio.run(fetch(second.id))
+
+    assert asked_for == [None, "517050"]
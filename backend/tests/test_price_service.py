@@ -0,0 +1,35 @@
+from app.services.identity_service import CardIdentityService
+from app.services.price_service import PriceService
+
+
+def _api_card(tcg_id: str, name: str) -> dict:
+    return {"id": tcg_id, "name": name, "tcgplayer": {"prices": {"holofoil": {"market": 300.0}}}}
+
+
+def test_bulk_prices_reach_every_key_sharing_an_id(db, monkeypatch):
+    # Two spellings of the set that resolved to the same card
+    CardIdentityService.remember_many(db, {
+        ("bulk charizard", "base"): {"tcg_id": "bulk-4"},
+        ("bulk charizard", "base set"): {"tcg_id": "bulk-4"},
+    })
+    db.commit()
+    monkeypatch.setattr(PriceService, "_get_with_retry",
+                        lambda params: {"data": [_api_card("bulk-4", "Bulk Charizard")], "totalCount": 1})
+
+    found = PriceService.fetch_card_prices_bulk(db, [("Bulk Charizard", "Base"), ("Bulk Charizard", "Base Set")])
+
+    assert set(found) == {("bulk charizard", "base"), ("bulk charizard", "base set")}
+    assert found[("bulk charizard", "base set")]["market_price"] == 300.0
+
+
+def test_bulk_search_logs_truncation(monkeypatch, caplog):
+    monkeypatch.setattr(PriceService, "BULK_MAX_PAGES", 2)
+    monkeypatch.setattr(PriceService, "BULK_PAGE_SIZE", 1)
+    monkeypatch.setattr(PriceService, "_get_with_retry",
+                        lambda params: {"data": [_api_card(f"p{params['page']}", "Pikachu")], "totalCount": 5})
+
+    with caplog.at_level("WARNING", logger="app"):
+        cards = list(PriceService._search_pages('(name:"Pikachu")'))
+
+    assert len(cards) == 2
+    assert "bulk price search truncated" in caplog.text
@@ -0,0 +1,33 @@
+import os
+import tempfile
+from datetime import date
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database.migrations import run_migrations
+from app.models.card import Card
+from app.models.snapshot_shard import SnapshotRun, SnapshotShard
+from app.services.snapshot_scheduler import SnapshotScheduler
+
+
+def test_replicas_share_the_first_ones_shard_count():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'shards.db')}")
+    run_migrations(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add_all([Card(card_name=f"Shard {i}", set_name="Base", condition="Near Mint") for i in range(20)])
+    db.commit()
+    day = date(2024, 1, 1)
+
+    # Deployed with different SNAPSHOT_SHARDS mid-rollout
+    assert SnapshotScheduler(Session, shards=4)._ensure_shards(db, day) == 4
+    assert SnapshotScheduler(Session, shards=8)._ensure_shards(db, day) == 4
+
+    assert db.execute(select(SnapshotRun.shard_count).where(SnapshotRun.run_day == day)).scalars().all() == [4]
+    shards = db.execute(select(SnapshotShard).where(SnapshotShard.run_day == day)
+                        .order_by(SnapshotShard.shard_no)).scalars().all()
+    assert [shard.shard_count for shard in shards] == [4] * 4
+    # Contiguous, non-overlapping id ranges
+    assert [shard.id_to for shard in shards[:-1]] == [shard.id_from for shard in shards[1:]]
+    db.close()
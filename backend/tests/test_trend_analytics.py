@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.models.card import Card
+from app.models.price_history import PriceHistory
+from app.services.price_history_writer import daily_row
+from app.services.trend_analytics import TrendAnalyticsService
+
+
+def test_trends_keep_sources_apart(db):
+    card = Card(card_name="Umbreon VMAX", set_name="Evolving Skies", card_number="215", rarity="Secret Rare",
+                condition="Near Mint")
+    db.add(card)
+    db.commit()
+
+    today = datetime.utcnow()
+    yesterday = today - timedelta(days=1)
+    for row in (
+        daily_row(card.id, 10.0, snapshot_date=yesterday),
+        daily_row(card.id, 11.0, snapshot_date=today),
+        # Upstream reports a different price for the same day
+        daily_row(card.id, 50.0, snapshot_date=today, source="upstream"),
+    ):
+        db.add(PriceHistory(**row))
+    db.commit()
+
+    snapshot = TrendAnalyticsService.portfolio_trends(db, days=7, card_ids=[card.id])
+    upstream = TrendAnalyticsService.portfolio_trends(db, days=7, card_ids=[card.id], source="upstream")
+
+    snapshot_series = snapshot["cards"][0]["conditions"]["Near Mint"]
+    assert snapshot["total_series"] == 1
+    assert snapshot_series["current_price"] == 11.0
+    assert snapshot_series["highest_price"] == 11.0
+    assert upstream["cards"][0]["conditions"]["Near Mint"]["current_price"] == 50.0
+
+
+def test_volatility_ignores_carried_forward_days():
+    nan = np.nan
+    # The same +21% move every time, observed every third day
+    prices = np.array([[100.0, nan, nan, 121.0, nan, nan, 146.41]])
+
+    # Filled days would count as 0% returns and make this look volatile
+    assert TrendAnalyticsService.compute(prices)["volatility_percent"][0] < 1e-9